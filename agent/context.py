@@ -0,0 +1,146 @@
+"""Token-budgeted conversation context for the ReACT agent."""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+Message = Dict[str, Any]
+Summarizer = Callable[[List[Message]], str]
+
+
+def estimate_tokens(messages: List[Message]) -> int:
+    """Rough prompt size of `messages` (about 4 characters per token)."""
+    chars = 0
+    for message in messages:
+        chars += len(message.get("content") or "") + 16
+        if message.get("tool_calls"):
+            chars += len(json.dumps(message["tool_calls"]))
+    return chars // 4
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of `text` within about `max_tokens` tokens."""
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    head = limit * 3 // 4
+    tail = limit - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n...[{omitted} characters omitted]...\n{text[-tail:]}"
+
+
+def _digest(message: Message, width: int = 160) -> str:
+    """One line describing a message, for the summary of older steps."""
+    if message.get("tool_calls"):
+        calls = ", ".join(
+            f"{tc['function']['name']}({tc['function']['arguments']})"
+            for tc in message["tool_calls"]
+        )
+        line = f"Called {calls}"
+    else:
+        content = message.get("content") or ""
+        lines = [l.strip() for l in content.splitlines() if l.strip()]
+        actions = [l for l in lines if l.startswith(("Action:", "Action Input:"))]
+        line = " ".join(actions) if actions else " ".join(lines)
+    line = " ".join(line.split())
+    return line if len(line) <= width else line[: width - 3] + "..."
+
+
+class ContextManager:
+    """Keep the agent's history within a token budget.
+
+    Observations longer than `max_observation_tokens` are cut down to their
+    head and tail when they are recorded. When the prompt is built, the last
+    `keep_recent` steps (an assistant turn plus the observations that
+    answer it) are sent verbatim, and older steps are replaced by a single
+    summary message. If that still exceeds `max_tokens`, more recent steps
+    are folded into the summary, down to the latest one. `summarizer` turns
+    the folded messages into summary text; by default each message becomes
+    one line naming its action or the start of its observation. A limit of
+    None disables it, and all are None by default, so the full history is
+    resent; `ContextManager(3000, 500, 3)` is a reasonable budget.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        max_observation_tokens: Optional[int] = None,
+        keep_recent: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.max_observation_tokens = max_observation_tokens
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer
+        self.compactions = 0
+        self._summary_cache: Dict[int, str] = {}
+
+    def clone(self) -> "ContextManager":
+        """A manager with the same limits and summarizer but no state."""
+        return ContextManager(
+            self.max_tokens,
+            self.max_observation_tokens,
+            self.keep_recent,
+            self.summarizer,
+        )
+
+    def reset(self) -> None:
+        """Forget cached summaries; called at the start of every run."""
+        self.compactions = 0
+        self._summary_cache = {}
+
+    def observation(self, text: str) -> str:
+        """Truncate a tool observation before it is added to the history."""
+        if self.max_observation_tokens is None:
+            return text
+        return truncate_text(text, self.max_observation_tokens)
+
+    def _steps(self, history: List[Message]) -> List[List[Message]]:
+        # Tool results must stay with the assistant turn that requested them
+        steps: List[List[Message]] = []
+        for message in history:
+            if message.get("role") == "assistant" or not steps:
+                steps.append([])
+            steps[-1].append(message)
+        return steps
+
+    def _summary(self, folded: List[Message]) -> Message:
+        # History only grows within a run, so a prefix length identifies the summary
+        key = len(folded)
+        if key not in self._summary_cache:
+            if self.summarizer is not None:
+                text = self.summarizer(folded)
+            else:
+                text = "\n".join(f"- {_digest(m)}" for m in folded)
+            self._summary_cache[key] = text
+        return {
+            "role": "user",
+            "content": f"Summary of earlier steps:\n{self._summary_cache[key]}",
+        }
+
+    def compact(self, history: List[Message], fixed_tokens: int = 0) -> List[Message]:
+        """Return the history messages to send.
+
+        `fixed_tokens` is the size of the rest of the prompt (system prompt,
+        user input), which counts against `max_tokens` too.
+        """
+        steps = self._steps(history)
+        keep = len(steps)
+        if self.keep_recent is not None:
+            keep = min(self.keep_recent, keep)
+
+        def build(keep: int) -> List[Message]:
+            recent = [m for step in steps[len(steps) - keep :] for m in step]
+            folded = [m for step in steps[: len(steps) - keep] for m in step]
+            return ([self._summary(folded)] if folded else []) + recent
+
+        messages = build(keep)
+        while (
+            self.max_tokens is not None
+            and keep > 1
+            and fixed_tokens + estimate_tokens(messages) > self.max_tokens
+        ):
+            keep -= 1
+            messages = build(keep)
+        if keep < len(steps):
+            self.compactions += 1
+        return messages
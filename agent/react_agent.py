@@ -1,29 +1,160 @@
 """ReACT (Reasoning + Acting) Agent implementation."""
 
+import asyncio
 import json
 import re
-from typing import Any, Dict, List, Optional
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Generator, Hashable, List, Optional, Tuple
 from openai import OpenAI
+from agent.context import ContextManager, estimate_tokens
+from agent.session import AgentSession
+from agent.stream_parser import ReActStreamParser
 from tools.base import BaseTool, ToolRegistry, ToolResult
+from tools.executor import ToolExecutor
+from utils.log import get_logger
 
+log = get_logger(__name__)
+
+MODES = ("text", "native")
+# Text mode stops the model before it invents its own tool results
+STOP_SEQUENCES = ["Observation:"]
+# Memoized prompts kept per agent (one per distinct set of visible tools)
+PROMPT_CACHE_SIZE = 256
 
-class ReACTAgent:
-    """A ReACT agent that can reason and act using tools."""
 
-    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo"):
-        self.client = OpenAI(api_key=api_key)
+class ReACTAgent:
+    """A ReACT agent that can reason and act using tools.
+
+    mode="text" prompts for Thought/Action/Action Input blocks and parses them;
+    mode="native" passes the tool schemas as function-calling `tools` and
+    executes the model's structured tool calls.
+
+    With stream=True, text-mode completions are streamed and the stream is
+    closed as soon as a complete Action and Action Input have arrived.
+
+    `context` bounds what is resent each iteration (see ContextManager); by
+    default nothing is truncated or summarized.
+
+    The agent holds no per-run state of its own beyond a default session:
+    `run(..., session=agent.new_session())` lets threads share one agent, and
+    `arun` runs sessions concurrently on an event loop with `async_client`.
+    Without one it creates an AsyncOpenAI from `api_key`, unless `client`
+    was given: a custom client needs a matching `async_client`.
+
+    A step may request several tool calls (native parallel tool calls, or a
+    JSON list as the text-mode Action Input). They run concurrently through
+    `tool_registry.execute_many`, on a ToolExecutor with `max_parallel_tools`
+    threads (or processes, with tool_pool="process") shared by all sessions;
+    any call still running `tool_timeout` seconds after it started, or still
+    waiting for a worker that long, is reported as timed out. All observations go back to the model in the same
+    turn.
+
+    With `tool_top_k`, prompts list only the k registered tools that
+    `tool_registry.search` finds most relevant to the input, plus any tool
+    the session has already used, so prompt size does not grow with the
+    number of registered tools.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-3.5-turbo",
+        client: Any = None,
+        mode: str = "text",
+        stream: bool = False,
+        context: Optional[ContextManager] = None,
+        async_client: Any = None,
+        max_parallel_tools: int = 4,
+        tool_timeout: Optional[float] = 30.0,
+        tool_top_k: Optional[int] = None,
+        tool_pool: str = "thread",
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown agent mode '{mode}', expected one of {MODES}")
+        self._api_key = api_key
+        # Only an agent that built its own client may build the async one too
+        self._default_clients = client is None
+        self.client = client if client is not None else OpenAI(api_key=api_key)
+        self.async_client = async_client
         self.model = model
-        self.tool_registry = ToolRegistry()
-        self.conversation_history = []
+        self.mode = mode
+        self.stream = stream
+        self.stop = STOP_SEQUENCES
+        self.context = context if context is not None else ContextManager()
+        self._prompt_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+        self.tool_registry = ToolRegistry(
+            executor=ToolExecutor(
+                max_workers=max_parallel_tools, timeout=tool_timeout, kind=tool_pool
+            )
+        )
         self.max_iterations = 10
+        self.tool_top_k = tool_top_k
+        self._session = AgentSession(self.context)
+
+    @property
+    def conversation_history(self) -> List[Dict[str, Any]]:
+        """History of the last run() made without a session."""
+        return self._session.conversation_history
+
+    @conversation_history.setter
+    def conversation_history(self, history: List[Dict[str, Any]]) -> None:
+        self._session.conversation_history = history
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Counters of the last run() made without a session."""
+        return self._session.stats
 
     def register_tool(self, tool: BaseTool) -> None:
         """Register a tool with the agent."""
         self.tool_registry.register(tool)
 
-    def _get_system_prompt(self) -> str:
+    def _memoized(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Return build()'s cached value until the tool registry changes.
+
+        Prompts built from the tools are then byte-identical across iterations
+        and runs, which keeps them eligible for provider-side prompt caching.
+        """
+        version = (id(self.tool_registry), self.tool_registry.version)
+        cached = self._prompt_cache.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, build())
+            # Keys include retrieved tool subsets, so keep the cache bounded
+            if len(self._prompt_cache) >= PROMPT_CACHE_SIZE:
+                self._prompt_cache.pop(next(iter(self._prompt_cache)))
+            self._prompt_cache[key] = cached
+        return cached[1]
+
+    def _sorted_tool_schemas(
+        self, names: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        """Tool schemas in name order, independent of registration order.
+
+        `names` restricts them to a subset, as chosen by _visible_tools.
+        """
+        schemas = self.tool_registry.get_tool_schemas()
+        if names is not None:
+            schemas = [schema for schema in schemas if schema["name"] in names]
+        return sorted(schemas, key=lambda t: t["name"])
+
+    def _visible_tools(self, session: AgentSession) -> Optional[Tuple[str, ...]]:
+        """Names of the tools to show the model, or None for all of them.
+
+        With tool retrieval on, that is the tools retrieved for the run's
+        input plus every tool the session has already used.
+        """
+        if session.retrieved is None:
+            return None
+        return tuple(sorted(set(session.retrieved) | session.tools_used))
+
+    def _get_system_prompt(self, names: Optional[Tuple[str, ...]] = None) -> str:
         """Get the system prompt for the agent."""
-        tool_schemas = self.tool_registry.get_tool_schemas()
+        return self._memoized(("text", names), lambda: self._build_system_prompt(names))
+
+    def _build_system_prompt(self, names: Optional[Tuple[str, ...]] = None) -> str:
+        """Build the text-mode system prompt from the registered tools."""
+        tool_schemas = self._sorted_tool_schemas(names)
         tools_description = "\n".join(
             [f"- {tool['name']}: {tool['description']}" for tool in tool_schemas]
         )
@@ -39,14 +170,42 @@ Action: [The action to take, should be one of the available tools]
 Action Input: [The input to the action, as a JSON object]
 Observation: [The result of the action]
 
+To run the same tool on several inputs at once, give a JSON list of objects as the Action Input; all results come back in one Observation.
+
 When you have enough information to answer the user's question, you should respond with:
 Final Answer: [Your final answer to the user]
 
 Always think step by step and use tools when needed to gather information or perform actions."""
 
+    def _get_native_system_prompt(self) -> str:
+        """Get the system prompt for native function-calling mode."""
+        return """You are a helpful agent. Use the provided tools when you need information or need to perform an action.
+
+When you have enough information to answer the user's question, reply with the final answer directly instead of calling a tool.
+
+Always think step by step and use tools when needed to gather information or perform actions."""
+
+    def _get_native_tools(
+        self, names: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the registered tools in the chat completions `tools` format."""
+        return self._memoized(
+            ("native", names),
+            lambda: [
+                {"type": "function", "function": schema}
+                for schema in self._sorted_tool_schemas(names)
+            ],
+        )
+
     def _parse_agent_response(self, response: str) -> Dict[str, Any]:
         """Parse the agent's response to extract thought, action, and action input."""
-        result = {"thought": "", "action": "", "action_input": {}, "final_answer": ""}
+        result = {
+            "thought": "",
+            "action": "",
+            "action_input": {},
+            "final_answer": "",
+            "parse_error": False,
+        }
 
         # Extract thought
         thought_match = re.search(
@@ -72,6 +231,7 @@ Always think step by step and use tools when needed to gather information or per
                 result["action_input"] = json.loads(action_input_str)
             except json.JSONDecodeError:
                 result["action_input"] = {"input": action_input_str}
+                result["parse_error"] = True
 
         # Extract final answer
         final_answer_match = re.search(r"Final Answer:\s*(.*?)$", response, re.DOTALL)
@@ -80,63 +240,382 @@ Always think step by step and use tools when needed to gather information or per
 
         return result
 
-    def _execute_tool(self, action: str, action_input: Dict[str, Any]) -> ToolResult:
-        """Execute a tool with the given input."""
-        tool = self.tool_registry.get_tool(action)
-        if not tool:
-            return ToolResult(
-                success=False, result=None, error=f"Tool '{action}' not found"
-            )
-
-        return tool.execute(**action_input)
+    def _search_tools(self, query: str) -> List[str]:
+        """Names of the tool_top_k registered tools most relevant to `query`."""
+        return [tool.name for tool in self.tool_registry.search(query, self.tool_top_k)]
 
     def _build_messages(
-        self, user_input: str, observation: str = ""
+        self,
+        user_input: str,
+        observation: str = "",
+        session: Optional[AgentSession] = None,
     ) -> List[Dict[str, str]]:
         """Build messages for the OpenAI API."""
-        messages = [{"role": "system", "content": self._get_system_prompt()}]
-
-        # Add conversation history
-        for entry in self.conversation_history:
-            messages.append(entry)
-
-        # Add current user input
-        messages.append({"role": "user", "content": user_input})
+        session = session or self._session
+        messages = [
+            {
+                "role": "system",
+                "content": self._get_system_prompt(self._visible_tools(session)),
+            }
+        ]
+        tail = [{"role": "user", "content": user_input}]
 
         # Add observation if provided
         if observation:
-            messages.append(
-                {"role": "assistant", "content": f"Observation: {observation}"}
+            tail.append({"role": "assistant", "content": f"Observation: {observation}"})
+
+        # Add conversation history, compacted to fit the context budget
+        messages.extend(
+            session.context.compact(
+                session.conversation_history, estimate_tokens(messages + tail)
             )
+        )
+        return messages + tail
+
+    def _record_usage(self, response: Any, session: AgentSession) -> None:
+        """Add a completion's token usage to the per-run counters."""
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            session.stats["prompt_tokens"] += usage.prompt_tokens or 0
+            session.stats["cached_tokens"] += getattr(details, "cached_tokens", 0) or 0
+            session.stats["completion_tokens"] += usage.completion_tokens or 0
+
+    def _text_request(
+        self, messages: List[Dict[str, str]], session: AgentSession
+    ) -> Dict[str, Any]:
+        """Arguments of a text-mode completion request."""
+        session.stats["prompt_sizes"].append(estimate_tokens(messages))
+        request = {"model": self.model, "messages": messages, "temperature": 0.1}
+        if self.stop:
+            request["stop"] = self.stop
+        if self.stream:
+            request["stream"] = True
+            request["stream_options"] = {"include_usage": True}
+        return request
+
+    def _feed_chunk(
+        self, parser: ReActStreamParser, chunk: Any, session: AgentSession
+    ) -> bool:
+        """Feed one streamed chunk; True once the action is complete."""
+        content = chunk.choices[0].delta.content if chunk.choices else None
+        if content and parser.feed(content):
+            session.stats["early_stops"] += 1
+            return True
+        return False
+
+    def _finish_stream(
+        self,
+        parser: ReActStreamParser,
+        usage: Any,
+        messages: List[Dict[str, str]],
+        session: AgentSession,
+    ) -> str:
+        """Record a streamed completion's usage and return its text."""
+        if usage is not None:
+            self._record_usage(SimpleNamespace(usage=usage), session)
+        else:
+            # Usage only arrives in the final chunk, which an early stop never reads
+            session.stats["prompt_tokens"] += len(json.dumps(messages)) // 4
+            session.stats["completion_tokens"] += max(1, len(parser.text) // 4)
+        return parser.text
+
+    def _complete_text(
+        self, messages: List[Dict[str, str]], session: AgentSession
+    ) -> str:
+        """Get one text-mode completion, streaming it if enabled."""
+        start = time.perf_counter()
+        request = self._text_request(messages, session)
+        if not self.stream:
+            response = self.client.chat.completions.create(**request)
+            self._record_usage(response, session)
+            text = response.choices[0].message.content or ""
+        else:
+            stream = self.client.chat.completions.create(**request)
+            parser = ReActStreamParser()
+            usage = None
+            try:
+                for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if self._feed_chunk(parser, chunk, session):
+                        break
+            finally:
+                # Closing the stream cancels the rest of the generation
+                stream.close()
+            text = self._finish_stream(parser, usage, messages, session)
+        session.stats["llm_ms"] += (time.perf_counter() - start) * 1000.0
+        return text
+
+    async def _acomplete_text(
+        self, messages: List[Dict[str, str]], session: AgentSession
+    ) -> str:
+        """Async version of _complete_text."""
+        start = time.perf_counter()
+        request = self._text_request(messages, session)
+        client = self._get_async_client()
+        if not self.stream:
+            response = await client.chat.completions.create(**request)
+            self._record_usage(response, session)
+            text = response.choices[0].message.content or ""
+        else:
+            stream = await client.chat.completions.create(**request)
+            parser = ReActStreamParser()
+            usage = None
+            try:
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if self._feed_chunk(parser, chunk, session):
+                        break
+            finally:
+                await stream.close()
+            text = self._finish_stream(parser, usage, messages, session)
+        session.stats["llm_ms"] += (time.perf_counter() - start) * 1000.0
+        return text
+
+    def _complete_chat(self, request: Dict[str, Any], session: AgentSession) -> Any:
+        """Get one native-mode completion."""
+        start = time.perf_counter()
+        response = self.client.chat.completions.create(**request)
+        session.stats["llm_ms"] += (time.perf_counter() - start) * 1000.0
+        self._record_usage(response, session)
+        return response
+
+    async def _acomplete_chat(
+        self, request: Dict[str, Any], session: AgentSession
+    ) -> Any:
+        """Async version of _complete_chat."""
+        start = time.perf_counter()
+        response = await self._get_async_client().chat.completions.create(**request)
+        session.stats["llm_ms"] += (time.perf_counter() - start) * 1000.0
+        self._record_usage(response, session)
+        return response
+
+    def _get_async_client(self) -> Any:
+        """The async client used by arun(); an AsyncOpenAI is created on first use."""
+        if self.async_client is None:
+            if not self._default_clients:
+                raise ValueError(
+                    "arun() needs async_client when a custom client is given"
+                )
+            from openai import AsyncOpenAI
+
+            self.async_client = AsyncOpenAI(api_key=self._api_key)
+        return self.async_client
+
+    def _format_observation(self, action: str, tool_result: ToolResult) -> str:
+        """Describe a tool result for the model."""
+        if tool_result.success:
+            return f"Tool '{action}' executed successfully. Result: {tool_result.result}"
+        return f"Tool '{action}' failed. Error: {tool_result.error}"
+
+    def new_session(self) -> AgentSession:
+        """Create state for one more concurrent user of this agent."""
+        return AgentSession(self.context.clone())
+
+    def _start(self, session: Optional[AgentSession]) -> AgentSession:
+        """Reset the session a run will use; None means the agent's own."""
+        if session is None:
+            session = self._session
+            session.context = self.context
+        session.reset()
+        return session
+
+    def run(self, user_input: str, session: Optional[AgentSession] = None) -> str:
+        """Run the ReACT loop to process user input.
+
+        Per-run counters (iterations, prompt/cached/completion tokens, parse
+        failures, tool calls, early stream stops, time spent in completions,
+        estimated prompt tokens per iteration, history compactions) are left
+        in `session.stats`. Without a session the agent's own is used, which
+        `self.stats` and `self.conversation_history` expose; pass a session
+        from `new_session()` when several users share the agent.
+        """
+        session = self._start(session)
+        steps = self._steps(user_input, session)
+        reply = None
+        while True:
+            try:
+                kind, payload = steps.send(reply)
+            except StopIteration as done:
+                return done.value
+            if kind == "text":
+                reply = self._complete_text(payload, session)
+            elif kind == "chat":
+                reply = self._complete_chat(payload, session)
+            elif kind == "search":
+                reply = self._search_tools(payload)
+            else:
+                reply = self.tool_registry.execute_many(payload, session.stats)
+
+    async def arun(
+        self, user_input: str, session: Optional[AgentSession] = None
+    ) -> str:
+        """Run the ReACT loop on the event loop with the async client.
+
+        Completions are awaited and tools run on the agent's tool pool, so
+        many sessions can run concurrently on one loop.
+        """
+        self._get_async_client()  # fail before the run starts, not mid-way
+        session = self._start(session)
+        steps = self._steps(user_input, session)
+        reply = None
+        while True:
+            try:
+                kind, payload = steps.send(reply)
+            except StopIteration as done:
+                return done.value
+            if kind == "text":
+                reply = await self._acomplete_text(payload, session)
+            elif kind == "chat":
+                reply = await self._acomplete_chat(payload, session)
+            elif kind == "search":
+                reply = await asyncio.to_thread(self._search_tools, payload)
+            else:
+                reply = await self.tool_registry.aexecute_many(payload, session.stats)
+
+    def _steps(self, user_input: str, session: AgentSession) -> Generator:
+        """The ReACT loop as a generator of I/O requests.
+
+        It yields ("text", messages) for a text-mode completion, ("chat",
+        request) for a native one and ("tools", [(action, action_input), ...])
+        for one step's tool calls, and is sent back the completion text, the
+        response or the ToolResults in call order. run() and arun() only
+        differ in how they serve these. With tool retrieval on, it first
+        yields ("search", user_input) for the names of the relevant tools.
+        """
+        if self.tool_top_k and len(self.tool_registry.list_tools()) > self.tool_top_k:
+            session.retrieved = yield ("search", user_input)
+        if self.mode == "native":
+            answer = yield from self._run_native(user_input, session)
+        else:
+            answer = yield from self._run_text(user_input, session)
+        session.stats["compactions"] = session.context.compactions
+        log.info(
+            "agent.run_finished",
+            mode=self.mode,
+            iterations=session.stats["iterations"],
+            tool_calls=session.stats["tool_calls"],
+            llm_ms=round(session.stats["llm_ms"], 1),
+        )
+        return answer
 
-        return messages
+    def _run_native(self, user_input: str, session: AgentSession) -> Generator:
+        """Run the loop with native function calling."""
+        stats, history = session.stats, session.conversation_history
+        messages = [
+            {"role": "system", "content": self._get_native_system_prompt()},
+            {"role": "user", "content": user_input},
+        ]
+
+        for iteration in range(self.max_iterations):
+            stats["iterations"] += 1
+            prompt = messages + session.context.compact(
+                history, estimate_tokens(messages)
+            )
+            stats["prompt_sizes"].append(estimate_tokens(prompt))
+            tools = self._get_native_tools(self._visible_tools(session))
+            tool_kwargs = {"tools": tools} if tools else {}
+            response = yield (
+                "chat",
+                {
+                    "model": self.model,
+                    "messages": prompt,
+                    "temperature": 0.1,
+                    **tool_kwargs,
+                },
+            )
+            message = response.choices[0].message
+            log.debug(
+                "agent.response",
+                iteration=iteration + 1,
+                content=message.content,
+                tool_calls=len(message.tool_calls or []),
+            )
 
-    def run(self, user_input: str) -> str:
-        """Run the ReACT loop to process user input."""
-        self.conversation_history = []
+            if not message.tool_calls:
+                return message.content or ""
+
+            history.append(
+                {
+                    "role": "assistant",
+                    "content": message.content,
+                    "tool_calls": [
+                        {
+                            "id": tc.id,
+                            "type": "function",
+                            "function": {
+                                "name": tc.function.name,
+                                "arguments": tc.function.arguments,
+                            },
+                        }
+                        for tc in message.tool_calls
+                    ],
+                }
+            )
+            observations: Dict[str, str] = {}
+            calls = []
+            for tool_call in message.tool_calls:
+                action = tool_call.function.name
+                try:
+                    action_input = json.loads(tool_call.function.arguments or "{}")
+                except json.JSONDecodeError as e:
+                    stats["parse_failures"] += 1
+                    log.info(
+                        "agent.parse_failure", iteration=iteration + 1, action=action
+                    )
+                    observations[tool_call.id] = f"Invalid JSON arguments for '{action}': {e}"
+                else:
+                    log.info(
+                        "agent.tool_call",
+                        iteration=iteration + 1,
+                        action=action,
+                        input=action_input,
+                    )
+                    stats["tool_calls"] += 1
+                    session.tools_used.add(action)
+                    calls.append((tool_call.id, action, action_input))
+
+            # Parallel tool calls from one response run concurrently
+            if calls:
+                results = yield ("tools", [(action, args) for _, action, args in calls])
+                for (call_id, action, _), tool_result in zip(calls, results):
+                    observations[call_id] = session.context.observation(
+                        self._format_observation(action, tool_result)
+                    )
+            for tool_call in message.tool_calls:
+                observation = observations[tool_call.id]
+                log.debug(
+                    "agent.observation", iteration=iteration + 1, content=observation
+                )
+                history.append(
+                    {"role": "tool", "tool_call_id": tool_call.id, "content": observation}
+                )
+
+        return "Maximum iterations reached. Unable to complete the task."
+
+    def _run_text(self, user_input: str, session: AgentSession) -> Generator:
+        """Run the loop with the Thought/Action/Action Input text protocol."""
+        stats, history = session.stats, session.conversation_history
         current_input = user_input
         observation = ""
 
         for iteration in range(self.max_iterations):
             # Build messages for this iteration
-            messages = self._build_messages(current_input, observation)
+            messages = self._build_messages(current_input, observation, session)
 
             # Get response from the model
-            response = self.client.chat.completions.create(
-                model=self.model, messages=messages, temperature=0.1
-            )
-
-            agent_response = response.choices[0].message.content
-            print(f"\n--- Iteration {iteration + 1} ---")
-            print(f"Agent Response: {agent_response}")
+            stats["iterations"] += 1
+            agent_response = yield ("text", messages)
+            log.debug("agent.response", iteration=iteration + 1, content=agent_response)
 
             # Parse the response
             parsed = self._parse_agent_response(agent_response)
+            if parsed["parse_error"] or not (parsed["action"] or parsed["final_answer"]):
+                stats["parse_failures"] += 1
+                log.info("agent.parse_failure", iteration=iteration + 1)
 
             # Add to conversation history
-            self.conversation_history.append(
-                {"role": "assistant", "content": agent_response}
-            )
+            history.append({"role": "assistant", "content": agent_response})
 
             # Check if we have a final answer
             if parsed["final_answer"]:
@@ -144,30 +623,44 @@ Always think step by step and use tools when needed to gather information or per
 
             # Execute action if present
             if parsed["action"]:
-                print(
-                    f"Executing action: {parsed['action']} with input: {parsed['action_input']}"
-                )
-                tool_result = self._execute_tool(
-                    parsed["action"], parsed["action_input"]
+                log.info(
+                    "agent.tool_call",
+                    iteration=iteration + 1,
+                    action=parsed["action"],
+                    input=parsed["action_input"],
                 )
-
-                if tool_result.success:
-                    observation = f"Tool '{parsed['action']}' executed successfully. Result: {tool_result.result}"
+                # A list-valued Action Input runs the tool once per item, concurrently
+                inputs = parsed["action_input"]
+                if not isinstance(inputs, list):
+                    inputs = [inputs]
+                inputs = [i if isinstance(i, dict) else {"input": i} for i in inputs]
+                stats["tool_calls"] += len(inputs)
+                session.tools_used.add(parsed["action"])
+                results = yield ("tools", [(parsed["action"], i) for i in inputs])
+                parts = [
+                    session.context.observation(
+                        self._format_observation(parsed["action"], tool_result)
+                    )
+                    for tool_result in results
+                ]
+                if len(parts) == 1:
+                    observation = parts[0]
                 else:
-                    observation = (
-                        f"Tool '{parsed['action']}' failed. Error: {tool_result.error}"
+                    observation = "\n".join(
+                        f"[{n}] {part}" for n, part in enumerate(parts, 1)
                     )
 
-                print(f"Observation: {observation}")
+                log.debug(
+                    "agent.observation", iteration=iteration + 1, content=observation
+                )
 
                 # Add observation to conversation history
-                self.conversation_history.append(
-                    {"role": "user", "content": f"Observation: {observation}"}
-                )
+                history.append({"role": "user", "content": f"Observation: {observation}"})
             else:
                 # No action specified, ask for clarification
                 observation = "No action specified. Please provide a valid action."
-                print(f"Observation: {observation}")
+                log.debug(
+                    "agent.observation", iteration=iteration + 1, content=observation
+                )
 
         return "Maximum iterations reached. Unable to complete the task."
-
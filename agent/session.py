@@ -0,0 +1,49 @@
+"""Per-user run state for a shared ReACTAgent."""
+
+from typing import Any, Dict, List, Optional, Set
+
+from agent.context import ContextManager
+
+
+def new_stats() -> Dict[str, Any]:
+    """Fresh per-run counters."""
+    return {
+        "iterations": 0,
+        "prompt_tokens": 0,
+        "cached_tokens": 0,
+        "completion_tokens": 0,
+        "parse_failures": 0,
+        "tool_calls": 0,
+        "tool_timeouts": 0,
+        "invalid_args": 0,
+        "early_stops": 0,
+        "llm_ms": 0.0,
+        "prompt_sizes": [],
+        "compactions": 0,
+    }
+
+
+class AgentSession:
+    """Everything a run mutates: the history sent to the model, stats and context state.
+
+    The agent itself only holds configuration, the client(s) and the tool
+    registry, so one agent can serve many sessions at once, from threads via
+    `run(..., session=...)` or on one event loop via `arun`. Each session needs
+    its own ContextManager; `ReACTAgent.new_session()` clones the agent's.
+    """
+
+    def __init__(self, context: ContextManager):
+        self.context = context
+        self.conversation_history: List[Dict[str, Any]] = []
+        self.stats: Dict[str, Any] = new_stats()
+        # Tools retrieved for the current input (None = all are shown) and tools called so far
+        self.retrieved: Optional[List[str]] = None
+        self.tools_used: Set[str] = set()
+
+    def reset(self) -> None:
+        """Clear the state of the previous run."""
+        self.conversation_history = []
+        self.stats = new_stats()
+        self.retrieved = None
+        self.tools_used = set()
+        self.context.reset()
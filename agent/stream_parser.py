@@ -0,0 +1,46 @@
+"""Incremental parser for streamed Thought/Action/Action Input completions."""
+
+import json
+
+
+class ReActStreamParser:
+    """Accumulate streamed text and spot the end of the first action.
+
+    `feed()` returns True as soon as an `Action:` line and a complete JSON
+    object (or list of objects) after `Action Input:` have arrived. `text` is
+    then trimmed to end at that JSON value, so the caller can close the
+    stream and run the tool instead of waiting for whatever the model would
+    generate next. Final
+    answers and non-JSON inputs have no detectable end and are read to the
+    end of the stream.
+    """
+
+    MARKER = "Action Input:"
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str) -> bool:
+        """Append a streamed chunk; return True once the action is complete."""
+        if self.complete:
+            return True
+        self.text += chunk
+        # An object or list can only have closed in a chunk with a closing bracket
+        if not ("}" in chunk or "]" in chunk) or "Final Answer:" in self.text:
+            return False
+        marker = self.text.find(self.MARKER)
+        if marker < 0 or "Action:" not in self.text[:marker]:
+            return False
+        start = marker + len(self.MARKER)
+        start += len(self.text[start:]) - len(self.text[start:].lstrip())
+        if not self.text.startswith(("{", "["), start):
+            return False
+        try:
+            _, end = self._decoder.raw_decode(self.text, start)
+        except json.JSONDecodeError:
+            return False
+        self.text = self.text[:end]
+        self.complete = True
+        return True
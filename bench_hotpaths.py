@@ -0,0 +1,263 @@
+"""
+Microbenchmarks for the CPU-side hot paths of RetailRouter and ReACTAgent.
+
+No network is used: routers and agents are built on the deterministic fake
+client. Each case is parametrized (catalog size, top-k, response length, ...) and
+results are stored as JSON so later runs can be compared against a baseline:
+
+    python bench_hotpaths.py run --out bench_baseline.json
+    python bench_hotpaths.py run --out bench_current.json --filter router.
+    python bench_hotpaths.py compare bench_baseline.json bench_current.json --threshold 0.10
+
+`compare` exits non-zero when any case is slower than the baseline by more than
+the threshold (relative change of the median).
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from agent.react_agent import ReACTAgent
+from retail_router.fake_openai import FakeOpenAI
+from retail_router.router import RetailRouter
+from retail_router.synth_catalog import expand_catalog
+from utils.validation import compile_validator
+from tools.basic_tools import CalculatorTool, FileReadTool, FileWriteTool, ListDirectoryTool, WebSearchTool
+from utils.log import configure_logging, get_logger
+
+# name -> (param grid, setup(params) -> zero-arg callable)
+CASES: Dict[str, Tuple[List[Dict[str, Any]], Callable[..., Callable[[], Any]]]] = {}
+
+
+def bench(name: str, grid: List[Dict[str, Any]]):
+    def register(setup):
+        CASES[name] = (grid, setup)
+        return setup
+    return register
+
+
+_routers: Dict[int, RetailRouter] = {}
+
+
+def make_router(n: int) -> RetailRouter:
+    if n not in _routers:
+        _routers[n] = RetailRouter(tools=expand_catalog(n), client=FakeOpenAI())
+    return _routers[n]
+
+
+def make_agent(n_tools: int) -> ReACTAgent:
+    agent = ReACTAgent(api_key="bench", client=FakeOpenAI())
+    kinds = [CalculatorTool, FileReadTool, FileWriteTool, ListDirectoryTool, WebSearchTool]
+    for i in range(n_tools):
+        tool = kinds[i % len(kinds)]()
+        if i >= len(kinds):
+            tool.name = f"{tool.name}_{i}"
+        agent.register_tool(tool)
+    return agent
+
+
+def react_response(chars: int) -> str:
+    thought = ("I need to look this up before answering the question. " * (chars // 55 + 1))[:chars]
+    return f'Thought: {thought}\nAction: read_file\nAction Input: {{"file_path": "data/report.txt"}}'
+
+
+CATALOGS = [{"tools": n} for n in (30, 100, 1000, 10000)]
+QUERY = "Check inventory for SKU MOUSE-WL at store 300."
+
+
+@bench("router.rank_tools", CATALOGS)
+def _(tools):
+    router = make_router(tools)
+    q_emb, _ = router._embed_query(QUERY)
+    return lambda: router._rank_tools(q_emb)
+
+
+@bench("router.format_tool_options", [{"top_k": k} for k in (4, 16, 64)])
+def _(top_k):
+    router = make_router(300)
+    specs = router._tool_specs[:top_k]
+    return lambda: router._format_tool_options(specs)
+
+
+@bench("router.build_tool_map", CATALOGS)
+def _(tools):
+    catalog = make_router(tools)._tools
+    return lambda: {t.name: t for t in catalog}
+
+
+VALIDATE_ARGS = {
+    "valid": {"sku": "MOUSE-WL", "store": "300", "region": "West"},
+    "missing": {"store": "300"},
+    "wrong_type": {"sku": 42, "store": "300", "region": "Mars"},
+}
+
+
+@bench("router.validate_args", [{"args": k} for k in VALIDATE_ARGS])
+def _(args):
+    router = make_router(1000)
+    validate = router._validators["InventoryLookupWest"]
+    payload = VALIDATE_ARGS[args]
+    return lambda: validate(payload)
+
+
+@bench("router.compile_validators", CATALOGS)
+def _(tools):
+    catalog = make_router(tools)._tools
+    return lambda: {t.name: compile_validator(t.schema) for t in catalog}
+
+
+@bench("agent.parse_agent_response", [{"chars": c} for c in (200, 2000, 20000)])
+def _(chars):
+    agent = make_agent(5)
+    text = react_response(chars)
+    return lambda: agent._parse_agent_response(text)
+
+
+@bench("agent.get_system_prompt", [{"tools": n} for n in (5, 50, 500)])
+def _(tools):
+    agent = make_agent(tools)
+    return agent._get_system_prompt
+
+
+@bench("registry.get_tool_schemas", [{"tools": n} for n in (5, 50, 500)])
+def _(tools):
+    return make_agent(tools).tool_registry.get_tool_schemas
+
+
+@bench("registry.execute", [{"path": p} for p in ("direct", "executor")])
+def _(path):
+    # Dispatch overhead of validation, the worker pool and counters over a trivial call
+    agent = make_agent(5)
+    if path == "direct":
+        tool = agent.tool_registry.get_tool("calculator")
+        return lambda: tool.execute(expression="2 + 3")
+    return lambda: agent.tool_registry.execute("calculator", {"expression": "2 + 3"})
+
+
+@bench("log.agent_observation", [{"sink": s} for s in ("disabled", "queued", "print")])
+def _(sink):
+    # "print" is the synchronous write the agent used to do for every observation; to
+    # /dev/null it is a lower bound, a terminal or a full pipe is slower and can block
+    devnull = open(os.devnull, "w")
+    observation = "Tool 'read_file' executed successfully. Result: " + "x" * 2000
+    if sink == "print":
+        return lambda: print(f"Observation: {observation}", file=devnull, flush=True)
+    configure_logging("INFO" if sink == "disabled" else "DEBUG", "json", stream=devnull)
+    log = get_logger("bench")
+    return lambda: log.debug("agent.observation", iteration=1, content=observation)
+
+
+def measure(fn: Callable[[], Any], min_time: float, repeats: int) -> Dict[str, float]:
+    """Calibrate a loop count that takes ~min_time, then time `repeats` loops."""
+    loops = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t
+        if elapsed >= min_time / 10 or loops >= 1 << 20:
+            break
+        loops *= 2
+    loops = max(1, int(loops * min_time / max(elapsed, 1e-9)))
+    per_call = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_call.append((time.perf_counter() - t) / loops * 1e6)
+    return {
+        "median_us": statistics.median(per_call),
+        "min_us": min(per_call),
+        "stdev_us": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+def run(filter_: str, min_time: float, repeats: int) -> Dict[str, Any]:
+    results = {}
+    for name, (grid, setup) in CASES.items():
+        if filter_ and filter_ not in name:
+            continue
+        for params in grid:
+            cid = case_id(name, params)
+            fn = setup(**copy.deepcopy(params))
+            results[cid] = {"params": params, **measure(fn, min_time, repeats)}
+            print(f"{cid:<48}{results[cid]['median_us']:>12.2f} us")
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> bool:
+    """Print a comparison table; return True when no case regressed beyond threshold."""
+    ok = True
+    print(f"{'case':<48}{'baseline':>12}{'current':>12}{'change':>10}")
+    for cid, cur in current["results"].items():
+        base = baseline["results"].get(cid)
+        if base is None:
+            print(f"{cid:<48}{'-':>12}{cur['median_us']:>12.2f}{'new':>10}")
+            continue
+        change = cur["median_us"] / base["median_us"] - 1.0
+        flag = ""
+        if change > threshold:
+            flag, ok = "  REGRESSION", False
+        print(f"{cid:<48}{base['median_us']:>12.2f}{cur['median_us']:>12.2f}{change:>+10.1%}{flag}")
+    return ok
+
+
+def main():
+    p = argparse.ArgumentParser(description="Microbenchmarks for router and agent hot paths.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="run benchmarks and write JSON results")
+    r.add_argument("--out", default="bench_results.json")
+    r.add_argument("--filter", default="", help="only run cases whose name contains this")
+    r.add_argument("--min-time", type=float, default=0.2, help="target seconds per repeat")
+    r.add_argument("--repeats", type=int, default=5)
+    r.add_argument("--baseline", default=None, help="compare against this file after running")
+    r.add_argument("--threshold", type=float, default=0.10)
+    c = sub.add_parser("compare", help="flag regressions of current vs baseline")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.10)
+    args = p.parse_args()
+
+    if args.cmd == "run":
+        report = run(args.filter, args.min_time, args.repeats)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+        if not args.baseline:
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        current = report
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+    if not compare(baseline, current, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compare ReACTAgent execution modes on the same tasks.
+
+Runs every task through each mode (text protocol vs native function calling)
+and reports iterations, prompt/completion tokens, parse failures, tool calls,
+latency and how often the agent hit max_iterations. "text+stream" is text mode
+with streamed completions that are cut off once the action is complete,
+"text+nostop" is text mode without the Observation: stop sequence, and
+"+compact" (on any mode) bounds the context (ContextManager(3000, 500, 3))
+instead of resending the full, untruncated history every step.
+
+    OPENAI_BACKEND=fake python compare_agent_modes.py
+    python compare_agent_modes.py --modes text,native --runs 3 --out agent_modes.json
+    OPENAI_BACKEND=fake FAKE_REACT_OVERRUN=1 FAKE_TOKEN_LATENCY=20 python compare_agent_modes.py --modes text+nostop,text,text+stream
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from agent.context import ContextManager
+from agent.react_agent import MODES, ReACTAgent
+from retail_router.clients import build_client, needs_api_key
+from tools.basic_tools import CalculatorTool, FileReadTool, ListDirectoryTool, WebSearchTool
+
+TASKS = [
+    "What is 17 * 23 + 4?",
+    "What is (12.5 + 7.5) / 4?",
+    "List the files in the current directory.",
+    "Search the web for Python asyncio tutorials.",
+    "Read the file requirements.txt and tell me which packages it lists.",
+    "What is 2 ** 10 minus 24?",
+]
+MAX_ITERATIONS_ANSWER = "Maximum iterations reached. Unable to complete the task."
+
+
+def load_tasks(path: str) -> List[str]:
+    with open(path, "r") as f:
+        return [json.loads(line)["task"] for line in f if line.strip()]
+
+
+def make_agent(client: Any, model: str, mode: str) -> ReACTAgent:
+    mode, *variants = mode.split("+")
+    agent = ReACTAgent(api_key="unused", model=model, client=client, mode=mode, stream="stream" in variants)
+    if "nostop" in variants:
+        agent.stop = None
+    if "compact" in variants:
+        agent.context = ContextManager(max_tokens=3000, max_observation_tokens=500, keep_recent=3)
+    for tool in (CalculatorTool(), FileReadTool(), ListDirectoryTool(), WebSearchTool()):
+        agent.register_tool(tool)
+    return agent
+
+
+def run_mode(agent: ReACTAgent, tasks: List[str], runs: int) -> List[Dict[str, Any]]:
+    rows = []
+    for _ in range(runs):
+        for task in tasks:
+            t = time.perf_counter()
+            answer = agent.run(task)
+            rows.append({
+                "task": task,
+                "latency_ms": (time.perf_counter() - t) * 1000.0,
+                "gave_up": answer == MAX_ITERATIONS_ANSWER,
+                "max_prompt_tokens": max(agent.stats["prompt_sizes"], default=0),
+                **agent.stats,
+            })
+    return rows
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    def mean(key):
+        return float(np.mean([r[key] for r in rows])) if rows else 0.0
+
+    return {
+        "runs": len(rows),
+        "iterations": mean("iterations"),
+        "prompt_tokens": mean("prompt_tokens"),
+        "cached_tokens": mean("cached_tokens"),
+        "completion_tokens": mean("completion_tokens"),
+        "parse_failures": mean("parse_failures"),
+        "tool_calls": mean("tool_calls"),
+        "early_stops": mean("early_stops"),
+        "max_prompt_tokens": mean("max_prompt_tokens"),
+        "llm_ms": mean("llm_ms"),
+        "latency_ms": mean("latency_ms"),
+        "gave_up_rate": mean("gave_up"),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compare ReACTAgent text vs native function-calling modes.")
+    p.add_argument("--modes", default=",".join(MODES), help="comma-separated; also text+stream, text+nostop, <mode>+nocompact")
+    p.add_argument("--tasks", default=None, help="JSONL file with a 'task' field per line")
+    p.add_argument("--runs", type=int, default=1)
+    p.add_argument("--max-iterations", type=int, default=10)
+    p.add_argument("--out", default=None)
+    args = p.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and needs_api_key():
+        raise RuntimeError("Set OPENAI_API_KEY in your environment.")
+    model = os.getenv("DEFAULT_MODEL", "gpt-3.5-turbo")
+    client = build_client(api_key)
+    tasks = load_tasks(args.tasks) if args.tasks else TASKS
+
+    report = {}
+    for mode in args.modes.split(","):
+        agent = make_agent(client, model, mode)
+        agent.max_iterations = args.max_iterations
+        rows = run_mode(agent, tasks, args.runs)
+        report[mode] = {"summary": summarize(rows), "rows": rows}
+
+    cols = ["iterations", "prompt_tokens", "cached_tokens", "completion_tokens", "parse_failures", "tool_calls", "early_stops",
+            "max_prompt_tokens", "llm_ms", "latency_ms", "gave_up_rate"]
+    print(f"{len(tasks)} tasks x {args.runs} runs, model {model} (means per task)\n")
+    print(f"{'mode':<16}" + "".join(f"{c:>18}" for c in cols))
+    for mode, r in report.items():
+        print(f"{mode:<16}" + "".join(f"{r['summary'][c]:>18.2f}" for c in cols))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"model": model, "tasks": tasks, "modes": report}, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Load generator for RetailRouter.
+
+Replays golden (or any JSONL with a "query" field) queries against one shared
+router and reports throughput, per-stage latency percentiles, error rates,
+embedding-cache hit rates over time and the share of prompt tokens served from
+the provider's prompt cache.
+
+    # open loop: Poisson arrivals at a target rate, latency measured from the
+    # scheduled arrival so queueing delay is not hidden (no coordinated omission)
+    OPENAI_BACKEND=fake FAKE_LATENCY=lognormal:300:0.4 python load_test.py --mode open --qps 50 --duration 30
+
+    # closed loop: N workers issuing back-to-back requests
+    python load_test.py --mode closed --concurrency 16 --requests 2000 --query-cache 1024
+
+    # coalesce concurrent query embeddings into batched calls (5 ms window)
+    python load_test.py --mode closed --concurrency 32 --batch-window-ms 5
+
+The client comes from retail_router.clients, so it works against the real API,
+the fake backend, or a cassette.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+from retail_router.clients import build_client, needs_api_key
+from retail_router.router import RetailRouter
+
+STAGES = ["embed_ms", "rank_ms", "select_ms", "handler_ms", "synth_ms", "total_ms"]
+
+
+def load_queries(path: str) -> List[str]:
+    with open(path, "r") as f:
+        return [json.loads(line)["query"] for line in f if line.strip()]
+
+
+def query_stream(queries: List[str], zipf: float, seed: int):
+    """Endless query sequence; zipf > 0 skews popularity so repeats are realistic."""
+    rng = random.Random(seed)
+    if zipf > 0:
+        weights = [1.0 / (rank + 1) ** zipf for rank in range(len(queries))]
+        order = queries[:]
+        rng.shuffle(order)
+        while True:
+            yield rng.choices(order, weights=weights)[0]
+    while True:
+        order = queries[:]
+        rng.shuffle(order)
+        yield from order
+
+
+class Recorder:
+    """Thread-safe sink for per-request samples."""
+
+    def __init__(self):
+        self.samples: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, sample: Dict[str, Any]) -> None:
+        with self._lock:
+            self.samples.append(sample)
+
+
+def run_one(router: RetailRouter, query: str, scheduled: float, start: float, rec: Recorder) -> None:
+    try:
+        r = router.decide_and_execute(query)
+        ok, error = bool(r.get("ok")), r.get("error")
+        timings, cache_hit = r.get("timings", {}), bool(r.get("embed_cache_hit"))
+        fallback, usage = r.get("fallback") or [], r.get("usage") or {}
+    except Exception as e:
+        ok, error, timings, cache_hit, fallback, usage = False, str(e), {}, False, [], {}
+    done = time.perf_counter()
+    sample = {"t": done - start, "ok": ok, "error": error, "cache_hit": cache_hit, "fallback": fallback,
+              "prompt_tokens": usage.get("prompt_tokens", 0), "cached_tokens": usage.get("cached_tokens", 0)}
+    sample.update({k: v for k, v in timings.items() if k in STAGES})
+    # Response time from the intended send time, including any wait for a free worker
+    sample["response_ms"] = (done - scheduled) * 1000.0
+    rec.add(sample)
+
+
+def run_open_loop(router, queries, qps, duration, max_requests, max_workers, seed, rec, zipf):
+    rng = random.Random(seed)
+    stream = query_stream(queries, zipf, seed)
+    start = time.perf_counter()
+    next_at, sent = start, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while next_at - start < duration and sent < max_requests:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run_one, router, next(stream), next_at, start, rec)
+            sent += 1
+            next_at += rng.expovariate(qps)
+    return time.perf_counter() - start
+
+
+def run_closed_loop(router, queries, concurrency, duration, max_requests, seed, rec, zipf):
+    stream = query_stream(queries, zipf, seed)
+    lock = threading.Lock()
+    counter = {"sent": 0}
+    start = time.perf_counter()
+
+    def worker():
+        while time.perf_counter() - start < duration:
+            with lock:
+                if counter["sent"] >= max_requests:
+                    return
+                counter["sent"] += 1
+                query = next(stream)
+            now = time.perf_counter()
+            run_one(router, query, now, start, rec)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return time.perf_counter() - start
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    arr = np.asarray(values, dtype=np.float64)
+    return {f"p{p}": float(np.percentile(arr, p)) for p in (50, 90, 95, 99)} | {"max": float(arr.max())}
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float, window: float) -> Dict[str, Any]:
+    n = len(samples)
+    errors = [s for s in samples if not s["ok"]]
+    report: Dict[str, Any] = {
+        "requests": n,
+        "elapsed_s": elapsed,
+        "throughput_rps": n / elapsed if elapsed > 0 else 0.0,
+        "error_rate": len(errors) / n if n else 0.0,
+        "cache_hit_rate": sum(s["cache_hit"] for s in samples) / n if n else 0.0,
+        # Share of prompt tokens served from the provider's prompt cache
+        "cached_prompt_rate": sum(s["cached_tokens"] for s in samples) / max(1, sum(s["prompt_tokens"] for s in samples)),
+        "latency_ms": {k: percentiles([s[k] for s in samples if k in s]) for k in STAGES + ["response_ms"]},
+        "fallback_rate": {},
+        "top_errors": {},
+        "windows": [],
+    }
+    for s in samples:
+        for name in s.get("fallback", []):
+            report["fallback_rate"][name] = report["fallback_rate"].get(name, 0) + 1 / n
+    for e in errors:
+        key = (e["error"] or "unknown")[:80]
+        report["top_errors"][key] = report["top_errors"].get(key, 0) + 1
+
+    buckets: Dict[int, List[Dict[str, Any]]] = {}
+    for s in samples:
+        buckets.setdefault(int(s["t"] // window), []).append(s)
+    for b in sorted(buckets):
+        items = buckets[b]
+        resp = [s["response_ms"] for s in items]
+        report["windows"].append({
+            "t_start": b * window,
+            "rps": len(items) / window,
+            "p50_ms": float(np.percentile(resp, 50)),
+            "p99_ms": float(np.percentile(resp, 99)),
+            "error_rate": sum(not s["ok"] for s in items) / len(items),
+            "cache_hit_rate": sum(s["cache_hit"] for s in items) / len(items),
+        })
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nRequests: {report['requests']} in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+    print(f"Error rate: {report['error_rate']:.3%}   Cache hit rate: {report['cache_hit_rate']:.3%}   "
+          f"Cached prompt tokens: {report['cached_prompt_rate']:.1%}")
+    for name, rate in report["fallback_rate"].items():
+        print(f"Fallback {name}: {rate:.1%}")
+    print(f"\n{'stage':<12}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for stage, pct in report["latency_ms"].items():
+        if pct:
+            print(f"{stage:<12}{pct['p50']:>10.1f}{pct['p90']:>10.1f}{pct['p99']:>10.1f}{pct['max']:>10.1f}")
+    print(f"\n{'t(s)':>6}{'rps':>8}{'p50':>10}{'p99':>10}{'err':>8}{'hit':>8}")
+    for w in report["windows"]:
+        print(f"{w['t_start']:>6.0f}{w['rps']:>8.1f}{w['p50_ms']:>10.1f}{w['p99_ms']:>10.1f}"
+              f"{w['error_rate']:>8.1%}{w['cache_hit_rate']:>8.1%}")
+    for err, count in report["top_errors"].items():
+        print(f"  {count}x {err}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Open- and closed-loop load generator for RetailRouter.")
+    p.add_argument("--mode", choices=["open", "closed"], default="closed")
+    p.add_argument("--qps", type=float, default=10.0, help="target arrival rate (open loop)")
+    p.add_argument("--concurrency", type=int, default=8, help="workers (closed loop) or max in-flight (open loop)")
+    p.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    p.add_argument("--requests", type=int, default=10**9, help="stop after this many requests")
+    p.add_argument("--queries", default="retail_router/evals/golden.jsonl")
+    p.add_argument("--zipf", type=float, default=0.0, help="query popularity skew; 0 cycles uniformly")
+    p.add_argument("--query-cache", type=int, default=0, help="router query-embedding LRU size")
+    p.add_argument("--batch-window-ms", type=float, default=0.0,
+                   help="micro-batch concurrent query embeddings within this window (0 = off)")
+    p.add_argument("--batch-max", type=int, default=64, help="max queries per embedding batch")
+    p.add_argument("--deadline-ms", type=float, default=None,
+                   help="per-request budget; the router degrades instead of overrunning it")
+    p.add_argument("--window", type=float, default=5.0, help="seconds per time-series bucket")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default=None, help="write the full report as JSON")
+    args = p.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and needs_api_key():
+        raise RuntimeError("Set OPENAI_API_KEY in your environment.")
+
+    router = RetailRouter(
+        model=os.getenv("ROUTER_MODEL", "gpt-4o-mini"),
+        embed_model=os.getenv("EMBED_MODEL", "text-embedding-3-small"),
+        top_k=int(os.getenv("TOP_K", "4")),
+        client=build_client(api_key),
+        query_cache_size=args.query_cache,
+        embed_batch_window_ms=args.batch_window_ms,
+        embed_batch_max=args.batch_max,
+        deadline_ms=args.deadline_ms,
+    )
+    queries = load_queries(args.queries)
+    rec = Recorder()
+    print(f"Running {args.mode}-loop load against {len(queries)} distinct queries...")
+    if args.mode == "open":
+        max_workers = max(args.concurrency, int(args.qps * 10))
+        elapsed = run_open_loop(router, queries, args.qps, args.duration, args.requests,
+                                max_workers, args.seed, rec, args.zipf)
+    else:
+        elapsed = run_closed_loop(router, queries, args.concurrency, args.duration, args.requests,
+                                  args.seed, rec, args.zipf)
+
+    report = summarize(rec.samples, elapsed, args.window)
+    report["config"] = vars(args)
+    if router._batcher is not None:
+        report["embed_batching"] = dict(router._batcher.stats)
+    print_report(report)
+    if router._batcher is not None:
+        b = router._batcher.stats
+        print(f"\nEmbedding batches: {b['batches']} calls for {b['items']} queries "
+              f"({b['items'] / max(b['batches'], 1):.1f} avg, {b['max_batch']} max)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """Main entry point for the ReACT agent."""
 
 import sys
+from agent.context import ContextManager
 from agent.react_agent import ReACTAgent
 from tools.basic_tools import (
     CalculatorTool,
@@ -10,6 +11,7 @@ from tools.basic_tools import (
     WebSearchTool,
 )
 from utils.config import config
+from utils.log import configure_logging
 
 
 def setup_agent() -> ReACTAgent:
@@ -19,8 +21,24 @@ def setup_agent() -> ReACTAgent:
         print("Configuration validation failed. Please check your .env file.")
         sys.exit(1)
 
+    configure_logging(config.LOG_LEVEL, config.LOG_FORMAT)
+
     # Create agent
-    agent = ReACTAgent(api_key=config.OPENAI_API_KEY, model=config.DEFAULT_MODEL)
+    agent = ReACTAgent(
+        api_key=config.OPENAI_API_KEY,
+        model=config.DEFAULT_MODEL,
+        mode=config.AGENT_MODE,
+        stream=config.AGENT_STREAM,
+        context=ContextManager(
+            max_tokens=config.MAX_CONTEXT_TOKENS or None,
+            max_observation_tokens=config.MAX_OBSERVATION_TOKENS or None,
+            keep_recent=config.CONTEXT_KEEP_RECENT or None,
+        ),
+        max_parallel_tools=config.MAX_PARALLEL_TOOLS,
+        tool_timeout=config.TOOL_TIMEOUT,
+        tool_top_k=config.TOOL_TOP_K or None,
+        tool_pool=config.TOOL_POOL,
+    )
 
     # Register tools
     agent.register_tool(CalculatorTool())
@@ -0,0 +1,54 @@
+"""
+Regex heuristics that pull tool arguments out of a free-text query.
+
+Used where no model is asked for arguments: RetailRouter's top1_retrieval
+fallback, which runs the best-ranked tool when the budget leaves no time for
+a selection call, and FakeOpenAI, which answers tool calls offline.
+"""
+
+import re
+from typing import Any, Dict
+
+_ARG_PATTERNS = {
+    "sku": r"\bSKU\s+([A-Z0-9][A-Z0-9-]*)|\b([A-Z]{2,}-[A-Z0-9-]+)\b",
+    "base_sku": r"\bSKU\s+([A-Z0-9][A-Z0-9-]*)",
+    "store": r"\bstore\s+(\d+)",
+    "from_store": r"\bfrom\s+store\s+(\d+)",
+    "to_store": r"\bto\s+store\s+(\d+)",
+    "member_id": r"\bmember\s+(\d+)",
+    "order_id": r"\border\s+([0-9][0-9-]*)",
+    "card_number": r"\bcard\s+([0-9][0-9-]*)",
+    "zip_code": r"\b(\d{5})\b",
+    "near": r"\b(?:to|near)\s+(.+?)[?.]?$",
+    "qty": r"\b(\d+)\s+units\b",
+    "threshold": r"\bbelow\s+(\d+)",
+    "amount": r"\$(\d+(?:\.\d+)?)",
+    "weight": r"\b(\d+(?:\.\d+)?)\s*(?:pounds?|lbs?)\b",
+    "expression": r"([0-9(][0-9+\-*/. ()]*[0-9)])",
+}
+
+
+def guess_args(query: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill a JSON schema's properties from a query with simple regex heuristics."""
+    props = (schema or {}).get("properties", {})
+    required = set((schema or {}).get("required", []))
+    args: Dict[str, Any] = {}
+    for name, spec in props.items():
+        pattern = _ARG_PATTERNS.get(name)
+        value = None
+        if isinstance(spec, dict) and spec.get("enum"):
+            # Like a real model: name an allowed value, never a free-text one
+            lowered = query.lower()
+            value = next((v for v in spec["enum"] if str(v).lower() in lowered), None)
+            if value is not None or name in required:
+                args[name] = spec["enum"][0] if value is None else value
+            continue
+        if pattern:
+            m = re.search(pattern, query, re.IGNORECASE if name != "sku" else 0)
+            if m:
+                value = next(g for g in m.groups() if g is not None).strip()
+        if value is None and (name in required or not pattern):
+            value = query
+        if value is not None:
+            args[name] = value
+    return args
@@ -0,0 +1,110 @@
+"""
+Micro-batching scheduler for query embeddings.
+
+Concurrent callers submit single texts; a background thread waits for the
+first one, keeps collecting until `window_ms` has passed or `max_batch` texts
+are queued, then issues one embeddings call for the whole batch (duplicates
+sent once) and resolves each caller's future. Up to `max_inflight` batches are
+in flight at once, so the next window starts collecting while earlier calls
+are still waiting on the API. Added latency is bounded by the window; under
+load, N requests cost one API call instead of N.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+class EmbeddingBatcher:
+    def __init__(self, embed_fn: EmbedFn, window_ms: float = 5.0, max_batch: int = 64, max_inflight: int = 4):
+        self.embed_fn = embed_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_inflight = max_inflight
+        self.stats = {"batches": 0, "items": 0, "max_batch": 0}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+        self._pid: Optional[int] = None
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive fork, so a forked worker starts its own loop and queue
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pool = ThreadPoolExecutor(self.max_inflight, thread_name_prefix="embedding-batch")
+                self._inflight = threading.BoundedSemaphore(self.max_inflight)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, args=(self._queue,), daemon=True,
+                                                name="embedding-batcher")
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_thread()
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        return self.submit(text).result(timeout)
+
+    def _collect(self, q: "queue.Queue[Tuple[str, Future]]") -> List[Tuple[str, Future]]:
+        batch = [q.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self, q: "queue.Queue[Tuple[str, Future]]") -> None:
+        while True:
+            batch = self._collect(q)
+            # Backpressure: with max_inflight calls outstanding, keep queueing instead of collecting
+            self._inflight.acquire()
+            self._pool.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[Tuple[str, Future]]) -> None:
+        waiters: Dict[str, List[Future]] = {}
+        error: BaseException = RuntimeError("Embedding batch was abandoned")
+        try:
+            for text, fut in batch:
+                if fut.set_running_or_notify_cancel():
+                    waiters.setdefault(text, []).append(fut)
+            if not waiters:
+                return
+            texts = list(waiters)
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["items"] += len(batch)
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+            try:
+                vectors = self.embed_fn(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"Embedding backend returned {len(vectors)} vectors for {len(texts)} inputs")
+            except Exception as e:
+                error = e
+                return
+            for text, vec in zip(texts, vectors):
+                for fut in waiters[text]:
+                    fut.set_result(vec)
+        finally:
+            # Whatever went wrong above, no caller is left waiting on its future
+            for futs in waiters.values():
+                for fut in futs:
+                    if not fut.done():
+                        fut.set_exception(error)
+            self._inflight.release()
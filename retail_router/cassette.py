@@ -0,0 +1,135 @@
+"""
+Record/replay cassette for OpenAI embedding and chat-completion calls.
+
+In record mode every request is forwarded to the wrapped client and the
+request/response pair is appended to a JSONL cassette keyed by a canonical hash
+of the request (model, messages, tools, input, ...); an existing cassette is
+truncated first, so re-recording never leaves stale responses behind. In replay mode responses are
+served from the cassette with no network at all, so eval harnesses can be re-run
+after post-processing changes in seconds and without model drift. "auto" replays
+hits and records misses.
+
+Repeated identical requests (e.g. NUM_RUNS > 1) are recorded as separate
+responses and replayed in the order they were recorded.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from .fake_openai import from_dict
+
+MODES = ("record", "replay", "auto")
+
+# Transport-level options that do not change what the model is asked.
+_IGNORED_KWARGS = {"timeout", "extra_headers", "extra_query", "extra_body"}
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Canonical SHA-256 over the request payload; key order and whitespace never matter."""
+    payload = {k: v for k, v in request.items() if k not in _IGNORED_KWARGS and v is not None}
+    canonical = json.dumps({"kind": kind, **payload}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _to_data(resp: Any) -> Any:
+    if hasattr(resp, "model_dump"):
+        return resp.model_dump()
+    return resp
+
+
+class Cassette:
+    """Append-only JSONL store of request→response pairs."""
+
+    def __init__(self, path: str, mode: str = "auto"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self._entries: Dict[str, List[Any]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if mode == "record":
+            if os.path.exists(path):
+                open(path, "w", encoding="utf-8").close()
+        elif os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        self._entries[rec["key"]].append(rec["response"])
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def lookup(self, key: str) -> Optional[Any]:
+        with self._lock:
+            recorded = self._entries.get(key)
+            if self.mode == "record" or not recorded:
+                return None
+            idx = self._cursor[key]
+            if idx >= len(recorded):
+                if self.mode == "auto":
+                    return None
+                idx = idx % len(recorded)
+            self._cursor[key] = idx + 1
+            self.hits += 1
+            return recorded[idx]
+
+    def record(self, key: str, kind: str, request: Dict[str, Any], response: Any) -> None:
+        data = _to_data(response)
+        line = json.dumps({"key": key, "kind": kind, "request": request, "response": data}, default=str)
+        with self._lock:
+            self.misses += 1
+            self._entries[key].append(data)
+            self._cursor[key] = len(self._entries[key])
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class _Endpoint:
+    def __init__(self, client: "CassetteClient", kind: str, inner_create: Any):
+        self._client = client
+        self._kind = kind
+        self._inner_create = inner_create
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._client._call(self._kind, self._inner_create, kwargs)
+
+
+class CassetteClient:
+    """OpenAI-compatible client that records to or replays from a Cassette."""
+
+    def __init__(self, cassette: Cassette, inner: Any = None):
+        if inner is None and cassette.mode != "replay":
+            raise ValueError(f"Cassette mode '{cassette.mode}' needs a live client to record from")
+        self.cassette = cassette
+        self.inner = inner
+        self.embeddings = _Endpoint(self, "embeddings", inner.embeddings.create if inner else None)
+        self.chat = SimpleNamespace(
+            completions=_Endpoint(self, "chat", inner.chat.completions.create if inner else None)
+        )
+
+    def _call(self, kind: str, inner_create: Any, kwargs: Dict[str, Any]) -> Any:
+        if kwargs.get("stream"):
+            raise ValueError("Streaming requests cannot be recorded to a cassette")
+        key = request_key(kind, kwargs)
+        data = self.cassette.lookup(key)
+        if data is not None:
+            return from_dict(data)
+        if inner_create is None:
+            raise CassetteMiss(f"No recorded {kind} response for request {key[:12]} in {self.cassette.path}")
+        resp = inner_create(**kwargs)
+        self.cassette.record(key, kind, {k: v for k, v in kwargs.items() if k not in _IGNORED_KWARGS}, resp)
+        return resp
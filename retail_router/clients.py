@@ -0,0 +1,71 @@
+"""
+Client construction shared by the eval and benchmark harnesses.
+
+Environment:
+    OPENAI_BACKEND   "openai" (default) or "fake" for retail_router.fake_openai
+    FAKE_LATENCY     chat latency spec for the fake backend, e.g. "lognormal:400:0.5"
+    FAKE_EMBED_LATENCY  embedding latency spec for the fake backend
+    FAKE_TOKEN_LATENCY  fake generation time per output token in ms (default 0)
+    FAKE_REACT_OVERRUN  "1" makes fake ReACT replies run past Action Input
+    FAKE_PREFILL_LATENCY  fake latency in ms per 1k uncached prompt tokens (default 0)
+    CASSETTE         path of a record/replay cassette (JSONL); unset disables it
+    CASSETTE_MODE    "record", "replay" or "auto" (default)
+    RATE_LIMIT_RPS   cap on API requests per second across all threads (and, under
+                     retail_router.prefork, all workers); unset disables it
+    RATE_LIMIT_BURST token-bucket burst size (defaults to RATE_LIMIT_RPS)
+"""
+
+import os
+from typing import Any, Optional
+
+from .cassette import Cassette, CassetteClient
+from .fake_openai import FakeOpenAI, LatencyModel
+from .ratelimit import RateLimitedClient, RateLimiter
+
+
+def needs_api_key() -> bool:
+    """True when the configured client will actually talk to the OpenAI API."""
+    if os.getenv("OPENAI_BACKEND", "openai") == "fake":
+        return False
+    return not (os.getenv("CASSETTE") and os.getenv("CASSETTE_MODE", "auto") == "replay")
+
+
+def rate_limiter_from_env(shared: bool = False) -> Optional[RateLimiter]:
+    """The RATE_LIMIT_RPS/RATE_LIMIT_BURST limiter, or None when unset."""
+    rps = os.getenv("RATE_LIMIT_RPS")
+    if not rps:
+        return None
+    burst = os.getenv("RATE_LIMIT_BURST")
+    return RateLimiter(float(rps), int(burst) if burst else None, shared=shared)
+
+
+def build_client(api_key: Optional[str] = None, limiter: Optional[RateLimiter] = None) -> Any:
+    """The configured client; `limiter` replaces the one RATE_LIMIT_RPS would create."""
+    backend = os.getenv("OPENAI_BACKEND", "openai")
+    cassette_path = os.getenv("CASSETTE")
+    mode = os.getenv("CASSETTE_MODE", "auto")
+
+    inner: Any = None
+    if backend == "fake":
+        inner = FakeOpenAI(
+            embed_latency=LatencyModel.parse(os.getenv("FAKE_EMBED_LATENCY")),
+            chat_latency=LatencyModel.parse(os.getenv("FAKE_LATENCY"), seed=1),
+            token_latency_ms=float(os.getenv("FAKE_TOKEN_LATENCY", "0")),
+            react_overrun=os.getenv("FAKE_REACT_OVERRUN") == "1",
+            prefill_ms_per_1k=float(os.getenv("FAKE_PREFILL_LATENCY", "0")),
+        )
+    elif backend != "openai":
+        raise ValueError(f"Unknown OPENAI_BACKEND '{backend}'")
+    elif not (cassette_path and mode == "replay"):
+        from openai import OpenAI
+
+        inner = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+
+    limiter = limiter or rate_limiter_from_env()
+    if limiter is not None and inner is not None:
+        inner = RateLimitedClient(inner, limiter)
+
+    if cassette_path:
+        # Replayed responses never reach the limiter; only live misses are throttled
+        return CassetteClient(Cassette(cassette_path, mode), inner)
+    return inner
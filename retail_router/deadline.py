@@ -0,0 +1,36 @@
+"""
+Per-request time budgets for RetailRouter.
+
+A Deadline is created when a request arrives and handed to every stage. Each
+API call gets the remaining budget as its `timeout=`, and before starting an
+LLM call the router checks whether enough budget is left to make the call
+worthwhile; if not, it degrades instead (see RetailRouter.decide_and_execute).
+"""
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.expires_at = time.perf_counter() + budget_ms / 1000.0
+
+    @classmethod
+    def from_ms(cls, budget_ms: Optional[float]) -> Optional["Deadline"]:
+        return cls(budget_ms) if budget_ms else None
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.expires_at - time.perf_counter()) * 1000.0)
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.expires_at
+
+    def timeout(self) -> float:
+        """Remaining budget in seconds, for an SDK call's `timeout=` (never zero, which means no timeout)."""
+        return max(self.remaining_ms() / 1000.0, 0.001)
+
+
+def is_timeout(error: BaseException) -> bool:
+    """True for builtin timeouts and SDK ones such as openai.APITimeoutError."""
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
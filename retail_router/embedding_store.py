@@ -0,0 +1,190 @@
+"""
+On-disk, memory-mapped store for tool embeddings.
+
+Layout (little-endian):
+
+    b"RRTE" | u32 version | u32 header_len | JSON header | pad to 64 bytes
+    matrix  (n, dim) of float32 / float16 / int8
+    scales  (n,) float32   per-row dequantization factors (all 1.0 unless int8)
+    norms   (n,) float32   L2 norm of each dequantized row
+
+Opening a store maps these arrays with np.memmap, so every router process on a
+host shares one copy through the page cache instead of holding its own float32
+matrix. int8 rows are symmetric-quantized with a per-row scale; float16 halves
+memory with negligible recall loss (see retrieval_eval.py --quantize).
+
+    OPENAI_BACKEND=fake python -m retail_router.embedding_store build --out tools.emb --dtype int8
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"RRTE"
+VERSION = 1
+ALIGN = 64
+DTYPES = ("float32", "float16", "int8")
+
+
+def catalog_fingerprint(texts: Sequence[str]) -> str:
+    h = hashlib.sha256()
+    for t in texts:
+        h.update(t.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def quantize(matrix: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (stored matrix, per-row scales) for the requested storage dtype."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "float32":
+        return matrix, np.ones(len(matrix), dtype=np.float32)
+    if dtype == "float16":
+        return matrix.astype(np.float16), np.ones(len(matrix), dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        q = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return q, scales.astype(np.float32)
+    raise ValueError(f"Unknown store dtype '{dtype}', expected one of {DTYPES}")
+
+
+def matvec(matrix: np.ndarray, q: np.ndarray, scales: Optional[np.ndarray] = None, chunk: int = 8192) -> np.ndarray:
+    """
+    matrix @ q, dequantizing on the fly. Non-float32 matrices are converted one
+    chunk of rows at a time so no full float32 copy is ever materialized.
+    """
+    q = np.asarray(q, dtype=np.float32)
+    if matrix.dtype == np.float32:
+        out = matrix @ q
+    else:
+        out = np.empty(len(matrix), dtype=np.float32)
+        for i in range(0, len(matrix), chunk):
+            out[i:i + chunk] = matrix[i:i + chunk].astype(np.float32) @ q
+    if scales is not None:
+        out *= scales
+    return out
+
+
+def row_norms(matrix: np.ndarray, scales: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    out = np.empty(len(matrix), dtype=np.float32)
+    for i in range(0, len(matrix), chunk):
+        out[i:i + chunk] = np.linalg.norm(matrix[i:i + chunk].astype(np.float32), axis=1)
+    return out * scales
+
+
+def save_store(path: str, names: Sequence[str], matrix: np.ndarray, embed_model: str,
+               fingerprint: str = "", dtype: str = "float32", dimensions: Optional[int] = None) -> None:
+    stored, scales = quantize(matrix, dtype)
+    norms = row_norms(stored, scales)
+    header = json.dumps({
+        "names": list(names),
+        "embed_model": embed_model,
+        "fingerprint": fingerprint,
+        "dtype": dtype,
+        # `dimensions` requested from the endpoint (None = the model's native width)
+        "dimensions": dimensions,
+        "n": int(stored.shape[0]),
+        "dim": int(stored.shape[1]) if stored.ndim == 2 else 0,
+    }).encode("utf-8")
+    prefix = MAGIC + struct.pack("<II", VERSION, len(header)) + header
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+    # A private temp file per writer, so concurrent builders never interleave; the
+    # rename is atomic, so readers never see a half-written store
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False)
+    try:
+        with f:
+            f.write(prefix)
+            f.write(np.ascontiguousarray(stored).tobytes())
+            f.write(scales.astype("<f4").tobytes())
+            f.write(norms.astype("<f4").tobytes())
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+class EmbeddingStore:
+    """Read-only, memory-mapped view of a store written by save_store."""
+
+    def __init__(self, path: str, header: Dict[str, Any], matrix: np.ndarray, scales: np.ndarray, norms: np.ndarray):
+        self.path = path
+        self.header = header
+        self.names: List[str] = header["names"]
+        self.embed_model: str = header["embed_model"]
+        self.fingerprint: str = header.get("fingerprint", "")
+        self.dtype: str = header["dtype"]
+        self.dimensions: Optional[int] = header.get("dimensions")
+        self.matrix = matrix
+        self.scales = scales
+        self.norms = norms
+
+    @classmethod
+    def open(cls, path: str) -> "EmbeddingStore":
+        with open(path, "rb") as f:
+            magic = f.read(4)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an embedding store")
+            version, header_len = struct.unpack("<II", f.read(8))
+            if version != VERSION:
+                raise ValueError(f"Unsupported embedding store version {version}")
+            header = json.loads(f.read(header_len))
+        offset = 12 + header_len
+        offset += -offset % ALIGN
+        n, dim = header["n"], header["dim"]
+        matrix = np.memmap(path, dtype=np.dtype(header["dtype"]).newbyteorder("<"), mode="r", offset=offset, shape=(n, dim))
+        offset += matrix.nbytes
+        scales = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(n,))
+        norms = np.memmap(path, dtype="<f4", mode="r", offset=offset + scales.nbytes, shape=(n,))
+        return cls(path, header, matrix, scales, norms)
+
+    def matches(self, names: Sequence[str], embed_model: str, fingerprint: str, dtype: Optional[str] = None,
+                dimensions: Optional[int] = None) -> bool:
+        """
+        True if the store holds this catalog's embeddings at the requested endpoint
+        `dimensions` (None = native width), in `dtype` unless that is None.
+        """
+        return (list(names) == self.names and embed_model == self.embed_model and fingerprint == self.fingerprint
+                and dtype in (None, self.dtype) and dimensions == self.dimensions)
+
+    def dequantize(self) -> np.ndarray:
+        return self.matrix.astype(np.float32) * self.scales[:, None]
+
+
+def main():
+    import argparse
+
+    from .clients import build_client
+    from .router import RetailRouter
+    from .synth_catalog import expand_catalog
+
+    p = argparse.ArgumentParser(description="Build or inspect a memory-mapped tool embedding store.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--out", required=True)
+    b.add_argument("--dtype", choices=DTYPES, default="float32")
+    b.add_argument("--catalog-size", type=int, default=None)
+    i = sub.add_parser("info")
+    i.add_argument("path")
+    args = p.parse_args()
+
+    if args.cmd == "build":
+        tools = expand_catalog(args.catalog_size) if args.catalog_size else None
+        router = RetailRouter(embed_model=os.getenv("EMBED_MODEL", "text-embedding-3-small"),
+                              tools=tools, client=build_client())
+        router.save_embeddings(args.out, dtype=args.dtype)
+        print(f"Wrote {len(router._tools)} embeddings ({args.dtype}) to {args.out}")
+    else:
+        store = EmbeddingStore.open(args.path)
+        print(f"{args.path}: {len(store.names)} tools x {store.matrix.shape[1]} dims, {store.dtype}, "
+              f"{store.matrix.nbytes / 2**20:.1f} MB matrix, model {store.embed_model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,624 @@
+"""
+Deterministic, in-process stand-in for the OpenAI API.
+
+Implements the slice of the SDK surface used by RetailRouter and ReACTAgent
+(`client.embeddings.create` and `client.chat.completions.create`) so router and
+agent overhead, concurrency and caching can be benchmarked offline and
+reproducibly. It can also be served over local HTTP so an unmodified
+`OpenAI(base_url=...)` client can be pointed at it:
+
+    python -m retail_router.fake_openai --port 8765 --latency lognormal:80:0.4
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python run_eval.py
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .args import guess_args
+from .ranking import tokenize
+
+# Provider prompt caching: prefixes of at least 1024 tokens are cached in 128-token steps
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_BLOCK_TOKENS = 128
+
+
+class FakeObject(SimpleNamespace):
+    """Attribute-access response object that mirrors the SDK's pydantic models."""
+
+    def model_dump(self) -> Dict[str, Any]:
+        return _dump(self)
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, SimpleNamespace):
+        return {k: _dump(v) for k, v in vars(value).items()}
+    if isinstance(value, list):
+        return [_dump(v) for v in value]
+    return value
+
+
+def from_dict(value: Any) -> Any:
+    """Recursively convert plain JSON data into SDK-like response objects."""
+    if isinstance(value, dict):
+        return FakeObject(**{k: from_dict(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [from_dict(v) for v in value]
+    return value
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text or "") // 4)
+
+
+class LatencyModel:
+    """
+    Samples simulated per-call latency in seconds.
+
+    Specs are "none", "fixed:<ms>", "uniform:<lo_ms>:<hi_ms>", "normal:<mean_ms>:<sd_ms>"
+    or "lognormal:<median_ms>:<sigma>".
+    """
+
+    def __init__(self, dist: str = "none", a: float = 0.0, b: float = 0.0, seed: int = 0):
+        if dist not in ("none", "fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution '{dist}'")
+        self.dist = dist
+        self.a = a
+        self.b = b
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: Optional[str], seed: int = 0) -> "LatencyModel":
+        if not spec:
+            return cls("none", seed=seed)
+        parts = spec.split(":")
+        nums = [float(p) for p in parts[1:]] + [0.0, 0.0]
+        return cls(parts[0], nums[0], nums[1], seed=seed)
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.dist == "none":
+                ms = 0.0
+            elif self.dist == "fixed":
+                ms = self.a
+            elif self.dist == "uniform":
+                ms = self._rng.uniform(self.a, self.b)
+            elif self.dist == "normal":
+                ms = self._rng.gauss(self.a, self.b)
+            else:
+                ms = self.a * float(np.exp(self._rng.gauss(0.0, self.b)))
+        return max(0.0, ms) / 1000.0
+
+
+def hashed_embedding(text: str, dim: int = 1536) -> np.ndarray:
+    """
+    Deterministic bag-of-words embedding: every token and token bigram is hashed
+    to a signed bucket, so texts that share vocabulary have high cosine similarity.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    toks = tokenize(text)
+    feats = toks + [f"{a}_{b}" for a, b in zip(toks, toks[1:])]
+    for f in feats:
+        h = hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest()
+        idx = int.from_bytes(h[:4], "little") % dim
+        vec[idx] += 1.0 if h[4] & 1 else -1.0
+    norm = float(np.linalg.norm(vec))
+    if norm == 0.0:
+        vec[0] = 1.0
+        return vec
+    return vec / norm
+
+
+def _tool_score(query_tokens: set, name: str, description: str) -> float:
+    name_toks = set(tokenize(name))
+    desc_toks = set(tokenize(description))
+    return 3.0 * len(query_tokens & name_toks) + len(query_tokens & desc_toks) / (1.0 + len(desc_toks)) ** 0.5
+
+
+def pick_tool(query: str, tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the function spec whose name/description best overlaps the query."""
+    q = set(tokenize(query))
+    best, best_score = tools[0], float("-inf")
+    for t in tools:
+        fn = t.get("function", t)
+        score = _tool_score(q, fn.get("name", ""), fn.get("description", ""))
+        if score > best_score:
+            best, best_score = t, score
+    return best.get("function", best)
+
+
+_REACT_TOOL_LINE = re.compile(r"^- (\S+): (.*)$", re.MULTILINE)
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, list):
+        return " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return content or ""
+
+
+def _last(messages: List[Dict[str, Any]], role: str) -> Optional[Dict[str, Any]]:
+    for m in reversed(messages):
+        if m.get("role") == role:
+            return m
+    return None
+
+
+class FakeTimeout(TimeoutError):
+    """Raised when simulated latency exceeds the request's `timeout=`, like openai.APITimeoutError."""
+
+
+def _wait(latency: float, timeout: Optional[float]) -> None:
+    if timeout is not None and latency > timeout:
+        time.sleep(timeout)
+        raise FakeTimeout(f"Request timed out after {timeout:.3f}s")
+    time.sleep(latency)
+
+
+async def _await(latency: float, timeout: Optional[float]) -> None:
+    if timeout is not None and latency > timeout:
+        await asyncio.sleep(timeout)
+        raise FakeTimeout(f"Request timed out after {timeout:.3f}s")
+    await asyncio.sleep(latency)
+
+
+def _apply_stop(content: Optional[str], stop: Union[str, List[str], None]) -> Optional[str]:
+    """Cut `content` at the earliest stop sequence, which is not included, as the API does."""
+    if not content or not stop:
+        return content
+    cuts = [i for i in (content.find(s) for s in ([stop] if isinstance(stop, str) else stop)) if i >= 0]
+    return content[:min(cuts)] if cuts else content
+
+
+def _chunk_delay(chunk: Dict[str, Any], token_latency: float) -> float:
+    """Simulated generation time of one streamed chunk."""
+    if not token_latency or not chunk["choices"]:
+        return 0.0
+    delta = chunk["choices"][0]["delta"]
+    if not (delta["content"] or delta["tool_calls"]):
+        return 0.0
+    return token_latency * estimate_tokens(delta["content"] or json.dumps(delta["tool_calls"]))
+
+
+class FakeStream:
+    """
+    Iterable of chat.completion.chunk objects, like the SDK's Stream (supports close()).
+
+    With `token_latency` (seconds per output token) each chunk is delayed as if
+    it were being generated, so closing the stream early saves wall time.
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]], token_latency: float = 0.0):
+        self._chunks = iter(chunks)
+        self.token_latency = token_latency
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if self.closed:
+                return
+            time.sleep(_chunk_delay(chunk, self.token_latency))
+            yield from_dict(chunk)
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __enter__(self) -> "FakeStream":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class AsyncFakeStream:
+    """Async counterpart of FakeStream, like the SDK's AsyncStream (`async for`, `await close()`)."""
+
+    def __init__(self, chunks: List[Dict[str, Any]], token_latency: float = 0.0):
+        self._chunks = iter(chunks)
+        self.token_latency = token_latency
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            if self.closed:
+                return
+            await asyncio.sleep(_chunk_delay(chunk, self.token_latency))
+            yield from_dict(chunk)
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def __aenter__(self) -> "AsyncFakeStream":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+
+def _stream_chunks(resp: Dict[str, Any], include_usage: bool = False) -> List[Dict[str, Any]]:
+    """
+    Split a full completion into word-sized content deltas plus one delta per tool
+    call, ending with a usage-only chunk if `stream_options={"include_usage": True}`.
+    """
+    choice = resp["choices"][0]
+    message = choice["message"]
+    base = {"id": resp["id"], "object": "chat.completion.chunk", "created": resp["created"], "model": resp["model"]}
+
+    def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+        delta = {"role": None, "content": None, "tool_calls": None, **delta}
+        return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+
+    chunks = [chunk({"role": "assistant", "content": ""})]
+    chunks += [chunk({"content": piece}) for piece in re.findall(r"\s*\S+", message["content"] or "")]
+    for i, tc in enumerate(message["tool_calls"] or []):
+        chunks.append(chunk({"tool_calls": [{"index": i, **tc}]}))
+    chunks.append(chunk({}, choice["finish_reason"]))
+    if include_usage:
+        chunks.append({**base, "choices": [], "usage": resp["usage"]})
+    return chunks
+
+
+Script = Union[Callable[[Dict[str, Any]], Dict[str, Any]], List[Dict[str, Any]]]
+
+
+class _Embeddings:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, model: str, input: Union[str, List[str]], dimensions: Optional[int] = None,
+               timeout: Optional[float] = None, **_: Any) -> FakeObject:
+        return self._owner._embed(model, input, dimensions, timeout)
+
+
+class _Completions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, model: str, messages: List[Dict[str, Any]], **kwargs: Any) -> FakeObject:
+        return self._owner._complete(model, messages, **kwargs)
+
+
+class _AsyncEmbeddings:
+    def __init__(self, owner: "AsyncFakeOpenAI"):
+        self._owner = owner
+
+    async def create(self, model: str, input: Union[str, List[str]], dimensions: Optional[int] = None,
+                     timeout: Optional[float] = None, **_: Any) -> FakeObject:
+        return await self._owner._aembed(model, input, dimensions, timeout)
+
+
+class _AsyncCompletions:
+    def __init__(self, owner: "AsyncFakeOpenAI"):
+        self._owner = owner
+
+    async def create(self, model: str, messages: List[Dict[str, Any]], **kwargs: Any) -> Any:
+        return await self._owner._acomplete(model, messages, **kwargs)
+
+
+class FakeOpenAI:
+    """
+    Drop-in replacement for `openai.OpenAI` covering embeddings and chat completions.
+
+    Tool choices are heuristic (lexical overlap between the user message and each
+    offered tool) unless `script` is given: either a list of message dicts returned
+    in order, or a callable receiving the request kwargs and returning one. A message
+    dict looks like {"content": "...", "tool_calls": [{"name": ..., "arguments": {...}}]}.
+
+    `token_latency_ms` adds generation time per output token on top of
+    `chat_latency`, and `react_overrun=True` makes ReACT text replies run past
+    `Action Input:` into a made-up Observation and Final Answer, as real models
+    do without a stop sequence. `stop=` is honoured either way.
+
+    Prompt caching is simulated like the provider's: once a prompt (tools
+    first, then messages) shares a prefix of at least 1024 tokens with an
+    earlier one, that prefix is reported in
+    `usage.prompt_tokens_details.cached_tokens`, and only uncached tokens pay
+    `prefill_ms_per_1k`. `prompt_cache_size` bounds the remembered prefixes
+    (0 disables caching).
+    """
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        embed_latency: Optional[LatencyModel] = None,
+        chat_latency: Optional[LatencyModel] = None,
+        script: Optional[Script] = None,
+        token_latency_ms: float = 0.0,
+        react_overrun: bool = False,
+        prefill_ms_per_1k: float = 0.0,
+        prompt_cache_size: int = 4096,
+        **_: Any,
+    ):
+        self.dim = dim
+        self.token_latency = token_latency_ms / 1000.0
+        self.react_overrun = react_overrun
+        self.prefill_latency = prefill_ms_per_1k / 1000.0 / 1000.0
+        self.prompt_cache_size = prompt_cache_size
+        self._prefixes: "OrderedDict[bytes, None]" = OrderedDict()
+        self.embed_latency = embed_latency or LatencyModel()
+        self.chat_latency = chat_latency or LatencyModel()
+        self._script = script
+        self._lock = threading.Lock()
+        self.calls = {"embeddings": 0, "chat": 0}
+        self.embeddings = _Embeddings(self)
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.calls[kind] += 1
+
+    def _embed(self, model: str, input: Union[str, List[str]], dimensions: Optional[int], timeout: Optional[float] = None) -> FakeObject:
+        self._count("embeddings")
+        _wait(self.embed_latency.sample(), timeout)
+        return self._embedding_response(model, input, dimensions)
+
+    def _embedding_response(self, model: str, input: Union[str, List[str]], dimensions: Optional[int]) -> FakeObject:
+        texts = [input] if isinstance(input, str) else list(input)
+        data = []
+        for i, text in enumerate(texts):
+            vec = hashed_embedding(text, self.dim)
+            if dimensions:
+                vec = vec[:dimensions]
+                vec = vec / (float(np.linalg.norm(vec)) or 1.0)
+            data.append({"object": "embedding", "index": i, "embedding": vec.tolist()})
+        tokens = sum(estimate_tokens(t) for t in texts)
+        return from_dict({
+            "object": "list", "model": model, "data": data,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _cached_tokens(self, prompt_text: str) -> int:
+        """Tokens of `prompt_text` covered by a previously seen prefix; remembers its prefixes."""
+        if not self.prompt_cache_size:
+            return 0
+        block = PROMPT_CACHE_BLOCK_TOKENS * 4
+        h = hashlib.blake2b(digest_size=16)
+        keys = []
+        for i in range(len(prompt_text) // block):
+            h.update(prompt_text[i * block:(i + 1) * block].encode("utf-8"))
+            keys.append(h.digest())
+        hits = 0
+        with self._lock:
+            for key in keys:
+                if key not in self._prefixes:
+                    break
+                self._prefixes.move_to_end(key)
+                hits += 1
+            for key in keys[hits:]:
+                self._prefixes[key] = None
+            while len(self._prefixes) > self.prompt_cache_size:
+                self._prefixes.popitem(last=False)
+        cached = hits * PROMPT_CACHE_BLOCK_TOKENS
+        return cached if cached >= PROMPT_CACHE_MIN_TOKENS else 0
+
+    def _next_scripted(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self._script is None:
+            return None
+        if callable(self._script):
+            return self._script(request)
+        with self._lock:
+            return self._script.pop(0) if self._script else None
+
+    def _heuristic(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        user = _content_text((_last(messages, "user") or {}).get("content"))
+        last = messages[-1] if messages else {}
+        rejected = False
+        if last.get("role") == "tool":
+            try:
+                result = json.loads(last.get("content") or "{}")
+                text = result.get("content") if isinstance(result, dict) else None
+            except json.JSONDecodeError:
+                result, text = None, None
+            # A failed call while tools are still offered (e.g. rejected arguments): choose again
+            rejected = bool(tools) and isinstance(result, dict) and result.get("ok") is False
+            if not rejected:
+                return {"content": text or _content_text(last.get("content"))}
+        if tools:
+            fn = pick_tool(user, tools)
+            return {"content": None, "tool_calls": [{"name": fn["name"], "arguments": guess_args(user, fn.get("parameters", {}))}]}
+        system = _content_text((_last(messages, "system") or {}).get("content"))
+        if "Action Input:" in system:
+            observations = [
+                _content_text(m.get("content")) for m in messages
+                if m.get("role") != "system" and _content_text(m.get("content")).startswith("Observation:")
+            ]
+            if observations:
+                return {"content": f"Thought: I now have the result.\nFinal Answer: {observations[-1][len('Observation:'):].strip()}"}
+            listed = [{"name": n, "description": d} for n, d in _REACT_TOOL_LINE.findall(system)]
+            if not listed:
+                return {"content": f"Thought: No tools are needed.\nFinal Answer: {user}"}
+            fn = pick_tool(user, listed)
+            args = guess_args(user, {"properties": {"expression": {}}}) if fn["name"] == "calculator" else {"input": user}
+            content = f"Thought: I should use {fn['name']}.\nAction: {fn['name']}\nAction Input: {json.dumps(args)}"
+            if self.react_overrun:
+                content += (f"\nObservation: The {fn['name']} tool returned a result for {user}\n"
+                            f"Thought: I now know the final answer.\nFinal Answer: I believe the answer to {user} is 42.")
+            return {"content": content}
+        return {"content": f"OK: {user}"}
+
+    def _complete(self, model: str, messages: List[Dict[str, Any]], **kwargs: Any) -> Any:
+        self._count("chat")
+        latency, prompt_tokens, cached_tokens = self._prefill(messages, kwargs.get("tools"))
+        _wait(latency, kwargs.get("timeout"))
+        resp = self._chat_response(model, messages, prompt_tokens, cached_tokens, **kwargs)
+        if kwargs.get("stream"):
+            return FakeStream(_stream_chunks(resp, _include_usage(kwargs)), self.token_latency)
+        time.sleep(self.token_latency * resp["usage"]["completion_tokens"])
+        return from_dict(resp)
+
+    def _prefill(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Tuple[float, int, int]:
+        """Time to first token, prompt tokens and cached prompt tokens for a request."""
+        prompt_text = (json.dumps(tools) if tools else "") + json.dumps(messages)
+        prompt_tokens = estimate_tokens(prompt_text)
+        cached_tokens = self._cached_tokens(prompt_text)
+        latency = self.chat_latency.sample() + self.prefill_latency * (prompt_tokens - cached_tokens)
+        return latency, prompt_tokens, cached_tokens
+
+    def _chat_response(self, model: str, messages: List[Dict[str, Any]], prompt_tokens: int, cached_tokens: int,
+                       **kwargs: Any) -> Dict[str, Any]:
+        tools = kwargs.get("tools")
+        reply = self._next_scripted({"model": model, "messages": messages, **kwargs})
+        if reply is None:
+            reply = self._heuristic(messages, tools)
+        tool_calls = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": tc["name"],
+                    # None passes through, like a malformed provider reply with no arguments string
+                    "arguments": tc["arguments"] if tc["arguments"] is None or isinstance(tc["arguments"], str)
+                    else json.dumps(tc["arguments"]),
+                },
+            }
+            for tc in reply.get("tool_calls") or []
+        ]
+        content = _apply_stop(reply.get("content"), kwargs.get("stop"))
+        completion_text = (content or "") + "".join(tc["function"]["arguments"] or "" for tc in tool_calls)
+        completion_tokens = estimate_tokens(completion_text)
+        resp = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "message": {"role": "assistant", "content": content, "tool_calls": tool_calls or None},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+        return resp
+
+
+def _include_usage(kwargs: Dict[str, Any]) -> bool:
+    return bool((kwargs.get("stream_options") or {}).get("include_usage"))
+
+
+class AsyncFakeOpenAI(FakeOpenAI):
+    """
+    Drop-in replacement for `openai.AsyncOpenAI`: the same fake, with awaitable
+    `create` methods whose simulated latency sleeps on the event loop, so many
+    concurrent requests cost no threads.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.embeddings = _AsyncEmbeddings(self)
+        self.chat = SimpleNamespace(completions=_AsyncCompletions(self))
+
+    async def _aembed(self, model: str, input: Union[str, List[str]], dimensions: Optional[int],
+                      timeout: Optional[float] = None) -> FakeObject:
+        self._count("embeddings")
+        await _await(self.embed_latency.sample(), timeout)
+        return self._embedding_response(model, input, dimensions)
+
+    async def _acomplete(self, model: str, messages: List[Dict[str, Any]], **kwargs: Any) -> Any:
+        self._count("chat")
+        latency, prompt_tokens, cached_tokens = self._prefill(messages, kwargs.get("tools"))
+        await _await(latency, kwargs.get("timeout"))
+        resp = self._chat_response(model, messages, prompt_tokens, cached_tokens, **kwargs)
+        if kwargs.get("stream"):
+            return AsyncFakeStream(_stream_chunks(resp, _include_usage(kwargs)), self.token_latency)
+        await asyncio.sleep(self.token_latency * resp["usage"]["completion_tokens"])
+        return from_dict(resp)
+
+
+def serve_http(fake: FakeOpenAI, host: str = "127.0.0.1", port: int = 8765):
+    """
+    Serve `fake` over HTTP at /v1/embeddings and /v1/chat/completions.
+
+    Requests with "stream": true are answered as text/event-stream `data:` chunks
+    ending in `data: [DONE]`, the way the real API streams.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            path = self.path.rstrip("/")
+            if path.endswith("/embeddings"):
+                resp = fake.embeddings.create(**body)
+            elif path.endswith("/chat/completions"):
+                resp = fake.chat.completions.create(**body)
+            else:
+                self.send_error(404)
+                return
+            if isinstance(resp, FakeStream):
+                self._stream(resp)
+                return
+            payload = json.dumps(resp.model_dump()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream(self, stream: FakeStream):
+            # Server-sent events like the real API; the connection closes after [DONE].
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            with stream:
+                for chunk in stream:
+                    self.wfile.write(b"data: " + json.dumps(chunk.model_dump()).encode("utf-8") + b"\n\n")
+                    self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main():
+    import argparse
+
+    p = argparse.ArgumentParser(description="Serve a deterministic fake OpenAI API over HTTP.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--dim", type=int, default=1536)
+    p.add_argument("--embed-latency", default=None, help="e.g. fixed:20 or lognormal:30:0.3")
+    p.add_argument("--latency", default=None, help="chat latency, e.g. lognormal:400:0.5")
+    p.add_argument("--token-latency-ms", type=float, default=0.0, help="generation time per output token")
+    p.add_argument("--prefill-ms-per-1k", type=float, default=0.0, help="latency per 1k uncached prompt tokens")
+    p.add_argument("--react-overrun", action="store_true", help="ReACT replies run past Action Input")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    fake = FakeOpenAI(
+        dim=args.dim,
+        embed_latency=LatencyModel.parse(args.embed_latency, args.seed),
+        chat_latency=LatencyModel.parse(args.latency, args.seed + 1),
+        token_latency_ms=args.token_latency_ms,
+        react_overrun=args.react_overrun,
+        prefill_ms_per_1k=args.prefill_ms_per_1k,
+    )
+    server = serve_http(fake, args.host, args.port)
+    print(f"Fake OpenAI API listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
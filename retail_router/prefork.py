@@ -0,0 +1,308 @@
+"""
+Pre-fork multi-process server for RetailRouter.
+
+The parent builds the router once (embedding the catalog, or mapping an
+embedding store) and binds the listening socket, then forks N workers that
+accept on that shared socket. Workers inherit the embedding matrix: a plain
+numpy matrix is shared copy-on-write (nothing writes to it), a memory-mapped
+store through the page cache. Each worker recreates its API client, since
+HTTP connection pools do not survive fork, so startup costs no extra
+embedding calls and throughput scales with cores past the GIL.
+
+    OPENAI_BACKEND=fake python -m retail_router.prefork --workers 4 --port 8000 --embedding-store tools.emb
+    curl -s localhost:8000/route -d '{"query": "Check inventory for SKU SW-123 at store 0001"}'
+
+Endpoints (served by whichever worker accepts):
+    POST /route    {"query": ..., "deadline_ms": optional} -> decide_and_execute result
+    GET  /healthz  worker pid, requests served and uptime
+    GET  /stats    router cache stats for that worker
+
+API calls are unthrottled unless RATE_LIMIT_RPS is set (see clients.py); then
+all workers draw from one shared token bucket, so the cap holds for the whole
+server rather than per worker.
+
+The parent supervises workers: dead workers are replaced, workers whose
+heartbeat goes stale are killed and replaced, and each worker exits after
+max_requests (+ jitter) so slow leaks never accumulate. SIGTERM/SIGINT stop
+the server gracefully (in-flight requests finish), SIGHUP recycles all workers.
+"""
+
+import json
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.sharedctypes import RawArray
+from typing import Any, Callable, Dict, Optional
+
+from .clients import build_client, rate_limiter_from_env
+from .router import RetailRouter
+
+
+class _WorkerHTTPServer(ThreadingHTTPServer):
+    # Finish in-flight requests on shutdown instead of dropping daemon threads
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, sock: socket.socket, handler: type, on_tick: Callable[[], None]):
+        super().__init__(sock.getsockname()[:2], handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self._on_tick = on_tick
+
+    def service_actions(self):
+        # Runs once per serve_forever poll; a wedged accept loop stops the heartbeat
+        self._on_tick()
+
+
+class PreforkServer:
+    def __init__(
+        self,
+        router: RetailRouter,
+        workers: int = 4,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        health_timeout: float = 30.0,
+        graceful_timeout: float = 30.0,
+        client_factory: Optional[Callable[[], Any]] = None,
+    ):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("PreforkServer needs os.fork (POSIX only)")
+        self.router = router
+        self.num_workers = workers
+        self.host = host
+        self.port = port
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.health_timeout = health_timeout
+        self.graceful_timeout = graceful_timeout
+        # One bucket in shared memory, so RATE_LIMIT_RPS caps the whole server rather than each worker
+        self.rate_limiter = rate_limiter_from_env(shared=True)
+        self.client_factory = client_factory or (lambda: build_client(limiter=self.rate_limiter))
+        self.workers: Dict[int, int] = {}  # pid -> slot
+        self.stats = {"spawned": 0, "recycled": 0, "crashed": 0, "killed_unhealthy": 0}
+        self._heartbeats = RawArray("d", workers)
+        self._spawned_at = [0.0] * workers
+        self._respawn_after = [0.0] * workers
+        self._sock: Optional[socket.socket] = None
+        self._running = False
+        self._reload = False
+
+    @property
+    def address(self):
+        return self._sock.getsockname()[:2]
+
+    def start(self) -> None:
+        self._sock = socket.create_server((self.host, self.port), backlog=512)
+        self._running = True
+        for slot in range(self.num_workers):
+            self._spawn(slot)
+
+    def serve_forever(self) -> None:
+        """Start workers and supervise them until SIGTERM/SIGINT."""
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        self.start()
+        try:
+            while self._running:
+                self.poll()
+                time.sleep(0.2)
+        finally:
+            self.stop()
+
+    def _on_stop(self, signum, frame):
+        self._running = False
+
+    def _on_reload(self, signum, frame):
+        self._reload = True
+
+    def poll(self) -> None:
+        """One supervision pass: reap exits, kill stale workers, refill free slots."""
+        now = time.time()
+        for pid, slot, status in self._reap():
+            if os.waitstatus_to_exitcode(status) == 0:
+                self.stats["recycled"] += 1
+            else:
+                self.stats["crashed"] += 1
+                # A worker that dies within a second of starting is likely crash-looping; back off
+                if now - self._spawned_at[slot] < 1.0:
+                    self._respawn_after[slot] = now + 1.0
+
+        for pid, slot in list(self.workers.items()):
+            if now - self._heartbeats[slot] > self.health_timeout:
+                self.stats["killed_unhealthy"] += 1
+                self._signal(pid, signal.SIGKILL)
+
+        if self._reload:
+            self._reload = False
+            for pid in list(self.workers):
+                self._signal(pid, signal.SIGTERM)
+
+        if self._running:
+            busy = set(self.workers.values())
+            for slot in range(self.num_workers):
+                if slot not in busy and now >= self._respawn_after[slot]:
+                    self._spawn(slot)
+
+    def stop(self) -> None:
+        self._running = False
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.time() + self.graceful_timeout
+        while self.workers and time.time() < deadline:
+            if not self._reap():
+                time.sleep(0.05)
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.pop(pid, None)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _reap(self):
+        """Collect exited workers (only our own pids, never other children of this process)."""
+        exited = []
+        for pid in list(self.workers):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, 0
+            if done:
+                exited.append((pid, self.workers.pop(pid), status))
+        return exited
+
+    @staticmethod
+    def _signal(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _spawn(self, slot: int) -> None:
+        self._heartbeats[slot] = time.time()
+        self._spawned_at[slot] = time.time()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = self._worker_main(slot)
+            finally:
+                os._exit(code)
+        self.workers[pid] = slot
+        self.stats["spawned"] += 1
+
+    def _worker_main(self, slot: int) -> int:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        router = self.router
+        # Fresh client and locks: connection pools and held locks do not survive fork
+        router.client = self.client_factory()
+        router._cache_lock = threading.Lock()
+        limit = self.max_requests + (random.randint(0, self.max_requests_jitter) if self.max_requests_jitter else 0)
+        started = time.time()
+        served = [0]
+        served_lock = threading.Lock()
+        server: Optional[_WorkerHTTPServer] = None
+
+        def stop_soon():
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        def tick():
+            self._heartbeats[slot] = time.time()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, code: int, body: Dict[str, Any]):
+                payload = json.dumps(body, default=str).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path == "/healthz":
+                    self._send(200, {"ok": True, "pid": os.getpid(), "served": served[0],
+                                     "uptime_s": time.time() - started})
+                elif self.path == "/stats":
+                    self._send(200, {"pid": os.getpid(), "served": served[0], **router.stats})
+                else:
+                    self._send(404, {"ok": False, "error": "not found"})
+
+            def do_POST(self):
+                if self.path != "/route":
+                    self._send(404, {"ok": False, "error": "not found"})
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                    query, deadline_ms = body["query"], body.get("deadline_ms")
+                    if not isinstance(query, str) or not (deadline_ms is None or isinstance(deadline_ms, (int, float))):
+                        raise TypeError
+                except (ValueError, KeyError, TypeError):
+                    self._send(400, {"ok": False, "error": "expected a JSON body with a 'query' string"})
+                    return
+                try:
+                    self._send(200, router.decide_and_execute(query, deadline_ms))
+                except Exception as e:
+                    self._send(500, {"ok": False, "error": f"Router failed: {e}"})
+                with served_lock:
+                    served[0] += 1
+                    if limit and served[0] == limit:
+                        self.close_connection = True
+                        stop_soon()
+
+            def log_message(self, *args):
+                pass
+
+        server = _WorkerHTTPServer(self._sock, Handler, tick)
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_soon())
+        try:
+            server.serve_forever(poll_interval=0.5)
+        finally:
+            server.server_close()
+        return 0
+
+
+def main():
+    import argparse
+
+    from .synth_catalog import expand_catalog
+
+    p = argparse.ArgumentParser(description="Serve RetailRouter from N pre-forked worker processes.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    p.add_argument("--max-requests", type=int, default=0, help="recycle a worker after this many requests (0 = never)")
+    p.add_argument("--max-requests-jitter", type=int, default=0)
+    p.add_argument("--health-timeout", type=float, default=30.0)
+    p.add_argument("--embedding-store", default=None, help="memory-mapped store shared by all workers")
+    p.add_argument("--catalog-size", type=int, default=None)
+    p.add_argument("--query-cache", type=int, default=0)
+    args = p.parse_args()
+
+    router = RetailRouter(
+        model=os.getenv("ROUTER_MODEL", "gpt-4o-mini"),
+        embed_model=os.getenv("EMBED_MODEL", "text-embedding-3-small"),
+        top_k=int(os.getenv("TOP_K", "4")),
+        tools=expand_catalog(args.catalog_size) if args.catalog_size else None,
+        client=build_client(),
+        query_cache_size=args.query_cache,
+        embedding_store=args.embedding_store,
+    )
+    server = PreforkServer(router, workers=args.workers, host=args.host, port=args.port,
+                           max_requests=args.max_requests, max_requests_jitter=args.max_requests_jitter,
+                           health_timeout=args.health_timeout)
+    print(f"Routing {len(router._tools)} tools with {args.workers} workers on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Linear projections that shrink embeddings before scoring.
+
+A Projection is fitted once on the catalog matrix and applied to both the tool
+rows and every query vector, so cosine scores stay comparable. Specs:
+
+    "pca:<dim>"     top right-singular vectors of the (uncentered) catalog matrix,
+                    i.e. the subspace that best preserves tool dot products;
+                    dim is capped at the number of tools
+    "random:<dim>"  seeded orthonormal Gaussian projection (Johnson-Lindenstrauss),
+                    independent of the catalog
+
+Truncating at the endpoint instead (RetailRouter(dimensions=...)) needs no
+projection at all; text-embedding-3 models support it natively.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+class Projection:
+    def __init__(self, kind: str, components: np.ndarray):
+        self.kind = kind
+        # (input_dim, dim); columns are orthonormal for both kinds
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def pca(cls, matrix: np.ndarray, dim: int) -> "Projection":
+        matrix = np.asarray(matrix, dtype=np.float32)
+        dim = min(dim, *matrix.shape)
+        _, _, vt = np.linalg.svd(matrix, full_matrices=False)
+        return cls("pca", vt[:dim].T)
+
+    @classmethod
+    def random(cls, input_dim: int, dim: int, seed: int = 0) -> "Projection":
+        rng = np.random.default_rng(seed)
+        q, _ = np.linalg.qr(rng.standard_normal((input_dim, min(dim, input_dim))))
+        return cls("random", q)
+
+    @classmethod
+    def parse(cls, spec: Optional[str], matrix: np.ndarray, seed: int = 0) -> Optional["Projection"]:
+        if not spec or spec == "none":
+            return None
+        kind, _, dim = spec.partition(":")
+        if not dim.isdigit() or int(dim) <= 0:
+            raise ValueError(f"Bad projection spec '{spec}', expected e.g. 'pca:256'")
+        if kind == "pca":
+            return cls.pca(matrix, int(dim))
+        if kind == "random":
+            return cls.random(np.asarray(matrix).shape[1], int(dim), seed)
+        raise ValueError(f"Unknown projection '{kind}'")
+
+    def apply(self, x: np.ndarray) -> np.ndarray:
+        """Project one vector or a (n, input_dim) matrix."""
+        return np.asarray(x, dtype=np.float32) @ self.components
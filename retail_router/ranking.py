@@ -0,0 +1,37 @@
+"""
+Text and score helpers shared by everything that ranks tools against a query:
+RetailRouter, FakeOpenAI's hashed embeddings and tool picking, and the agent's
+tool retrievers (tools/retrieval.py).
+"""
+
+import re
+from typing import List
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, splitting camelCase and snake_case names."""
+    return _TOKEN_RE.findall(_CAMEL_RE.sub(" ", text or "").lower())
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first. Ties keep index order, as a stable
+    sort would, including at the top-k boundary (argpartition alone picks those
+    arbitrarily); only the top k are sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    if k < len(scores):
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        # Everything above the k-th score, then ties at the boundary in index order
+        above = np.flatnonzero(scores > kth)
+        idx = np.concatenate([above, np.flatnonzero(scores == kth)[: k - len(above)]])
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.lexsort((idx, -scores[idx]))]
@@ -0,0 +1,64 @@
+"""Token-bucket rate limiting shared by every thread (or forked process) that calls the API through one client."""
+
+import multiprocessing
+import threading
+import time
+from multiprocessing.sharedctypes import RawArray
+from types import SimpleNamespace
+from typing import Any, Optional
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: `rate` requests per second with bursts up to `burst`.
+
+    With `shared=True` the bucket lives in shared memory behind a process lock, so
+    processes forked after it is created draw from one budget instead of one each.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, shared: bool = False):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.shared = shared
+        # [tokens, last refill (time.monotonic(), which is system-wide)]
+        state = [float(self.burst), time.monotonic()]
+        self._state = RawArray("d", state) if shared else state
+        self._lock = multiprocessing.Lock() if shared else threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns seconds spent waiting."""
+        state = self._state
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+                state[1] = now
+                if state[0] >= 1.0:
+                    state[0] -= 1.0
+                    return waited
+                sleep_for = (1.0 - state[0]) / self.rate
+            time.sleep(sleep_for)
+            waited += sleep_for
+
+
+class _Endpoint:
+    def __init__(self, limiter: RateLimiter, create: Any):
+        self._limiter = limiter
+        self._create = create
+
+    def create(self, **kwargs: Any) -> Any:
+        self._limiter.acquire()
+        return self._create(**kwargs)
+
+
+class RateLimitedClient:
+    """Wraps an OpenAI-compatible client so all calls draw from one RateLimiter."""
+
+    def __init__(self, inner: Any, limiter: RateLimiter):
+        self.inner = inner
+        self.limiter = limiter
+        self.embeddings = _Endpoint(limiter, inner.embeddings.create)
+        self.chat = SimpleNamespace(completions=_Endpoint(limiter, inner.chat.completions.create))
@@ -1,10 +1,28 @@
-import os, json, time, math, uuid
+import os, json, time, math, uuid, threading, copy, logging
+from collections import OrderedDict
+from types import SimpleNamespace
 from dataclasses import dataclass
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import numpy as np
 
 from openai import OpenAI
+from utils.validation import compile_validator
 from .tools import TOOLS
+from .embedding_store import EmbeddingStore, catalog_fingerprint, matvec, save_store
+from .projection import Projection
+from .ranking import top_k_indices
+from .batching import EmbeddingBatcher
+from .deadline import Deadline, is_timeout
+from .args import guess_args
+
+log = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = 2048
+# Static instructions come first and never vary, so every request shares a cacheable prefix
+SELECT_SYSTEM_PROMPT = "You are a precise retail assistant. Pick exactly one tool from the provided functions and return the best arguments. Do not invent fields."
+# Per-request part of the selection prompt when the whole catalog is sent as `tools`
+CANDIDATES_PROMPT = "Candidate tools for this request, best match first: "
+SYNTH_SYSTEM_PROMPT = "Answer succinctly for a retail operator. Include critical numbers and the action to take."
 
 def cosine(a: np.ndarray, b: np.ndarray) -> float:
     denom = (np.linalg.norm(a) * np.linalg.norm(b)) or 1e-9
@@ -18,110 +36,404 @@ class ToolSpec:
     embedding: np.ndarray
 
 class RetailRouter:
-    def __init__(self, model: str = "gpt-4o-mini", embed_model: str = "text-embedding-3-small", top_k: int = 4, tools: List[Any] = None):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, model: str = "gpt-4o-mini", embed_model: str = "text-embedding-3-small", top_k: int = 4, tools: List[Any] = None, client: Any = None, query_cache_size: int = 0, embedding_store: str = None, store_dtype: str = None, dimensions: int = None, projection: Any = None, embed_batch_window_ms: float = 0, embed_batch_max: int = 64, deadline_ms: float = None, min_select_ms: float = 300, min_synth_ms: float = 300, max_arg_repairs: int = 1, max_static_tools: int = 0):
+        # Any object exposing the OpenAI SDK surface works here, e.g. retail_router.fake_openai.FakeOpenAI
+        self.client = client if client is not None else OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = model
         self.embed_model = embed_model
         self.top_k = top_k
-        self._tools = tools if tools is not None else TOOLS
-        self._tool_specs: List[ToolSpec] = []
+        # Default per-request budget (None = unbounded) and the budget an LLM call needs
+        # left to be attempted; below it the router degrades instead of calling
+        self.deadline_ms = deadline_ms
+        self.min_select_ms = min_select_ms
+        self.min_synth_ms = min_synth_ms
+        # Truncated vectors requested from the endpoint (text-embedding-3 models); None = native width
+        self.dimensions = dimensions
+        # LRU of query text -> embedding; 0 disables it
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.stats = {"embed_cache_hits": 0, "embed_cache_misses": 0}
+        # Concurrent query embeddings within the window share one batched call; 0 disables it
+        self._batcher = EmbeddingBatcher(self._embed_vectors, embed_batch_window_ms, embed_batch_max) if embed_batch_window_ms > 0 else None
+        self._tools = list(tools if tools is not None else TOOLS)
         texts = [f"{t.name}: {t.description}" for t in self._tools]
-        embs = self.client.embeddings.create(model=self.embed_model, input=texts).data
-        for t, e in zip(self._tools, embs):
-            self._tool_specs.append(ToolSpec(
-                name=t.name, description=t.description, schema=t.schema,
-                embedding=np.array(e.embedding, dtype=np.float32)
-            ))
+        fingerprint = catalog_fingerprint(texts)
+        names = [t.name for t in self._tools]
+        # A matching on-disk store is memory-mapped instead of re-embedding the catalog;
+        # a missing or stale one is (re)written with store_dtype (default float32) and then
+        # mapped. store_dtype=None accepts an existing store of any dtype.
+        store = None
+        if embedding_store and os.path.exists(embedding_store):
+            store = EmbeddingStore.open(embedding_store)
+            if not store.matches(names, self.embed_model, fingerprint, store_dtype, dimensions):
+                store = None
+        if store is None:
+            embs = []
+            # The embeddings endpoint caps inputs per request, so large catalogs go in batches
+            for i in range(0, len(texts), EMBED_BATCH_SIZE):
+                embs.extend(self._embed(texts[i:i + EMBED_BATCH_SIZE]))
+            matrix = np.array([e.embedding for e in embs], dtype=np.float32)
+            if embedding_store:
+                save_store(embedding_store, names, matrix, self.embed_model, fingerprint, store_dtype or "float32", dimensions)
+                store = EmbeddingStore.open(embedding_store)
+        # One contiguous (n_tools, dim) matrix; each ToolSpec.embedding is a row view into it.
+        # With a store the matrix is a read-only memmap (possibly float16/int8) and
+        # _scales holds the per-row dequantization factors.
+        if store is not None:
+            self._matrix, self._scales, self._norms = store.matrix, store.scales, store.norms
+        else:
+            self._matrix, self._scales = matrix, None
+            self._norms = np.linalg.norm(self._matrix, axis=1)
+        # Optional local projection ("pca:256", "random:256" or a Projection) fitted on the
+        # catalog; the reduced float32 matrix replaces the full one and queries are projected too.
+        # Stores always hold the unprojected endpoint vectors, so any projection can reuse one.
+        self._projection = Projection.parse(projection, self._dequantized()) if isinstance(projection, str) else projection
+        if self._projection is not None:
+            self._matrix, self._scales = self._projection.apply(self._dequantized()), None
+            self._norms = np.linalg.norm(self._matrix, axis=1)
+        self._tool_specs: List[ToolSpec] = [
+            ToolSpec(name=t.name, description=t.description, schema=t.schema, embedding=self._matrix[i])
+            for i, t in enumerate(self._tools)
+        ]
+        self._tool_map = {t.name: t for t in self._tools}
+        # Formatted once: identical candidate sets then serialize to byte-identical `tools`
+        self._tool_options = {ts.name: {"type": "function", "function": {"name": ts.name, "description": ts.description, "parameters": ts.schema}}
+                              for ts in self._tool_specs}
+        self._tool_index = {t.name: i for i, t in enumerate(self._tools)}
+        # Opt-in: catalogs of up to max_static_tools tools (the API takes at most 128) are sent whole,
+        # as one constant `tools` list, with the retrieved candidates named in a later message. This
+        # trades larger (if cached) prompts for a prefix shared by every query, and lets the model
+        # pick outside the candidates. By default only the candidates are sent.
+        self.max_static_tools = max_static_tools
+        self._static_tools = self._catalog_tool_options()
+        # Argument validators, compiled once from each schema (subset views share them); a call
+        # that fails one is sent back to the model with the errors up to max_arg_repairs times
+        # instead of reaching the handler
+        self._validators = {t.name: compile_validator(t.schema) for t in self._tools}
+        self.max_arg_repairs = max_arg_repairs
 
-    def _retrieve_tools(self, query: str) -> List[ToolSpec]:
-        q_emb = self.client.embeddings.create(model=self.embed_model, input=query).data[0].embedding
+    def subset(self, num_tools: int, model: str = None, top_k: int = None) -> "RetailRouter":
+        """
+        Router over the first `num_tools` tools that shares this router's client,
+        query cache and embedding matrix (numpy slices are views, nothing is
+        re-embedded or copied).
+        """
+        view = copy.copy(self)
+        view._tools = self._tools[:num_tools]
+        view._tool_specs = self._tool_specs[:num_tools]
+        view._matrix = self._matrix[:num_tools]
+        view._norms = self._norms[:num_tools]
+        if self._scales is not None:
+            view._scales = self._scales[:num_tools]
+        view._tool_map = {t.name: t for t in view._tools}
+        view._static_tools = view._catalog_tool_options()
+        if model is not None:
+            view.model = model
+        if top_k is not None:
+            view.top_k = top_k
+        return view
+
+    def _embed(self, texts: Any, deadline: Optional[Deadline] = None) -> List[Any]:
+        kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+        if deadline is not None:
+            kwargs["timeout"] = deadline.timeout()
+        return self.client.embeddings.create(model=self.embed_model, input=texts, **kwargs).data
+
+    def _embed_vectors(self, texts: List[str]) -> List[List[float]]:
+        return [d.embedding for d in sorted(self._embed(texts), key=lambda d: d.index)]
+
+    def _dequantized(self) -> np.ndarray:
+        matrix = self._matrix.astype(np.float32)
+        if self._scales is not None:
+            matrix *= self._scales[:, None]
+        return matrix
+
+    def save_embeddings(self, path: str, dtype: str = "float32") -> None:
+        """Write this router's catalog embeddings to a store usable as `embedding_store=`."""
+        if self._projection is not None:
+            raise ValueError("Save embeddings before projecting; stores hold endpoint-width vectors")
+        matrix = self._dequantized()
+        fingerprint = catalog_fingerprint([f"{t.name}: {t.description}" for t in self._tools])
+        save_store(path, [t.name for t in self._tools], matrix, self.embed_model, fingerprint, dtype, self.dimensions)
+
+    def _embed_query(self, query: str, deadline: Optional[Deadline] = None) -> Tuple[np.ndarray, bool]:
+        """Return the query embedding and whether it came from the LRU cache."""
+        if self.query_cache_size > 0:
+            with self._cache_lock:
+                cached = self._query_cache.get(query)
+                if cached is not None:
+                    self._query_cache.move_to_end(query)
+                    self.stats["embed_cache_hits"] += 1
+                    return cached, True
+                self.stats["embed_cache_misses"] += 1
+        if self._batcher is not None:
+            q_emb = self._batcher.embed(query, timeout=deadline.timeout() if deadline is not None else None)
+        else:
+            q_emb = self._embed(query, deadline)[0].embedding
         q_emb = np.array(q_emb, dtype=np.float32)
-        scored = [(cosine(q_emb, ts.embedding), ts) for ts in self._tool_specs]
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [ts for _, ts in scored[: self.top_k]]
+        if self._projection is not None:
+            q_emb = self._projection.apply(q_emb)
+        if self.query_cache_size > 0:
+            with self._cache_lock:
+                self._query_cache[query] = q_emb
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return q_emb, False
+
+    def _retrieve_tools(self, query: str) -> List[ToolSpec]:
+        q_emb, _ = self._embed_query(query)
+        return self._rank_tools(q_emb)
+
+    def _rank_tools(self, q_emb: np.ndarray) -> List[ToolSpec]:
+        # Cosine against every tool in one matrix-vector product
+        denom = self._norms * (np.linalg.norm(q_emb) or 1e-9)
+        scores = matvec(self._matrix, q_emb, self._scales) / np.where(denom == 0, 1e-9, denom)
+        return [self._tool_specs[i] for i in top_k_indices(scores, self.top_k)]
+
+    def _catalog_tool_options(self) -> Optional[List[Dict[str, Any]]]:
+        if not 0 < len(self._tool_specs) <= self.max_static_tools:
+            return None
+        return [self._tool_options[ts.name] for ts in self._tool_specs]
 
     def _format_tool_options(self, tool_specs: List[ToolSpec]) -> List[Dict[str, Any]]:
-        return [{
-            "type":"function",
-            "function": {
-                "name": ts.name,
-                "description": ts.description,
-                "parameters": ts.schema
-            }
-        } for ts in tool_specs]
-
-    def decide_and_execute(self, query: str) -> Dict[str, Any]:
-        cands = self._retrieve_tools(query)
-        tools_for_llm = self._format_tool_options(cands)
+        if self._static_tools is not None:
+            return self._static_tools
+        # Catalog order rather than score order, so the same candidates always give the same prompt prefix
+        return [self._tool_options[ts.name] for ts in sorted(tool_specs, key=lambda ts: self._tool_index[ts.name])]
 
-        sys = "You are a precise retail assistant. Pick exactly one tool from the provided functions and return the best arguments. Do not invent fields."
-        messages = [
-            {"role":"system","content":sys},
-            {"role":"user","content":query}
-        ]
-        
+    def _selection_messages(self, query: str, tool_specs: List[ToolSpec]) -> List[Dict[str, Any]]:
+        messages = [{"role":"system","content":SELECT_SYSTEM_PROMPT}]
+        if self._static_tools is not None:
+            # Varies per query, so it goes after the constant tools and system prompt
+            messages.append({"role":"system","content":CANDIDATES_PROMPT + ", ".join(ts.name for ts in tool_specs)})
+        messages.append({"role":"user","content":query})
+        return messages
+
+    @staticmethod
+    def _record_usage(meta: Dict[str, Any], usage: Any) -> None:
+        """Add a response's token usage, including provider-cached prompt tokens, to meta["usage"]."""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        totals = meta.setdefault("usage", {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0})
+        totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        totals["cached_tokens"] += getattr(details, "cached_tokens", 0) or 0
+        totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+    def decide_and_execute(self, query: str, deadline_ms: float = None) -> Dict[str, Any]:
+        """
+        Route, execute and answer `query`. With a deadline (deadline_ms, or the router's
+        default) every API call is bounded by the remaining budget, and when too little
+        is left the router degrades; result["fallback"] lists what it did:
+          "top1_retrieval"  no selection call; the top-ranked tool runs with
+                            arguments extracted from the query by regex
+          "skip_synthesis"  no synthesis call; the answer is the handler's content
+          "embed_timeout"   the query embedding overran the budget; nothing was
+                            routed and the result is an error
+        result["usage"] sums prompt, cached prompt and completion tokens over the calls made.
+        """
+        # Per-stage wall time in ms: embed, rank, select, handler, synth, total
+        timings: Dict[str, float] = {}
+        meta: Dict[str, Any] = {"fallback": []}
+        t0 = time.perf_counter()
+        result = self._decide_and_execute(query, timings, meta, Deadline.from_ms(deadline_ms or self.deadline_ms))
+        timings["total_ms"] = (time.perf_counter() - t0) * 1000.0
+        result.update(meta)
+        result["timings"] = timings
+        log.debug("router.request ok=%s tool=%s total_ms=%.1f fallback=%s", result.get("ok", False),
+                  result.get("tool_name"), timings["total_ms"], meta["fallback"])
+        return result
+
+    def decide_and_execute_stream(self, query: str, deadline_ms: float = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of decide_and_execute. Yields {"event": "tool", ...} once the
+        handler has run, {"event": "delta", "content": ...} per synthesis chunk, and
+        finally {"event": "done", ...} carrying the same fields decide_and_execute returns.
+        """
+        timings: Dict[str, float] = {}
+        meta: Dict[str, Any] = {"fallback": []}
+        t0 = time.perf_counter()
+        deadline = Deadline.from_ms(deadline_ms or self.deadline_ms)
+        result, synth_messages = self._run_tool(query, timings, meta, deadline)
+        if synth_messages is not None:
+            yield {"event": "tool", "tool_name": result["tool_name"], "tool_args": result["tool_args"], "tool_result": result["tool_result"]}
+            if self._out_of_budget(deadline, self.min_synth_ms):
+                result = self._skip_synthesis(result, meta)
+            else:
+                parts = []
+                t = time.perf_counter()
+                try:
+                    stream = self.client.chat.completions.create(model=self.model, messages=synth_messages, stream=True,
+                                                                 stream_options={"include_usage": True}, **self._timeout(deadline))
+                    for chunk in stream:
+                        self._record_usage(meta, getattr(chunk, "usage", None))
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            yield {"event": "delta", "content": delta}
+                    result = {"ok": True, **result, "answer": "".join(parts).strip()}
+                except Exception as e:
+                    if deadline is not None and is_timeout(e) and not parts:
+                        result = self._skip_synthesis(result, meta)
+                    else:
+                        result = {"ok": False, "error": f"Synthesis failed: {str(e)}", "tool_name": result["tool_name"], "tool_result": result["tool_result"]}
+                timings["synth_ms"] = (time.perf_counter() - t) * 1000.0
+        timings["total_ms"] = (time.perf_counter() - t0) * 1000.0
+        yield {"event": "done", **result, **meta, "timings": timings}
+
+    @staticmethod
+    def _out_of_budget(deadline: Optional[Deadline], needed_ms: float) -> bool:
+        return deadline is not None and deadline.remaining_ms() < needed_ms
+
+    @staticmethod
+    def _timeout(deadline: Optional[Deadline]) -> Dict[str, Any]:
+        return {"timeout": deadline.timeout()} if deadline is not None else {}
+
+    @staticmethod
+    def _skip_synthesis(result: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        meta["fallback"].append("skip_synthesis")
+        tool_result = result["tool_result"]
+        content = tool_result.get("content", "") if isinstance(tool_result, dict) else str(tool_result)
+        return {"ok": True, **result, "answer": content}
+
+    @staticmethod
+    def _top1_message(query: str, top: ToolSpec, meta: Dict[str, Any]) -> Any:
+        """Stand-in for the selection response: the top-ranked tool with regex-extracted arguments."""
+        meta["fallback"].append("top1_retrieval")
+        call = SimpleNamespace(id="call_top1_retrieval", type="function",
+                               function=SimpleNamespace(name=top.name, arguments=json.dumps(guess_args(query, top.schema))))
+        return SimpleNamespace(content=None, tool_calls=[call])
+
+    @staticmethod
+    def _assistant_message(message: Any, tool_call: Any) -> Dict[str, Any]:
+        """
+        The selection response as a message dict for the API, carrying only `tool_call`:
+        the API rejects a turn whose tool_calls ids lack a matching tool message.
+        """
+        return {
+            "role": "assistant",
+            "content": message.content,
+            "tool_calls": [{
+                "id": tool_call.id,
+                "type": tool_call.type,
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments
+                }
+            }]
+        }
+
+    def _decide_and_execute(self, query: str, timings: Dict[str, float], meta: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        result, synth_messages = self._run_tool(query, timings, meta, deadline)
+        if synth_messages is None:
+            return result
+        if self._out_of_budget(deadline, self.min_synth_ms):
+            return self._skip_synthesis(result, meta)
+        t = time.perf_counter()
         try:
-            resp = self.client.chat.completions.create(
+            synth = self.client.chat.completions.create(
                 model=self.model,
-                messages=messages,
-                tools=tools_for_llm,
-                tool_choice="required"
+                messages=synth_messages,
+                **self._timeout(deadline)
             )
+            self._record_usage(meta, getattr(synth, "usage", None))
+            final_text = synth.choices[0].message.content or ""
         except Exception as e:
-            return {"ok": False, "error": f"API call failed: {str(e)}"}
+            if deadline is not None and is_timeout(e):
+                return self._skip_synthesis(result, meta)
+            return {"ok": False, "error": f"Synthesis failed: {str(e)}", "tool_name": result["tool_name"], "tool_result": result["tool_result"]}
+        finally:
+            timings["synth_ms"] = (time.perf_counter() - t) * 1000.0
 
-        message = resp.choices[0].message
+        return {"ok": True, **result, "answer": final_text.strip()}
+
+    def _run_tool(self, query: str, timings: Dict[str, float], meta: Dict[str, Any], deadline: Optional[Deadline] = None) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+        """
+        Embed, rank, select and execute. Returns (tool_name/tool_args/tool_result, synthesis
+        messages), or (error result, None) when no tool could be run.
+        """
+        t = time.perf_counter()
+        try:
+            q_emb, meta["embed_cache_hit"] = self._embed_query(query, deadline)
+        except Exception as e:
+            if deadline is None or not is_timeout(e):
+                raise
+            # Without a query embedding there are no candidates to fall back on
+            meta["fallback"].append("embed_timeout")
+            return {"ok": False, "error": f"Embedding timed out: {str(e) or type(e).__name__}"}, None
+        finally:
+            timings["embed_ms"] = (time.perf_counter() - t) * 1000.0
+
+        t = time.perf_counter()
+        cands = self._rank_tools(q_emb)
+        timings["rank_ms"] = (time.perf_counter() - t) * 1000.0
+        tools_for_llm = self._format_tool_options(cands)
+        messages = self._selection_messages(query, cands)
         
-        # Check for tool calls
-        if not message.tool_calls or len(message.tool_calls) == 0:
-            return {"ok": False, "error": "No tool selected by model."}
+        timings["select_ms"] = timings["validate_ms"] = 0.0
+        for attempt in range(self.max_arg_repairs + 1):
+            if attempt == 0 and self._out_of_budget(deadline, self.min_select_ms) and cands:
+                message = self._top1_message(query, cands[0], meta)
+            else:
+                t = time.perf_counter()
+                try:
+                    resp = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        tools=tools_for_llm,
+                        tool_choice="required",
+                        **self._timeout(deadline)
+                    )
+                    self._record_usage(meta, getattr(resp, "usage", None))
+                    message = resp.choices[0].message
+                except Exception as e:
+                    if not (attempt == 0 and deadline is not None and is_timeout(e) and cands):
+                        return {"ok": False, "error": f"API call failed: {str(e)}"}, None
+                    message = self._top1_message(query, cands[0], meta)
+                finally:
+                    timings["select_ms"] += (time.perf_counter() - t) * 1000.0
+
+            # Check for tool calls
+            if not message.tool_calls or len(message.tool_calls) == 0:
+                return {"ok": False, "error": "No tool selected by model."}, None
 
-        tool_call = message.tool_calls[0]
-        tool_name = tool_call.function.name
-        tool_args = json.loads(tool_call.function.arguments)
+            tool_call = message.tool_calls[0]
+            tool_name = tool_call.function.name
+            if tool_name not in self._tool_map:
+                return {"ok": False, "error": f"Unknown tool '{tool_name}' chosen."}, None
 
-        tool_map = {t.name: t for t in self._tools}
-        if tool_name not in tool_map:
-            return {"ok": False, "error": f"Unknown tool '{tool_name}' chosen."}
+            # Checked before the handler runs, so a bad call never reaches a backend
+            t = time.perf_counter()
+            try:
+                tool_args = json.loads(tool_call.function.arguments)
+                errors = self._validators[tool_name](tool_args)
+            except (TypeError, json.JSONDecodeError) as e:
+                # TypeError: the model sent no arguments string at all
+                tool_args, errors = None, [f"arguments are not valid JSON ({getattr(e, 'msg', e)})"]
+            timings["validate_ms"] += (time.perf_counter() - t) * 1000.0
+            if not errors:
+                break
+            error = f"Invalid arguments for '{tool_name}': " + "; ".join(errors)
+            meta["invalid_args"] = meta.get("invalid_args", 0) + 1
+            log.info("router.invalid_args tool=%s attempt=%d errors=%s", tool_name, attempt, errors)
+            if attempt == self.max_arg_repairs or self._out_of_budget(deadline, self.min_select_ms):
+                return {"ok": False, "error": error, "tool_name": tool_name, "tool_args": tool_args}, None
+            # Feed the errors back as the tool's result and let the model correct its call
+            messages = messages + [self._assistant_message(message, tool_call),
+                                   {"role":"tool","tool_call_id":tool_call.id,"content":json.dumps({"ok": False, "error": error})}]
 
-        tool_handler = tool_map[tool_name].handler
+        tool_handler = self._tool_map[tool_name].handler
+        t = time.perf_counter()
         tool_result = tool_handler(tool_args)
+        timings["handler_ms"] = (time.perf_counter() - t) * 1000.0
 
         # Synthesize final answer
-        # Convert message to dict format for the API
-        assistant_msg = {"role": "assistant", "content": message.content}
-        if message.tool_calls:
-            assistant_msg["tool_calls"] = [
-                {
-                    "id": tc.id,
-                    "type": tc.type,
-                    "function": {
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    }
-                } for tc in message.tool_calls
-            ]
-        
+        assistant_msg = self._assistant_message(message, tool_call)
         synth_messages = [
-            {"role":"system","content":"Answer succinctly for a retail operator. Include critical numbers and the action to take."},
+            {"role":"system","content":SYNTH_SYSTEM_PROMPT},
             {"role":"user","content":query},
             assistant_msg,
-            {"role":"tool","name":tool_name,"content":json.dumps(tool_result)}
+            {"role":"tool","tool_call_id":tool_call.id,"name":tool_name,"content":json.dumps(tool_result)}
         ]
-        
-        try:
-            synth = self.client.chat.completions.create(
-                model=self.model,
-                messages=synth_messages
-            )
-            final_text = synth.choices[0].message.content or ""
-        except Exception as e:
-            return {"ok": False, "error": f"Synthesis failed: {str(e)}", "tool_name": tool_name, "tool_result": tool_result}
-
-        return {
-            "ok": True,
-            "tool_name": tool_name,
-            "tool_args": tool_args,
-            "tool_result": tool_result,
-            "answer": final_text.strip()
-        }
+        return {"tool_name": tool_name, "tool_args": tool_args, "tool_result": tool_result}, synth_messages
@@ -0,0 +1,353 @@
+"""
+Asyncio HTTP front end for RetailRouter with request coalescing and admission control.
+
+    OPENAI_BACKEND=fake python -m retail_router.server --port 8080 --concurrency 32 --queue 64
+    curl -s localhost:8080/route -d '{"query": "Check inventory for SKU SW-123 at store 0001"}'
+    curl -sN localhost:8080/route/stream -d '{"query": "..."}'
+
+Endpoints:
+    POST /route         {"query": ..., "deadline_ms": optional} -> decide_and_execute result (JSON)
+    POST /route/stream  same, as server-sent events: "tool", "delta"..., "done"
+    GET  /healthz       liveness plus in-flight and queued counts
+    GET  /stats         request, coalescing and load-shedding counters
+
+Identical queries that arrive while one is already executing join that
+execution (singleflight) instead of issuing their own embedding and chat
+calls; streaming followers replay the leader's events from the start. Only
+leaders take an execution slot: at most `concurrency` run at once on a thread
+pool, at most `queue` more wait, and anything beyond that, or anything that
+waits longer than `queue_timeout`, gets 503 with Retry-After. Time spent
+queued counts against a request's deadline_ms.
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from .router import RetailRouter
+
+MAX_BODY = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    """The request line or headers could not be parsed."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._inflight: Dict[Any, asyncio.Future] = {}
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, shared); shared is True when another caller's execution was joined."""
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut), True
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody joined
+            raise
+        else:
+            fut.set_result(result)
+            return result, False
+        finally:
+            del self._inflight[key]
+
+
+class Broadcast:
+    """Append-only event log that any number of followers can replay and tail."""
+
+    def __init__(self):
+        self.events = []
+        self.closed = False
+        self._wake = asyncio.Event()
+
+    def push(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        self._wake.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake.set()
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        i = 0
+        while True:
+            while i < len(self.events):
+                yield self.events[i]
+                i += 1
+            if self.closed:
+                return
+            self._wake.clear()
+            await self._wake.wait()
+
+
+class RouterServer:
+    def __init__(self, router: RetailRouter, concurrency: int = 32, queue: int = 64, queue_timeout: float = 5.0):
+        self.router = router
+        self.concurrency = concurrency
+        self.max_queue = queue
+        self.queue_timeout = queue_timeout
+        self.stats = {"requests": 0, "executions": 0, "coalesced": 0, "shed": 0, "errors": 0}
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="router")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._running = 0
+        self._flights = SingleFlight()
+        self._streams: Dict[Tuple[str, Optional[float]], Broadcast] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> Tuple[str, int]:
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._server = await asyncio.start_server(self._handle, host, port, backlog=1024)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    async def _admit(self) -> None:
+        """Take an execution slot, or raise Overloaded when the wait queue is full or too slow."""
+        if not self._slots.locked():
+            await self._slots.acquire()  # a free slot is taken without suspending
+        elif self._queued >= self.max_queue:
+            raise Overloaded()
+        else:
+            self._queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise Overloaded()
+            finally:
+                self._queued -= 1
+        self._running += 1
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _remaining(deadline_ms: Optional[float], arrived: float) -> Optional[float]:
+        # The router's budget starts when it runs, so subtract the time spent queued
+        if not deadline_ms:
+            return None
+        return max(deadline_ms - (time.perf_counter() - arrived) * 1000.0, 1.0)
+
+    async def _execute(self, query: str, deadline_ms: Optional[float], arrived: float) -> Dict[str, Any]:
+        await self._admit()
+        try:
+            self.stats["executions"] += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.router.decide_and_execute, query,
+                                              self._remaining(deadline_ms, arrived))
+        finally:
+            self._release()
+
+    async def route(self, query: str, deadline_ms: Optional[float] = None) -> Dict[str, Any]:
+        arrived = time.perf_counter()
+        result, shared = await self._flights.do((query, deadline_ms), lambda: self._execute(query, deadline_ms, arrived))
+        if shared:
+            self.stats["coalesced"] += 1
+        return result
+
+    async def _pump(self, key: Tuple[str, Optional[float]], deadline_ms: Optional[float], broadcast: Broadcast) -> None:
+        loop = asyncio.get_running_loop()
+
+        def run():
+            try:
+                for event in self.router.decide_and_execute_stream(key[0], deadline_ms):
+                    loop.call_soon_threadsafe(broadcast.push, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(broadcast.push, {"event": "done", "ok": False, "error": f"Router failed: {e}"})
+
+        try:
+            await loop.run_in_executor(self._executor, run)
+        finally:
+            self._release()
+            self._streams.pop(key, None)
+            broadcast.close()
+
+    async def route_stream(self, query: str, deadline_ms: Optional[float] = None) -> Broadcast:
+        arrived = time.perf_counter()
+        key = (query, deadline_ms)
+        broadcast = self._streams.get(key)
+        if broadcast is not None:
+            self.stats["coalesced"] += 1
+            return broadcast
+        broadcast = Broadcast()
+        self._streams[key] = broadcast
+        try:
+            await self._admit()
+        except Overloaded:
+            self._streams.pop(key, None)
+            broadcast.push({"event": "done", "ok": False, "error": "overloaded"})
+            broadcast.close()
+            raise
+        self.stats["executions"] += 1
+        # Runs to completion on its own so followers are served even if the leader disconnects
+        asyncio.ensure_future(self._pump(key, self._remaining(deadline_ms, arrived), broadcast))
+        return broadcast
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                request = await self._read_request(reader)
+            except BadRequest as e:
+                await self._send(writer, 400, {"ok": False, "error": str(e)})
+                return
+            if request is not None:
+                await self._dispatch(writer, *request)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise BadRequest("malformed request line")
+        method, path, _ = parts
+        headers = {}
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = h.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise BadRequest("invalid Content-Length") from None
+        if length < 0:
+            raise BadRequest("invalid Content-Length")
+        if length > MAX_BODY:
+            return method, path, None
+        body = await reader.readexactly(length) if length else b""
+        return method, path, body
+
+    async def _dispatch(self, writer: asyncio.StreamWriter, method: str, path: str, body: Optional[bytes]) -> None:
+        if path == "/healthz":
+            await self._send(writer, 200, {"ok": True, "pid": os.getpid(), "running": self._running, "queued": self._queued})
+            return
+        if path == "/stats":
+            await self._send(writer, 200, {**self.stats, **self.router.stats, "running": self._running, "queued": self._queued})
+            return
+        if path not in ("/route", "/route/stream"):
+            await self._send(writer, 404, {"ok": False, "error": "not found"})
+            return
+        if method != "POST":
+            await self._send(writer, 405, {"ok": False, "error": "use POST"})
+            return
+        if body is None:
+            await self._send(writer, 413, {"ok": False, "error": "body too large"})
+            return
+        try:
+            request = json.loads(body or b"{}")
+            query, deadline_ms = request["query"], request.get("deadline_ms")
+            if not isinstance(query, str) or not (deadline_ms is None or isinstance(deadline_ms, (int, float))):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            await self._send(writer, 400, {"ok": False, "error": "expected a JSON body with a 'query' string"})
+            return
+
+        self.stats["requests"] += 1
+        try:
+            if path == "/route":
+                result = await self.route(query, deadline_ms)
+            else:
+                broadcast = await self.route_stream(query, deadline_ms)
+        except Overloaded:
+            self.stats["shed"] += 1
+            await self._send(writer, 503, {"ok": False, "error": "overloaded, retry later"}, {"Retry-After": "1"})
+            return
+        except Exception as e:
+            self.stats["errors"] += 1
+            await self._send(writer, 500, {"ok": False, "error": f"Router failed: {e}"})
+            return
+        if path == "/route":
+            if not result.get("ok"):
+                self.stats["errors"] += 1
+            await self._send(writer, 200, result)
+        else:
+            await self._send_events(writer, broadcast)
+
+    async def _send(self, writer: asyncio.StreamWriter, code: int, body: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        payload = json.dumps(body, default=str).encode("utf-8")
+        head = f"HTTP/1.1 {code} {REASONS[code]}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in (headers or {}).items())
+        writer.write(head.encode("latin-1") + b"\r\n" + payload)
+        await writer.drain()
+
+    async def _send_events(self, writer: asyncio.StreamWriter, broadcast: Broadcast) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        async for event in broadcast.follow():
+            if event["event"] == "done" and not event.get("ok"):
+                self.stats["errors"] += 1
+            writer.write(f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n".encode("utf-8"))
+            await writer.drain()
+
+
+async def serve(server: RouterServer, host: str, port: int) -> None:
+    host, port = await server.start(host, port)
+    print(f"Routing {len(server.router._tools)} tools on http://{host}:{port} "
+          f"(concurrency {server.concurrency}, queue {server.max_queue})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    import argparse
+
+    from .clients import build_client
+    from .synth_catalog import expand_catalog
+
+    p = argparse.ArgumentParser(description="Serve RetailRouter over asyncio HTTP with request coalescing.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--concurrency", type=int, default=32, help="router executions running at once")
+    p.add_argument("--queue", type=int, default=64, help="executions allowed to wait for a slot before 503s")
+    p.add_argument("--queue-timeout", type=float, default=5.0)
+    p.add_argument("--embedding-store", default=None)
+    p.add_argument("--catalog-size", type=int, default=None)
+    p.add_argument("--query-cache", type=int, default=0)
+    args = p.parse_args()
+
+    router = RetailRouter(
+        model=os.getenv("ROUTER_MODEL", "gpt-4o-mini"),
+        embed_model=os.getenv("EMBED_MODEL", "text-embedding-3-small"),
+        top_k=int(os.getenv("TOP_K", "4")),
+        tools=expand_catalog(args.catalog_size) if args.catalog_size else None,
+        client=build_client(),
+        query_cache_size=args.query_cache,
+        embedding_store=args.embedding_store,
+    )
+    server = RouterServer(router, concurrency=args.concurrency, queue=args.queue, queue_timeout=args.queue_timeout)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Synthetic large-catalog generator for router scaling benchmarks.
+
+expand_catalog(n) returns TOOLS followed by generated tools up to n entries:
+
+  * near-duplicates: regional variants ("InventoryLookupWest") and per-department
+    variants ("PriceCompareElectronics") of the real tools, with the same schema
+    plus a scoping parameter and descriptions that differ only in scope;
+  * distractors: plausible retail tools with overlapping vocabulary but a
+    different purpose ("GardenCenterScheduleLookup");
+  * numbered district variants once those combinations run out, so 10k+ tools
+    are always reachable.
+
+Every generated tool has a valid JSON schema and a handler that wraps a real
+handler and tags its output, so routers can execute anything they select.
+The real tools stay first, so golden sets remain answerable on any prefix.
+"""
+
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .tools import TOOLS, Tool, _resp
+
+REGIONS = ["West", "East", "Central", "South", "North", "Pacific", "Mountain", "Midwest",
+           "Northeast", "Southeast", "Southwest", "Canada"]
+DEPARTMENTS = ["Electronics", "Grocery", "Apparel", "Home", "Garden", "Toys", "Pharmacy", "Automotive",
+               "Beauty", "Sports", "Pet", "Office", "Baby", "Jewelry", "Hardware", "Furniture",
+               "Appliances", "Books", "Music", "Outdoor"]
+DOMAINS = ["GardenCenter", "Pharmacy", "TireCenter", "OpticalCenter", "PhotoCenter", "Bakery", "Deli",
+           "FuelStation", "CarWash", "HearingAid", "FloralShop", "KeyCutting", "Layaway", "Curbside",
+           "Delivery", "Installation", "Recycling", "PriceTag", "Planogram", "Receiving", "Shrink",
+           "Markdown", "Timeclock", "Scheduling", "Training", "Safety", "Compliance", "Audit",
+           "Signage", "Forklift", "Cooler", "Freezer", "LostAndFound", "Donation", "Survey",
+           "Catering", "Registry", "Warranty", "Rental", "Repair"]
+ACTIONS = [
+    ("ScheduleLookup", "Look up the schedule and open appointment slots for the {d} service."),
+    ("StatusCheck", "Check the current status of a {d} request or ticket."),
+    ("PolicyLookup", "Summarize the store policy and exceptions that apply to the {d}."),
+    ("CapacityPlanner", "Estimate capacity and staffing needs for the {d} next week."),
+    ("IncidentReport", "File an incident report for a problem observed at the {d}."),
+    ("PricingLookup", "Get the current fees and pricing for {d} services."),
+    ("InventoryCount", "Record a cycle count of supplies used by the {d}."),
+    ("VendorOrder", "Place a supply order with the vendor that services the {d}."),
+    ("FeedbackSummary", "Summarize recent customer feedback about the {d}."),
+    ("HoursLookup", "Get operating hours and holiday closures for the {d}."),
+    ("ChecklistRun", "Run the daily opening checklist for the {d}."),
+    ("KpiReport", "Report weekly KPIs such as volume, wait time and revenue for the {d}."),
+]
+
+
+def _split_camel(name: str) -> str:
+    out = []
+    for ch in name:
+        if ch.isupper() and out:
+            out.append(" ")
+        out.append(ch)
+    return "".join(out).lower()
+
+
+def _tagged_handler(base: Callable[[Dict[str, Any]], Dict[str, Any]], tag: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def handler(args: Dict[str, Any]) -> Dict[str, Any]:
+        result = dict(base(args))
+        result["content"] = f"[{tag}] {result.get('content', '')}"
+        return result
+    return handler
+
+
+def _distractor_handler(name: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def handler(args: Dict[str, Any]) -> Dict[str, Any]:
+        target = args.get("store") or args.get("request_id") or "all stores"
+        return _resp(True, f"{name} for {target}: no issues found; next review in 7 days.")
+    return handler
+
+
+def _scoped(base: Tool, suffix: str, scope_param: str, scope: str, phrase: str) -> Tool:
+    schema = {
+        "type": "object",
+        "properties": {**base.schema.get("properties", {}), scope_param: {"type": "string", "enum": [scope]}},
+        "required": list(base.schema.get("required", [])),
+    }
+    first, _, rest = base.description.partition(". ")
+    description = f"{first} {phrase}. {rest}".strip()
+    return Tool(base.name + suffix, description, schema, _tagged_handler(base.handler, f"{scope}"))
+
+
+def near_duplicates(base_tools: Sequence[Tool]) -> List[Tool]:
+    out = []
+    for region in REGIONS:
+        for base in base_tools:
+            out.append(_scoped(base, region, "region", region, f"for stores in the {region} region only"))
+    for dept in DEPARTMENTS:
+        for base in base_tools:
+            out.append(_scoped(base, dept, "department", dept, f"for the {dept} department only"))
+    return out
+
+
+def distractors() -> List[Tool]:
+    out = []
+    for domain in DOMAINS:
+        label = _split_camel(domain)
+        for action, template in ACTIONS:
+            name = domain + action
+            out.append(Tool(
+                name,
+                template.format(d=label) + f" Internal operations tool for {label} teams; not for customer inventory, pricing or order questions.",
+                {"type": "object",
+                 "properties": {"store": {"type": "string"}, "request_id": {"type": "string"}},
+                 "required": ["store"]},
+                _distractor_handler(name),
+            ))
+    return out
+
+
+def expand_catalog(n: int, seed: int = 0, near_duplicate_ratio: float = 0.5,
+                   base_tools: Optional[Sequence[Tool]] = None) -> List[Tool]:
+    """TOOLS plus generated tools, n in total; deterministic for a given seed."""
+    base = list(base_tools if base_tools is not None else TOOLS)
+    if n <= len(base):
+        return base[:n]
+    rng = random.Random(seed)
+    dups, dists = near_duplicates(base), distractors()
+    rng.shuffle(dups)
+    rng.shuffle(dists)
+
+    extra: List[Tool] = []
+    while len(base) + len(extra) < n and (dups or dists):
+        take_dup = dups and (not dists or rng.random() < near_duplicate_ratio)
+        extra.append((dups if take_dup else dists).pop())
+
+    district = 0
+    while len(base) + len(extra) < n:
+        district += 1
+        for region in REGIONS:
+            for tool in base:
+                if len(base) + len(extra) >= n:
+                    break
+                extra.append(_scoped(tool, f"{region}D{district}", "district", f"{region}-{district}",
+                                     f"for district {district} of the {region} region only"))
+    return base + extra
+
+
+def main():
+    import argparse
+    import json
+
+    p = argparse.ArgumentParser(description="Print a summary of a synthetic catalog.")
+    p.add_argument("--n", type=int, default=1000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default=None, help="write name/description/schema as JSONL")
+    args = p.parse_args()
+    catalog = expand_catalog(args.n, seed=args.seed)
+    print(f"{len(catalog)} tools; sample: {', '.join(t.name for t in catalog[len(TOOLS):len(TOOLS) + 8])}")
+    if args.out:
+        with open(args.out, "w") as f:
+            for t in catalog:
+                f.write(json.dumps({"name": t.name, "description": t.description, "schema": t.schema}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
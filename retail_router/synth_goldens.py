@@ -0,0 +1,233 @@
+"""
+Template-based synthetic golden-set generator for scale testing.
+
+Queries are built locally from each tool's description (the action phrase) and
+JSON schema (which entities to mention), so any catalog can be covered, not just
+TOOLS. Rows use the golden.jsonl format: qid, query, expected_tool,
+expected_args and must_contain (stable words from the tool's own handler output).
+
+    python -m retail_router.synth_goldens --n 5000 --out retail_router/evals/synth_5k.jsonl \\
+        --tool-zipf 1.1 --query-zipf 1.0 --diversity 0.7
+
+Knobs:
+    diversity    0 = one phrasing per tool, 1 = every frame, shortened actions and shuffled arguments
+    entity_pool  distinct values per entity type (smaller = more repeated SKUs, stores, members)
+    tool_zipf    Zipf exponent over tool popularity (0 = uniform)
+    unique       size of the distinct-query pool; query_zipf > 0 samples rows from it
+                 with Zipfian repetition so caches see realistic hit rates
+"""
+
+import argparse
+import json
+import random
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .synth_catalog import expand_catalog
+from .tools import TOOLS, Tool
+
+FRAMES = [
+    "{Action} {args}.",
+    "Can you {action} {args}?",
+    "I need to {action} {args}.",
+    "Customer asks: {action} {args}?",
+    "Quick one - {action} {args}.",
+    "Please {action} {args}.",
+    "{Args}: {action}?",
+    "How do I {action} {args}?",
+]
+
+CITIES = ["downtown Seattle", "Austin TX", "94114", "Brooklyn", "Palo Alto", "Chicago Loop", "Denver", "Miami Beach"]
+ITEMS = ["opened protein powder", "electronics", "a used coffee maker", "running shoes", "a 55in TV",
+         "wireless headphones", "a bag of chips", "a blender", "a winter jacket", "a phone case"]
+CATEGORIES = ["beverages", "snacks", "cereal", "pet food", "cleaning supplies", "batteries", "frozen pizza"]
+VENDORS = ["TechSupply Co", "Acme Foods", "Northwind Traders", "Globex Retail", "Initech Parts"]
+PRODUCTS = ["Owala 24oz bottle", "Galaxy S24 Ultra", "Ultrabook X1", "32-inch monitor", "iPhone 15",
+            "TCL 5-series TV", "65W USB-C charger", "magnetic case MC-11", "wireless charger"]
+SKU_WORDS = ["SW", "BAT", "LAP", "CAM", "TV", "PHONE", "TABLET", "SPEAKER", "WIDGET", "LAMP", "CABLE", "MOUSE"]
+
+
+def _digits(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice("0123456789") for _ in range(n))
+
+
+ENTITY_MAKERS: Dict[str, Callable[[random.Random], str]] = {
+    "sku": lambda r: f"{r.choice(SKU_WORDS)}-{r.randint(1, 999)}",
+    "base_sku": lambda r: f"{r.choice(SKU_WORDS)}-{r.randint(1, 999)}",
+    "store": lambda r: f"{r.randint(1, 999):04d}",
+    "from_store": lambda r: str(r.randint(100, 999)),
+    "to_store": lambda r: str(r.randint(100, 999)),
+    "member_id": lambda r: _digits(r, 6),
+    "order_id": lambda r: f"{_digits(r, 3)}-{_digits(r, 3)}",
+    "card_number": lambda r: f"{_digits(r, 4)}-{_digits(r, 4)}-{_digits(r, 4)}",
+    "zip_code": lambda r: _digits(r, 5),
+    "near": lambda r: r.choice(CITIES),
+    "item": lambda r: r.choice(ITEMS),
+    "category": lambda r: r.choice(CATEGORIES),
+    "vendor": lambda r: r.choice(VENDORS),
+    "query": lambda r: r.choice(PRODUCTS),
+    "base_item": lambda r: r.choice(PRODUCTS),
+    "add_on": lambda r: r.choice(PRODUCTS),
+    "qty": lambda r: str(r.choice([5, 10, 20, 50, 100, 250])),
+    "threshold": lambda r: str(r.randint(1, 10)),
+    "amount": lambda r: f"{r.randint(5, 300)}.{_digits(r, 2)}",
+    "weight": lambda r: str(r.randint(1, 40)),
+}
+
+ARG_PHRASES = {
+    "sku": "for SKU {v}",
+    "base_sku": "for SKU {v}",
+    "store": "at store {v}",
+    "from_store": "from store {v}",
+    "to_store": "to store {v}",
+    "member_id": "for member {v}",
+    "order_id": "for order {v}",
+    "card_number": "on card {v}",
+    "zip_code": "to zip code {v}",
+    "near": "near {v}",
+    "item": "for {v}",
+    "category": "for {v}",
+    "vendor": "for vendor {v}",
+    "query": "for {v}",
+    "base_item": "with the {v}",
+    "add_on": "using the {v}",
+    "qty": "for {v} units",
+    "threshold": "below {v} units",
+    "amount": "of ${v}",
+    "weight": "for {v} pounds",
+}
+
+
+def action_phrase(description: str, short: bool = False) -> str:
+    """First sentence of a description as a lowercase verb phrase ("check store-level inventory ...")."""
+    sentence = re.split(r"(?<=[.!?])\s", description.strip(), maxsplit=1)[0].rstrip(".!?")
+    if short:
+        sentence = re.split(r",| and | by | with ", sentence, maxsplit=1)[0]
+    return sentence[:1].lower() + sentence[1:]
+
+
+def entity_pools(rng: random.Random, size: int) -> Dict[str, List[str]]:
+    pools = {}
+    for name, make in ENTITY_MAKERS.items():
+        values = []
+        for _ in range(size * 4):
+            v = make(rng)
+            if v not in values:
+                values.append(v)
+            if len(values) == size:
+                break
+        pools[name] = values
+    return pools
+
+
+def _entity(name: str, pools: Dict[str, List[str]], rng: random.Random) -> str:
+    if name in pools:
+        return rng.choice(pools[name])
+    return f"{name.upper()[:3]}-{rng.randint(1, 99)}"
+
+
+def stable_words(tool: Tool, rng: random.Random, pools: Dict[str, List[str]], limit: int = 2) -> List[str]:
+    """Words the handler emits regardless of its arguments, for must_contain."""
+    outputs = []
+    for _ in range(2):
+        args = {p: _entity(p, pools, rng) for p in tool.schema.get("properties", {})}
+        outputs.append(tool.handler(args).get("content", ""))
+    tokens = [re.sub(r"^[^\w$]+|[^\w%]+$", "", w) for w in outputs[0].split()]
+    other = {re.sub(r"^[^\w$]+|[^\w%]+$", "", w) for w in outputs[1].split()}
+    picked = []
+    for tok in tokens:
+        if tok and tok in other and tok not in picked and (len(tok) >= 5 or any(c.isdigit() for c in tok)):
+            picked.append(tok)
+        if len(picked) == limit:
+            break
+    return picked
+
+
+def make_query(tool: Tool, rng: random.Random, pools: Dict[str, List[str]], diversity: float) -> Dict[str, Any]:
+    schema = tool.schema or {}
+    required = set(schema.get("required", []))
+    args = {}
+    for name in schema.get("properties", {}):
+        if name in required or rng.random() < 0.5 * diversity:
+            args[name] = _entity(name, pools, rng)
+    phrases = [ARG_PHRASES.get(n, "for " + n.replace("_", " ") + " {v}").format(v=v) for n, v in args.items()]
+    if diversity > 0.5:
+        rng.shuffle(phrases)
+    n_frames = 1 + round(diversity * (len(FRAMES) - 1))
+    frame = FRAMES[rng.randrange(n_frames)]
+    action = action_phrase(tool.description, short=rng.random() < diversity / 2)
+    arg_text = " ".join(phrases)
+    query = frame.format(
+        action=action, Action=action[:1].upper() + action[1:],
+        args=arg_text, Args=arg_text[:1].upper() + arg_text[1:],
+    )
+    return {"query": re.sub(r"\s+", " ", query).replace(" ?", "?").replace(" .", "."), "expected_args": args}
+
+
+def zipf_weights(n: int, s: float) -> List[float]:
+    return [1.0 / (rank + 1) ** s for rank in range(n)]
+
+
+def generate(
+    n: int,
+    tools: Optional[Sequence[Tool]] = None,
+    unique: Optional[int] = None,
+    tool_zipf: float = 0.0,
+    query_zipf: float = 0.0,
+    diversity: float = 0.5,
+    entity_pool: int = 50,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    tools = list(tools if tools is not None else TOOLS)
+    pools = entity_pools(rng, entity_pool)
+    must = {t.name: stable_words(t, rng, pools) for t in tools}
+
+    popularity = tools[:]
+    rng.shuffle(popularity)
+    tool_w = zipf_weights(len(popularity), tool_zipf)
+
+    unique = min(unique or n, n)
+    pool = []
+    for _ in range(unique):
+        tool = rng.choices(popularity, weights=tool_w)[0]
+        q = make_query(tool, rng, pools, diversity)
+        pool.append({"query": q["query"], "expected_tool": tool.name,
+                     "expected_args": q["expected_args"], "must_contain": must[tool.name]})
+
+    if query_zipf > 0:
+        picks = rng.choices(range(len(pool)), weights=zipf_weights(len(pool), query_zipf), k=n)
+    else:
+        picks = [i % len(pool) for i in range(n)]
+    return [{"qid": f"s{i + 1}", **pool[p]} for i, p in enumerate(picks)]
+
+
+def write_jsonl(rows: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate a synthetic golden set from tool schemas and descriptions.")
+    p.add_argument("--n", type=int, default=5000)
+    p.add_argument("--out", default="retail_router/evals/synth_goldens.jsonl")
+    p.add_argument("--unique", type=int, default=None, help="distinct queries (default: n)")
+    p.add_argument("--tool-zipf", type=float, default=0.0)
+    p.add_argument("--query-zipf", type=float, default=0.0)
+    p.add_argument("--diversity", type=float, default=0.5)
+    p.add_argument("--entity-pool", type=int, default=50)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--catalog-size", type=int, default=None, help="label against a synthetic catalog of this size")
+    args = p.parse_args()
+
+    tools = expand_catalog(args.catalog_size, seed=args.seed) if args.catalog_size else None
+    rows = generate(args.n, tools=tools, unique=args.unique, tool_zipf=args.tool_zipf, query_zipf=args.query_zipf,
+                    diversity=args.diversity, entity_pool=args.entity_pool, seed=args.seed)
+    write_jsonl(rows, args.out)
+    distinct = len({r["query"] for r in rows})
+    print(f"Wrote {len(rows)} goldens ({distinct} distinct queries) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
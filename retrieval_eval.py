@@ -0,0 +1,250 @@
+"""
+Retrieval-only evaluation: rank of the expected tool for every golden query.
+
+No chat completions are made. All goldens are embedded in one batched call and
+scored against the whole catalog with a single matrix multiply; recall@k for
+every k and MRR are then computed for each tool-count prefix used by
+test_performance_degradation.py. Use it to tune TOP_K without paying for LLM
+selection and synthesis.
+
+    OPENAI_BACKEND=fake python retrieval_eval.py --max-k 10
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from retail_router.clients import build_client, needs_api_key
+from retail_router.embedding_store import quantize
+from retail_router.projection import Projection
+from retail_router.router import RetailRouter
+from retail_router.synth_catalog import expand_catalog
+
+TOOL_COUNTS = [5, 10, 15, 20, 25, 30]
+
+
+def load_golden(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def embed_texts(client: Any, model: str, texts: List[str], batch_size: int = 2048, dimensions: int = None) -> np.ndarray:
+    kwargs = {"dimensions": dimensions} if dimensions else {}
+    rows = []
+    for i in range(0, len(texts), batch_size):
+        data = client.embeddings.create(model=model, input=texts[i:i + batch_size], **kwargs).data
+        rows.extend(d.embedding for d in sorted(data, key=lambda d: d.index))
+    return np.asarray(rows, dtype=np.float32)
+
+
+def cosine_scores(queries: np.ndarray, tools: np.ndarray) -> np.ndarray:
+    """(n_queries, n_tools) cosine similarity matrix in one matmul."""
+    qn = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-9)
+    tn = tools / np.maximum(np.linalg.norm(tools, axis=1, keepdims=True), 1e-9)
+    return qn @ tn.T
+
+
+def expected_ranks(scores: np.ndarray, expected: np.ndarray, num_tools: int) -> np.ndarray:
+    """
+    1-based rank of each query's expected tool among the first `num_tools` tools,
+    for the queries whose expected tool is inside that prefix. Ties rank by
+    catalog order, matching RetailRouter._rank_tools.
+    """
+    mask = expected < num_tools
+    s = scores[mask, :num_tools]
+    e = expected[mask]
+    target = s[np.arange(len(e)), e][:, None]
+    earlier = np.arange(num_tools)[None, :] < e[:, None]
+    return 1 + (s > target).sum(axis=1) + ((s == target) & earlier).sum(axis=1)
+
+
+def recall_curve(ranks: np.ndarray, max_k: int) -> np.ndarray:
+    """recall@k for k = 1..max_k from one histogram of ranks."""
+    if len(ranks) == 0:
+        return np.zeros(max_k)
+    hist = np.bincount(np.minimum(ranks, max_k + 1), minlength=max_k + 2)[1:max_k + 1]
+    return np.cumsum(hist) / len(ranks)
+
+
+def retrieval_report(scores: np.ndarray, expected: np.ndarray, tool_counts: Sequence[int], max_k: int) -> List[Dict[str, Any]]:
+    report = []
+    for n in tool_counts:
+        ranks = expected_ranks(scores, expected, n)
+        report.append({
+            "num_tools": n,
+            "num_testable": int(len(ranks)),
+            "mrr": float(np.mean(1.0 / ranks)) if len(ranks) else 0.0,
+            "recall_at_k": [float(r) for r in recall_curve(ranks, max_k)],
+        })
+    return report
+
+
+def catalog_stats(router: RetailRouter, queries: np.ndarray) -> Dict[str, Any]:
+    """Memory, per-query ranking latency and tool-prompt size of the router's catalog."""
+    t = time.perf_counter()
+    for q in queries:
+        router._rank_tools(q)
+    rank_us = (time.perf_counter() - t) / max(len(queries), 1) * 1e6
+    prompt = json.dumps(router._format_tool_options(router._rank_tools(queries[0]))) if len(queries) else ""
+    return {
+        "num_tools": len(router._tools),
+        "matrix_mb": router._matrix.nbytes / 2**20,
+        "rank_us_per_query": rank_us,
+        "prompt_tokens": len(prompt) // 4,
+    }
+
+
+def _with_deltas(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add MRR / recall@k deltas against the first (baseline) row."""
+    base = rows[0]
+    for row in rows:
+        row["mrr_delta"] = row["mrr"] - base["mrr"]
+        row["recall_delta"] = [a - b for a, b in zip(row["recall_at_k"], base["recall_at_k"])]
+    return rows
+
+
+def quantization_report(queries: np.ndarray, tools: np.ndarray, expected: np.ndarray, num_tools: int,
+                        max_k: int, dtypes: Sequence[str]) -> List[Dict[str, Any]]:
+    """MRR / recall@k of each store dtype on the full catalog, with deltas against float32."""
+    rows = []
+    for dtype in ["float32"] + [d for d in dtypes if d != "float32"]:
+        stored, scales = quantize(tools, dtype)
+        scores = cosine_scores(queries, stored.astype(np.float32) * scales[:, None])
+        rows.append({"variant": dtype, "matrix_mb": stored.nbytes / 2**20,
+                     **retrieval_report(scores, expected, [num_tools], max_k)[0]})
+    return _with_deltas(rows)
+
+
+def _score_us(queries: np.ndarray, tools: np.ndarray) -> float:
+    t = time.perf_counter()
+    for q in queries:
+        tools @ q
+    return (time.perf_counter() - t) / max(len(queries), 1) * 1e6
+
+
+def reduction_report(queries: np.ndarray, tools: np.ndarray, expected: np.ndarray, num_tools: int, max_k: int,
+                     specs: Sequence[str], reembed: Any = None) -> List[Dict[str, Any]]:
+    """
+    MRR / recall@k and per-query scoring cost of reduced-dimension embeddings,
+    with deltas against full width. "pca:<d>" / "random:<d>" project locally;
+    "api:<d>" calls reembed(d) -> (queries, tools) embedded at that width.
+    """
+    variants = [("full", queries, tools)]
+    for spec in specs:
+        kind, _, dim = spec.partition(":")
+        if kind == "api":
+            if reembed is None:
+                continue
+            variants.append((spec, *reembed(int(dim))))
+        else:
+            proj = Projection.parse(spec, tools)
+            variants.append((f"{proj.kind}:{proj.dim}", proj.apply(queries), proj.apply(tools)))
+    rows = []
+    for name, q, t in variants:
+        rows.append({"variant": name, "dim": int(t.shape[1]), "matrix_mb": t.nbytes / 2**20,
+                     "score_us_per_query": _score_us(q, t),
+                     **retrieval_report(cosine_scores(q, t), expected, [num_tools], max_k)[0]})
+    return _with_deltas(rows)
+
+
+def print_deltas(title: str, rows: List[Dict[str, Any]], ks: Sequence[int]) -> None:
+    print(f"\n{title}")
+    timed = "score_us_per_query" in rows[0]
+    print(f"{'variant':>12}{'MB':>8}" + (f"{'us/q':>8}" if timed else "") + f"{'MRR':>8}{'dMRR':>9}"
+          + "".join(f"{'dR@' + str(k):>9}" for k in ks))
+    for row in rows:
+        line = f"{row['variant']:>12}{row['matrix_mb']:>8.2f}"
+        line += f"{row['score_us_per_query']:>8.1f}" if timed else ""
+        line += f"{row['mrr']:>8.3f}{row['mrr_delta']:>+9.4f}"
+        line += "".join(f"{row['recall_delta'][k - 1]:>+9.4f}" for k in ks)
+        print(line)
+
+
+def print_report(report: List[Dict[str, Any]], ks: Sequence[int]) -> None:
+    header = f"{'tools':>6}{'n':>6}{'MRR':>8}" + "".join(f"{'R@' + str(k):>8}" for k in ks)
+    print(header)
+    for row in report:
+        line = f"{row['num_tools']:>6}{row['num_testable']:>6}{row['mrr']:>8.3f}"
+        line += "".join(f"{row['recall_at_k'][k - 1]:>8.3f}" for k in ks)
+        print(line)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Retrieval-only recall@k / MRR sweep.")
+    p.add_argument("--golden", default="retail_router/evals/golden.jsonl")
+    p.add_argument("--max-k", type=int, default=10)
+    p.add_argument("--tool-counts", default=",".join(map(str, TOOL_COUNTS)))
+    p.add_argument("--catalog-size", type=int, default=None,
+                   help="pad TOOLS with synthetic near-duplicate and distractor tools up to this size")
+    p.add_argument("--top-k", type=int, default=int(os.getenv("TOP_K", "4")))
+    p.add_argument("--quantize", default="float16,int8",
+                   help="store dtypes to compare against float32 ('' to skip)")
+    p.add_argument("--reduce", default="pca:64,pca:256,random:256",
+                   help="reduced-dimension variants to compare against full width: pca:<d>, random:<d>, "
+                        "api:<d> (re-embeds at that width); '' to skip")
+    p.add_argument("--out", default=None, help="write the full report as JSON")
+    args = p.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and needs_api_key():
+        raise RuntimeError("Set OPENAI_API_KEY in your environment.")
+    embed_model = os.getenv("EMBED_MODEL", "text-embedding-3-small")
+
+    tools = expand_catalog(args.catalog_size) if args.catalog_size else None
+    t = time.perf_counter()
+    router = RetailRouter(embed_model=embed_model, top_k=args.top_k, tools=tools, client=build_client(api_key))
+    build_s = time.perf_counter() - t
+    index = {t.name: i for i, t in enumerate(router._tools)}
+    goldens = [g for g in load_golden(args.golden) if g["expected_tool"] in index]
+    tool_counts = [n for n in (int(c) for c in args.tool_counts.split(",")) if n <= len(index)]
+    if args.catalog_size and args.catalog_size not in tool_counts:
+        tool_counts.append(len(index))
+
+    t = time.perf_counter()
+    queries = embed_texts(router.client, embed_model, [g["query"] for g in goldens])
+    embed_s = time.perf_counter() - t
+
+    t = time.perf_counter()
+    scores = cosine_scores(queries, router._matrix)
+    expected = np.array([index[g["expected_tool"]] for g in goldens])
+    report = retrieval_report(scores, expected, tool_counts, args.max_k)
+    sweep_s = time.perf_counter() - t
+
+    scale = catalog_stats(router, queries)
+    print(f"{len(goldens)} goldens x {len(index)} tools; catalog embed {build_s:.2f}s, "
+          f"query embed {embed_s:.2f}s, sweep {sweep_s * 1000:.1f}ms")
+    print(f"Embedding matrix {scale['matrix_mb']:.1f} MB, rank {scale['rank_us_per_query']:.0f} us/query, "
+          f"top-{args.top_k} prompt ~{scale['prompt_tokens']} tokens\n")
+    ks = [k for k in (1, 2, 3, 4, 5, 8, 10) if k <= args.max_k]
+    print_report(report, ks)
+
+    tools_full = np.asarray(router._matrix, dtype=np.float32)
+    quant = []
+    dtypes = [d for d in args.quantize.split(",") if d]
+    if dtypes:
+        quant = quantization_report(queries, tools_full, expected, len(index), args.max_k, dtypes)
+        print_deltas(f"Quantized store on {len(index)} tools (delta vs float32)", quant, ks)
+
+    def reembed(dim: int):
+        texts = [f"{t.name}: {t.description}" for t in router._tools]
+        return (embed_texts(router.client, embed_model, [g["query"] for g in goldens], dimensions=dim),
+                embed_texts(router.client, embed_model, texts, dimensions=dim))
+
+    reduced = []
+    specs = [r for r in args.reduce.split(",") if r]
+    if specs:
+        reduced = reduction_report(queries, tools_full, expected, len(index), args.max_k, specs, reembed)
+        print_deltas(f"Reduced dimensions on {len(index)} tools (delta vs full width)", reduced, ks)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"embed_model": embed_model, "catalog": scale, "results": report,
+                       "quantization": quant, "reduction": reduced}, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
-import os, json, time, csv
-from typing import List, Dict, Any
-import pandas as pd
+import os, json, time, csv, threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Iterator, Set
 from tqdm import tqdm
 
+from retail_router.clients import build_client, needs_api_key
 from retail_router.router import RetailRouter
 
+CSV_FIELDS = ["qid", "expected_tool", "picked_tool", "tool_match", "must_contain", "answer_contains", "ok"]
+
 def load_golden(path: str) -> List[Dict[str, Any]]:
     items = []
     with open(path, "r") as f:
@@ -12,51 +15,152 @@ def load_golden(path: str) -> List[Dict[str, Any]]:
             items.append(json.loads(line))
     return items
 
+def iter_golden(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
 def contains_all(text: str, needles: List[str]) -> bool:
     low = text.lower()
     return all(n.lower() in low for n in needles)
 
+def evaluate_one(router: RetailRouter, g: Dict[str, Any]) -> Dict[str, Any]:
+    r = router.decide_and_execute(g["query"])
+
+    picked_tool = r.get("tool_name")
+    answer = r.get("answer","")
+    ok = r.get("ok", False)
+
+    return {
+        "qid": g["qid"],
+        "expected_tool": g["expected_tool"],
+        "picked_tool": picked_tool,
+        "tool_match": int(picked_tool == g["expected_tool"]),
+        "must_contain": ";".join(g["must_contain"]),
+        "answer_contains": int(contains_all(answer, g["must_contain"])),
+        "ok": int(ok)
+    }
+
+class Checkpoint:
+    """Append-only JSONL of finished rows; completed qids are skipped on restart."""
+
+    def __init__(self, path: str, fresh: bool = False):
+        self.path = path
+        self.done: Set[str] = set()
+        self.n = 0
+        self.tool_matches = 0
+        self.answer_hits = 0
+        self._lock = threading.Lock()
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            for row in self.rows():
+                self._tally(row)
+        self._f = open(path, "a", encoding="utf-8")
+        if self._f.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._f.write("\n")
+
+    def _tally(self, row: Dict[str, Any]) -> None:
+        self.done.add(row["qid"])
+        self.n += 1
+        self.tool_matches += row["tool_match"]
+        self.answer_hits += row["answer_contains"]
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from an interrupted write
+
+    def append(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._f.write(json.dumps(row) + "\n")
+            self._f.flush()
+            self._tally(row)
+
+    def accuracy(self):
+        if not self.n:
+            return 0.0, 0.0
+        return self.tool_matches / self.n, self.answer_hits / self.n
+
+    def close(self) -> None:
+        self._f.close()
+
+def write_csv(checkpoint: Checkpoint, path: str) -> None:
+    # Last row per qid wins, in case a qid was evaluated twice across restarts
+    latest: Dict[str, Dict[str, Any]] = {}
+    for row in checkpoint.rows():
+        latest[row["qid"]] = row
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(latest.values())
+
 def main():
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not api_key and needs_api_key():
         raise RuntimeError("Set OPENAI_API_KEY in your environment.")
 
     model = os.getenv("ROUTER_MODEL", "gpt-4o-mini")
     embed_model = os.getenv("EMBED_MODEL", "text-embedding-3-small")
     top_k = int(os.getenv("TOP_K", "4"))
+    golden_path = os.getenv("GOLDEN_PATH", "retail_router/evals/golden.jsonl")
+    workers = int(os.getenv("EVAL_WORKERS", "8"))
+    checkpoint_path = os.getenv("EVAL_CHECKPOINT", "results.jsonl")
+    fresh = os.getenv("EVAL_FRESH", "0") == "1"
 
-    router = RetailRouter(model=model, embed_model=embed_model, top_k=top_k)
-    goldens = load_golden("retail_router/evals/golden.jsonl")
+    router = RetailRouter(model=model, embed_model=embed_model, top_k=top_k, client=build_client(api_key))
+    checkpoint = Checkpoint(checkpoint_path, fresh=fresh)
+    if checkpoint.n:
+        print(f"Resuming from {checkpoint_path}: {checkpoint.n} queries already evaluated")
 
-    rows = []
-    for g in tqdm(goldens, desc="Evaluating"):
-        r = router.decide_and_execute(g["query"])
+    errors = 0
+    pbar = tqdm(desc="Evaluating", unit="q")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Bounded in-flight window so huge golden sets are streamed, not loaded
+            pending = {}
+            for g in iter_golden(golden_path):
+                if g["qid"] in checkpoint.done:
+                    continue
+                if len(pending) >= workers * 2:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    errors += _drain(finished, pending, checkpoint, pbar)
+                pending[pool.submit(evaluate_one, router, g)] = g["qid"]
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                errors += _drain(finished, pending, checkpoint, pbar)
+    finally:
+        pbar.close()
+        checkpoint.close()
 
-        picked_tool = r.get("tool_name")
-        answer = r.get("answer","")
-        ok = r.get("ok", False)
-
-        tool_match = int(picked_tool == g["expected_tool"])
-        answer_contains = int(contains_all(answer, g["must_contain"]))
-
-        rows.append({
-            "qid": g["qid"],
-            "expected_tool": g["expected_tool"],
-            "picked_tool": picked_tool,
-            "tool_match": tool_match,
-            "must_contain": ";".join(g["must_contain"]),
-            "answer_contains": answer_contains,
-            "ok": int(ok)
-        })
-
-    df = pd.DataFrame(rows)
-    df.to_csv("results.csv", index=False)
-
-    tool_acc = df["tool_match"].mean()
-    ans_acc = df["answer_contains"].mean()
+    write_csv(checkpoint, "results.csv")
+    tool_acc, ans_acc = checkpoint.accuracy()
+    if errors:
+        print(f"{errors} queries raised and were not checkpointed; re-run to retry them.")
     print(f"Tool Selection Accuracy: {tool_acc:.3f}")
     print(f"Answer Must-Contain Rate: {ans_acc:.3f}")
     print("Wrote results.csv")
 
+def _drain(finished, pending, checkpoint: Checkpoint, pbar) -> int:
+    errors = 0
+    for fut in finished:
+        qid = pending.pop(fut)
+        try:
+            checkpoint.append(fut.result())
+        except Exception as e:
+            errors += 1
+            tqdm.write(f"Error on query {qid}: {e}")
+        pbar.update(1)
+    tool_acc, ans_acc = checkpoint.accuracy()
+    pbar.set_postfix(tool_acc=f"{tool_acc:.3f}", ans_rate=f"{ans_acc:.3f}")
+    return errors
+
 if __name__ == "__main__":
     main()
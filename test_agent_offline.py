@@ -0,0 +1,336 @@
+"""Offline tests for the ReACT agent and its tools, run against the deterministic fake OpenAI client."""
+
+import asyncio
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agent.context import ContextManager
+from agent.react_agent import ReACTAgent
+from agent.stream_parser import ReActStreamParser
+from retail_router.fake_openai import AsyncFakeOpenAI, FakeOpenAI, LatencyModel
+from retail_router.tools import TOOLS, Tool
+from utils.validation import compile_validator
+from tools.base import BaseTool, ToolParameter, ToolRegistry, ToolResult
+from tools.basic_tools import CalculatorTool, FileReadTool, ListDirectoryTool
+from tools.executor import ToolExecutor
+from tools.retail_adapter import register_retail_tools
+from tools.retrieval import EmbeddingRetriever, ToolRetriever
+from utils.log import configure_logging, get_logger, shutdown_logging
+
+
+@pytest.fixture
+def make_agent():
+    """Build a ReACTAgent on FakeOpenAI (scripted when `script` is given) with `tools` registered."""
+    def make(*tools, script=None, client=None, **kwargs):
+        agent = ReACTAgent(api_key="unused", client=client if client is not None else FakeOpenAI(script=script), **kwargs)
+        for tool in tools:
+            agent.register_tool(tool)
+        return agent
+    return make
+
+
+class SlowTool(BaseTool):
+    def __init__(self):
+        super().__init__(name="slow_echo", description="Echo text after a delay")
+
+    def _define_parameters(self):
+        return [ToolParameter(name="text", type="string", description="Text to echo"),
+                ToolParameter(name="delay", type="number", description="Seconds", required=False)]
+
+    def execute(self, **kwargs):
+        time.sleep(kwargs.get("delay", 0.2))
+        return ToolResult(success=True, result=kwargs["text"])
+
+
+def test_agent_native_mode_uses_structured_tool_calls(make_agent):
+    """Native mode passes registry schemas as tools, runs tool calls and counts usage."""
+    requests = []
+
+    def script(request):
+        requests.append(request)
+        if request["messages"][-1]["role"] == "tool":
+            return {"content": "The answer is " + request["messages"][-1]["content"].split("Result: ")[1]}
+        return {"content": None, "tool_calls": [{"name": "calculator", "arguments": {"expression": "17 * 23 + 4"}}]}
+
+    agent = make_agent(CalculatorTool(), script=script, mode="native")
+    assert agent.run("What is 17 * 23 + 4?") == "The answer is 395"
+    assert requests[0]["tools"][0]["function"]["name"] == "calculator"
+    assert agent.stats["iterations"] == 2 and agent.stats["tool_calls"] == 1
+    assert agent.stats["parse_failures"] == 0 and agent.stats["completion_tokens"] > 0
+
+    text = make_agent(CalculatorTool(), script=[
+        {"content": "Thought: compute\nAction: calculator\nAction Input: {expression: 2+2}"},
+        {"content": "Final Answer: 4"},
+    ])
+    assert text.run("2+2?") == "4"
+    assert text.stats["parse_failures"] == 1
+    with pytest.raises(ValueError):
+        make_agent(mode="xml")
+
+
+def test_agent_stream_stops_at_complete_action(make_agent):
+    """Text mode sends a stop sequence, and streaming cuts the completion right after the Action Input JSON."""
+    parser = ReActStreamParser()
+    chunks = ["Thought: x\nAction: calculator\nAction Input: ", '{"expression": "{1', '+1}"}', "\nObservation: 9"]
+    assert [parser.feed(c) for c in chunks[:3]] == [False, False, True]
+    assert parser.text.endswith('"{1+1}"}')
+
+    agent = make_agent(CalculatorTool(), client=FakeOpenAI(token_latency_ms=20, react_overrun=True), stream=True)
+    assert agent.run("What is 17 * 23 + 4?").endswith("395")
+    assert agent.stats["early_stops"] == 1 and agent.stats["tool_calls"] == 1
+    assert agent.conversation_history[0]["content"].endswith("}")
+
+    plain = make_agent(CalculatorTool(), client=FakeOpenAI(token_latency_ms=20, react_overrun=True))
+    plain.stop = None
+    assert "42" in plain.run("What is 17 * 23 + 4?")  # without a stop sequence the model answers itself
+    assert plain.stats["tool_calls"] == 0
+    assert plain.stats["llm_ms"] / plain.stats["iterations"] > agent.stats["llm_ms"] / agent.stats["iterations"]
+
+
+def test_agent_context_stays_within_budget(tmp_path, make_agent):
+    """Large observations are truncated and older steps summarized, so prompt size stops growing."""
+    big = tmp_path / "big.txt"
+    big.write_text("lorem ipsum dolor sit amet " * 2000)
+    step = {"content": f'Thought: read again\nAction: read_file\nAction Input: {json.dumps({"file_path": str(big)})}'}
+
+    def run(context):
+        agent = make_agent(FileReadTool(), script=[step] * 6 + [{"content": "Final Answer: done"}], context=context)
+        assert agent.run("Read big.txt six times") == "done"
+        return agent
+
+    full = run(ContextManager(max_tokens=None, max_observation_tokens=None, keep_recent=None))
+    bounded = run(ContextManager(max_tokens=2000, max_observation_tokens=300, keep_recent=2))
+    assert full.stats["prompt_sizes"][-1] > 50000 and full.stats["compactions"] == 0
+    assert max(bounded.stats["prompt_sizes"]) < 2000 and bounded.stats["compactions"] > 0
+    assert len(bounded.conversation_history[-1]["content"]) < 1500
+    messages = bounded._build_messages("Read big.txt six times", "x")
+    assert sum(m["content"].startswith("Summary of earlier steps:") for m in messages) == 1
+
+
+def test_agent_prompts_are_memoized_and_sorted(make_agent):
+    """The system prompt and native tool list are built once per registry change, tools sorted by name."""
+    agent = make_agent(ListDirectoryTool())
+    prompt = agent._get_system_prompt()
+    assert agent._get_system_prompt() is prompt
+    agent.register_tool(CalculatorTool())
+    updated = agent._get_system_prompt()
+    assert updated is not prompt and updated.index("- calculator") < updated.index("- list_directory")
+    assert [t["function"]["name"] for t in agent._get_native_tools()] == ["calculator", "list_directory"]
+
+
+def test_agent_sessions_share_one_agent(make_agent):
+    """Threads and an event loop run isolated sessions over one agent, client and registry."""
+    agent = make_agent(CalculatorTool(), client=FakeOpenAI(chat_latency=LatencyModel.parse("fixed:20")),
+                       async_client=AsyncFakeOpenAI(chat_latency=LatencyModel.parse("fixed:100"),
+                                                    token_latency_ms=1, react_overrun=True))
+
+    def ask(i):
+        session = agent.new_session()
+        return agent.run(f"What is 17 * {i} + 4?", session=session), session
+
+    with ThreadPoolExecutor(8) as pool:
+        for i, (answer, session) in enumerate(pool.map(ask, range(8))):
+            assert answer.endswith(str(17 * i + 4))
+            assert session.stats["tool_calls"] == 1 and len(session.conversation_history) == 3
+
+    async def many(n):
+        sessions = [agent.new_session() for _ in range(n)]
+        answers = await asyncio.gather(*(agent.arun(f"What is 17 * {i} + 4?", s) for i, s in enumerate(sessions)))
+        return answers, sessions
+
+    t = time.perf_counter()
+    answers, sessions = asyncio.run(many(20))
+    assert time.perf_counter() - t < 1.5  # 40 sequential 100 ms completions would take 4 s
+    assert all(a.endswith(str(17 * i + 4)) for i, a in enumerate(answers))
+    assert all(s.stats["iterations"] == 2 for s in sessions)
+
+    agent.stream = True
+    session = agent.new_session()
+    assert asyncio.run(agent.arun("What is 2 * 21?", session)).endswith("42")
+    assert session.stats["early_stops"] == 1 and agent.stats["iterations"] == 0
+
+    # An injected sync client never silently pairs with a real AsyncOpenAI
+    with pytest.raises(ValueError):
+        asyncio.run(make_agent(CalculatorTool()).arun("What is 2 * 21?"))
+
+
+def test_agent_runs_multi_action_steps_concurrently(make_agent):
+    """Parallel native tool calls and list-valued Action Inputs run concurrently within one step."""
+    inputs = [{"text": t} for t in ("a", "b", "c")]
+    text = make_agent(SlowTool(), script=[
+        {"content": f"Thought: all at once\nAction: slow_echo\nAction Input: {json.dumps(inputs)}"},
+        {"content": "Final Answer: done"},
+    ])
+    t = time.perf_counter()
+    assert text.run("echo a, b and c") == "done"
+    assert time.perf_counter() - t < 0.5 and text.stats["iterations"] == 2 and text.stats["tool_calls"] == 3
+    observation = text.conversation_history[1]["content"]
+    assert all(f"[{n}] Tool 'slow_echo' executed successfully. Result: {v}" in observation
+               for n, v in ((1, "a"), (2, "b"), (3, "c")))
+
+    native = make_agent(SlowTool(), mode="native", tool_timeout=0.5, script=[
+        {"tool_calls": [{"name": "slow_echo", "arguments": {"text": "x"}},
+                        {"name": "slow_echo", "arguments": {"text": "y", "delay": 2}}]},
+        {"content": "partial"},
+    ])
+    t = time.perf_counter()
+    assert native.run("echo x and y") == "partial"
+    assert time.perf_counter() - t < 1.0 and native.stats["tool_timeouts"] == 1
+    tool_messages = [m["content"] for m in native.conversation_history if m["role"] == "tool"]
+    assert "Result: x" in tool_messages[0] and "timed out" in tool_messages[1]
+
+
+def test_agent_prompt_lists_only_retrieved_tools(make_agent):
+    """With tool_top_k, prompt size stays flat as registered tools grow, and used tools stay listed."""
+    class Plugin(BaseTool):
+        def _define_parameters(self):
+            return []
+
+        def execute(self, **kwargs):
+            return ToolResult(success=True, result="ok")
+
+    def build(n_plugins, top_k):
+        plugins = []
+        for i in range(n_plugins):
+            region = "".join(chr(ord("a") + int(d)) for d in str(i))  # no digits to match the query's numbers
+            plugins.append(Plugin(f"plugin_{region}", f"Manages widgets and gadgets in region {region}"))
+        return make_agent(*plugins, CalculatorTool(), FileReadTool(), tool_top_k=top_k)
+
+    sizes = {}
+    for n in (20, 500):
+        agent = build(n, top_k=3)
+        assert agent.run("Use the calculator for 17 * 23 + 4").endswith("395")
+        sizes[n] = agent.stats["prompt_sizes"][0]
+        prompt = agent._build_messages("again")[0]["content"]
+        assert "- calculator:" in prompt and prompt.count("\n- ") <= 3
+    assert sizes[500] == sizes[20]
+    assert build(500, top_k=None).run("Use the calculator for 2 + 2").endswith("4")
+
+    registry = build(50, top_k=3).tool_registry
+    registry.set_retriever(EmbeddingRetriever(FakeOpenAI()))
+    assert registry.search("read the contents of a file", 1)[0].name == "read_file"
+    with pytest.raises(TypeError):
+        ToolRetriever()
+
+
+def test_tool_arguments_are_validated_before_execution(make_agent):
+    """Retail tools bridge into ToolRegistry; bad arguments are fed back to the model without running the handler."""
+    validate = compile_validator({"properties": {"qty": {"type": "integer", "minimum": 1},
+                                                 "tags": {"type": "array", "items": {"type": "string"}}},
+                                  "required": ["qty"], "additionalProperties": False})
+    assert validate({"qty": 2, "tags": ["a"]}) == []
+    assert validate({"qty": True, "tags": [1], "extra": 0}) == [
+        "'qty' must be integer, got bool", "'tags[0]' must be string, got int", "'extra' is not an allowed argument"]
+
+    calls = []
+
+    def handler(args):
+        calls.append(args)
+        return {"ok": True, "content": f"{args['sku']} in {args['region']}"}
+    tool = Tool("RegionalStock", "Stock for a SKU in one region",
+                {"type": "object", "properties": {"sku": {"type": "string"}, "region": {"type": "string", "enum": ["West"]}},
+                 "required": ["sku", "region"]}, handler)
+
+    registry = ToolRegistry()
+    register_retail_tools(registry, TOOLS + [tool])
+    assert registry.get_tool("RegionalStock").get_schema()["parameters"] is tool.schema
+    assert registry.validate("InventoryLookup", {"store": "1"}) == ["'sku' is required"]
+    assert registry.get_tool("StoreHours").execute(store="205").result.startswith("Store 205 hours")
+
+    bad, good = {"sku": "A1", "region": "Mars"}, {"sku": "A1", "region": "West"}
+    agent = make_agent(mode="native", script=[
+        {"tool_calls": [{"name": "RegionalStock", "arguments": bad}]},
+        {"tool_calls": [{"name": "RegionalStock", "arguments": good}]},
+        {"content": "A1 is stocked in West"},
+    ])
+    register_retail_tools(agent.tool_registry, [tool])
+    assert agent.run("stock of A1 out west") == "A1 is stocked in West"
+    assert calls == [good] and agent.stats["invalid_args"] == 1
+    tool_messages = [m["content"] for m in agent.conversation_history if m["role"] == "tool"]
+    assert "Invalid arguments for 'RegionalStock'" in tool_messages[0] and "one of ['West']" in tool_messages[0]
+
+
+def test_structured_logging_is_queued_and_lazy(make_agent):
+    """Agent events go through the background queue as JSON; disabled levels never render their fields."""
+    rendered = []
+
+    class Probe:
+        def __str__(self):
+            rendered.append(threading.current_thread().name)
+            return "probe"
+
+    out = io.StringIO()
+    try:
+        configure_logging("INFO", "json", stream=out)
+        get_logger("test").debug("test.hidden", value=Probe())
+        agent = make_agent(CalculatorTool(), script=[
+            {"content": 'Thought: add\nAction: calculator\nAction Input: {"expression": "2 + 2"}'},
+            {"content": "Final Answer: 4"},
+        ])
+        assert agent.run("what is 2 + 2") == "4"
+        configure_logging("DEBUG", "json", stream=out)
+        get_logger("test").debug("test.shown", value=Probe())
+    finally:
+        shutdown_logging()
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [e["event"] for e in events] == ["agent.tool_call", "agent.run_finished", "test.shown"]
+    assert events[0]["input"] == {"expression": "2 + 2"} and events[1]["iterations"] == 2
+    assert events[2]["value"] == "probe" and rendered and threading.main_thread().name not in rendered
+
+
+def test_tool_executor_limits_timeouts_and_counters():
+    """ToolRegistry runs calls on its executor: per-tool caps, timeouts, cancellation and counters."""
+    class Backend(BaseTool):
+        def __init__(self):
+            self.active = self.peak = 0
+            self.lock = threading.Lock()
+            super().__init__(name="backend", description="Call a fragile backend")
+
+        def _define_parameters(self):
+            return [ToolParameter(name="delay", type="number", description="Seconds")]
+
+        def execute(self, **kwargs):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(kwargs["delay"])
+            with self.lock:
+                self.active -= 1
+            if kwargs["delay"] == 0:
+                raise RuntimeError("backend down")
+            return ToolResult(success=True, result=kwargs["delay"])
+
+    backend = Backend()
+    registry = ToolRegistry(executor=ToolExecutor(max_workers=8, timeout=5.0, limits={"backend": 2}))
+    registry.register(backend)
+    t = time.perf_counter()
+    results = registry.execute_many([("backend", {"delay": 0.1})] * 6 + [("backend", {"delay": 0})])
+    assert backend.peak == 2 and 0.3 <= time.perf_counter() - t < 1.0
+    assert [r.success for r in results] == [True] * 6 + [False] and results[-1].error == "backend down"
+
+    stats = {"tool_timeouts": 0, "invalid_args": 0}
+    registry.executor.set_limit("backend", 1)
+    registry.executor.set_timeout("backend", 0.3)
+    results = registry.execute_many([("backend", {"delay": 0.2})] * 3 + [("backend", {"delay": "x"})], stats)
+    # The timeout counts from when a call starts: the second call waits 0.2s and runs 0.2s, and
+    # still succeeds; the third is still queued after 0.3s, so it times out and is cancelled
+    assert results[0].success and results[1].success and "timed out after 0.3s" in results[2].error
+    assert "'delay' must be number" in results[3].error and stats == {"tool_timeouts": 1, "invalid_args": 1}
+    counters = registry.executor.stats()["backend"]
+    assert counters["calls"] == 9 and counters["errors"] == 1 and counters["timeouts"] == 1
+    assert counters["cancelled"] == 1 and counters["running"] == 0 and counters["max_ms"] >= 200
+
+    results = asyncio.run(registry.aexecute_many([("backend", {"delay": 0.2})] * 2 + [("missing", {})]))
+    assert results[0].success and results[1].success and results[2].error == "Tool 'missing' not found"
+
+    processes = ToolRegistry(executor=ToolExecutor(max_workers=2, kind="process"))
+    processes.register(CalculatorTool())
+    try:
+        assert processes.execute("calculator", {"expression": "6 * 7"}).result == 42
+    finally:
+        processes.executor.shutdown()
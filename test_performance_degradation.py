@@ -11,7 +11,9 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from tqdm import tqdm
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from retail_router.clients import build_client, needs_api_key
 from retail_router.router import RetailRouter
 from retail_router.tools import TOOLS
 
@@ -26,16 +28,24 @@ def load_golden(path: str) -> List[Dict[str, Any]]:
 
 
 def create_router_with_subset_tools(
-    num_tools: int, model: str, embed_model: str, top_k: int = 4
+    num_tools: int, model: str, embed_model: str, top_k: int = 4, client=None, master=None
 ):
     """
     Create a router with a subset of tools.
     We'll use the first N tools to maintain consistency across runs.
+    With a fully embedded `master` router the subset is a view over its
+    embeddings and no embedding calls are made.
     """
+    if master is not None:
+        return master.subset(num_tools, model=model, top_k=top_k)
     # Use first N tools for consistency
     subset_tools = TOOLS[:num_tools]
     return RetailRouter(
-        model=model, embed_model=embed_model, top_k=top_k, tools=subset_tools
+        model=model,
+        embed_model=embed_model,
+        top_k=top_k,
+        tools=subset_tools,
+        client=client,
     )
 
 
@@ -48,6 +58,8 @@ def evaluate_with_tool_count(
     num_runs: int = 1,
     tool_pbar: tqdm = None,
     overall_pbar: tqdm = None,
+    client=None,
+    master=None,
 ) -> Dict[str, float]:
     """
     Evaluate router performance with a specific number of tools.
@@ -71,7 +83,7 @@ def evaluate_with_tool_count(
     for run in range(num_runs):
         try:
             router = create_router_with_subset_tools(
-                num_tools, model, embed_model, top_k
+                num_tools, model, embed_model, top_k, client=client, master=master
             )
         except Exception as e:
             error_msg = str(e)
@@ -252,8 +264,10 @@ def print_analysis(all_results: Dict[str, List[Dict[str, float]]]):
 
 def main():
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not api_key and needs_api_key():
         raise RuntimeError("Set OPENAI_API_KEY in your environment.")
+    # Shared across routers so a CASSETTE recording covers the whole sweep
+    client = build_client(api_key)
 
     embed_model = os.getenv("EMBED_MODEL", "text-embedding-3-small")
     top_k = int(os.getenv("TOP_K", "4"))
@@ -278,109 +292,79 @@ def main():
 
     # Test with different numbers of tools
     tool_counts = [5, 10, 15, 20, 25, 30]
+    tool_counts = [n for n in tool_counts if n <= len(TOOLS)]
+    sweep_workers = int(os.getenv("SWEEP_WORKERS", "4"))
 
-    all_results = {}
+    # Embed the full catalog once; every (model, tool count) router is a view over it
+    master = RetailRouter(
+        model=models[0], embed_model=embed_model, top_k=top_k, tools=TOOLS, client=client
+    )
 
-    # Calculate total iterations for progress tracking
-    # We need to count actual testable cases per tool count
-    total_iterations = 0
+    testable = {}
     for num_tools in tool_counts:
-        if num_tools <= len(TOOLS):
-            available_tool_names = {t.name for t in TOOLS[:num_tools]}
-            filtered_goldens = [
-                g for g in goldens if g["expected_tool"] in available_tool_names
-            ]
-            total_iterations += len(models) * num_runs * len(filtered_goldens)
-
-    # Outer progress bar for overall progress
+        available_tool_names = {t.name for t in TOOLS[:num_tools]}
+        testable[num_tools] = len(
+            [g for g in goldens if g["expected_tool"] in available_tool_names]
+        )
+    total_iterations = len(models) * num_runs * sum(testable.values())
+
+    all_results = {}
+    run_accuracies = {}  # (model, num_tools) -> per-run accuracies
+    failed_models = set()
+
     overall_pbar = tqdm(
         total=total_iterations, desc="Overall progress", position=0, leave=True
     )
 
-    try:
-        for model_idx, model in enumerate(models):
-            print(f"\n{'=' * 60}")
-            print(f"Testing model: {model} ({model_idx + 1}/{len(models)})")
-            print(f"{'=' * 60}\n")
-
-            results = []
-            model_failed = False
-
-            try:
-                for num_tools in tool_counts:
-                    if num_tools > len(TOOLS):
-                        print(
-                            f"Skipping {num_tools} tools (only {len(TOOLS)} available)"
-                        )
-                        continue
-
-                    # Filter goldens for this tool count
-                    available_tool_names = {t.name for t in TOOLS[:num_tools]}
-                    filtered_goldens = [
-                        g for g in goldens if g["expected_tool"] in available_tool_names
-                    ]
-
-                    # Create progress bar for this tool count
-                    tool_pbar = tqdm(
-                        total=num_runs * len(filtered_goldens),
-                        desc=f"  {num_tools} tools",
-                        position=1,
-                        leave=False,
-                    )
+    def record_cell(model: str, num_tools: int):
+        accs = run_accuracies[(model, num_tools)]
+        if len(accs) < num_runs:
+            return
+        metrics = {
+            "num_tools": num_tools,
+            "tool_accuracy": float(np.mean(accs)),
+            "num_testable": testable[num_tools],
+        }
+        results = all_results.setdefault(model, [])
+        results.append(metrics)
+        results.sort(key=lambda m: m["num_tools"])
+        tqdm.write(
+            f"  {model} @ {num_tools} tools: Tool Accuracy {metrics['tool_accuracy']:.3f} "
+            f"({metrics['tool_accuracy'] * 100:.1f}%), testable cases {metrics['num_testable']}"
+        )
+        # Save incrementally after each completed cell
+        save_partial_results(all_results)
 
-                    try:
-                        metrics = evaluate_with_tool_count(
-                            num_tools,
-                            goldens,
-                            model,
-                            embed_model,
-                            top_k,
-                            num_runs,
-                            tool_pbar=tool_pbar,
-                            overall_pbar=overall_pbar,
-                        )
-                    except Exception as e:
-                        tool_pbar.close()
-                        error_msg = str(e)
-                        if (
-                            "model" in error_msg.lower()
-                            or "not found" in error_msg.lower()
-                            or "invalid" in error_msg.lower()
-                        ):
-                            print(
-                                f"\n  ERROR: Model '{model}' appears to be invalid or unavailable."
-                            )
-                            print(f"  Error details: {error_msg}")
-                            print("  Skipping remaining tests for this model.")
-                            model_failed = True
-                            break
-                        else:
-                            print(f"\n  ERROR on {num_tools} tools: {error_msg}")
-                            print("  Continuing with next tool count...")
-                            # Add a failed entry
-                            metrics = {
-                                "num_tools": num_tools,
-                                "tool_accuracy": 0.0,
-                                "num_testable": len(filtered_goldens),
-                            }
-
-                    tool_pbar.close()
-
-                    results.append(metrics)
-                    print(
-                        f"  Tool Accuracy: {metrics['tool_accuracy']:.3f} ({metrics['tool_accuracy'] * 100:.1f}%)"
+    # Run the whole (model, tool count, run) grid concurrently; RATE_LIMIT_RPS on the
+    # shared client keeps the combined request rate under the account limit
+    pool = ThreadPoolExecutor(max_workers=sweep_workers)
+    try:
+        futures = {}
+        for model in models:
+            all_results.setdefault(model, [])
+            for num_tools in tool_counts:
+                run_accuracies[(model, num_tools)] = []
+                for run in range(num_runs):
+                    fut = pool.submit(
+                        evaluate_with_tool_count,
+                        num_tools,
+                        goldens,
+                        model,
+                        embed_model,
+                        top_k,
+                        1,
+                        overall_pbar=overall_pbar,
+                        client=client,
+                        master=master,
                     )
-                    print(f"  Testable cases: {metrics['num_testable']}")
-
-                    # Save incrementally after each tool count
-                    all_results[model] = results
-                    save_partial_results(all_results)
-
-                    if model_failed:
-                        break
+                    futures[fut] = (model, num_tools)
 
-            except KeyboardInterrupt:
-                raise  # Re-raise to be caught by outer handler
+        for fut in as_completed(futures):
+            model, num_tools = futures[fut]
+            if model in failed_models:
+                continue
+            try:
+                metrics = fut.result()
             except Exception as e:
                 error_msg = str(e)
                 if (
@@ -388,16 +372,22 @@ def main():
                     or "not found" in error_msg.lower()
                     or "invalid" in error_msg.lower()
                 ):
-                    print(
+                    tqdm.write(
                         f"\n  ERROR: Model '{model}' appears to be invalid or unavailable."
                     )
-                    print(f"  Error details: {error_msg}")
-                    print("  Skipping this model and continuing with others.")
-                    all_results[model] = []  # Mark as failed
+                    tqdm.write(f"  Error details: {error_msg}")
+                    tqdm.write("  Skipping remaining tests for this model.")
+                    failed_models.add(model)
+                    for other, (m, _) in futures.items():
+                        if m == model:
+                            other.cancel()
                     continue
-                else:
-                    raise  # Re-raise other errors
+                tqdm.write(f"\n  ERROR on {model} @ {num_tools} tools: {error_msg}")
+                metrics = {"tool_accuracy": 0.0}
+            run_accuracies[(model, num_tools)].append(metrics["tool_accuracy"])
+            record_cell(model, num_tools)
 
+        pool.shutdown()
         overall_pbar.close()
 
         # Final save and visualization
@@ -409,6 +399,7 @@ def main():
         print_analysis(all_results)
 
     except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
         overall_pbar.close()
         print("\n\n" + "=" * 60)
         print("INTERRUPTED! Saving partial results...")
@@ -421,6 +412,7 @@ def main():
         )
         sys.exit(0)
     except Exception as e:
+        pool.shutdown(wait=False, cancel_futures=True)
         overall_pbar.close()
         print(f"\n\nError occurred: {e}")
         print("Saving partial results...")
@@ -428,6 +420,5 @@ def main():
         generate_chart(all_results)
         raise
 
-
 if __name__ == "__main__":
     main()
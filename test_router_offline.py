@@ -0,0 +1,496 @@
+"""Offline tests for the retail router, run against the deterministic fake OpenAI client."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from retail_router.batching import EmbeddingBatcher
+from retail_router.cassette import Cassette, CassetteClient, CassetteMiss, request_key
+from retail_router.fake_openai import FakeOpenAI, LatencyModel, hashed_embedding, serve_http
+from retail_router.prefork import PreforkServer
+from retail_router.ratelimit import RateLimiter
+from retail_router.router import RetailRouter
+from retail_router.server import RouterServer
+from retail_router.synth_catalog import expand_catalog
+from retail_router.synth_goldens import generate
+from retail_router.tools import TOOLS, Tool
+from retrieval_eval import cosine_scores, embed_texts, expected_ranks, recall_curve
+
+
+def test_fake_embeddings_are_deterministic():
+    """The same text always embeds to the same unit vector, across clients."""
+    a = FakeOpenAI().embeddings.create(model="m", input=["check inventory"]).data[0].embedding
+    b = FakeOpenAI().embeddings.create(model="m", input="check inventory").data[0].embedding
+    assert a == b
+    assert abs(np.linalg.norm(hashed_embedding("check inventory")) - 1.0) < 1e-5
+    short = FakeOpenAI().embeddings.create(model="m", input="x y", dimensions=256).data[0].embedding
+    assert len(short) == 256
+
+
+def test_latency_model_parse():
+    """Latency specs parse into distributions that never go negative."""
+    assert LatencyModel.parse("fixed:20").sample() == 0.02
+    lat = LatencyModel.parse("normal:1:5", seed=3)
+    assert all(lat.sample() >= 0.0 for _ in range(50))
+
+
+def test_router_runs_offline():
+    """RetailRouter selects, executes and synthesizes with no network."""
+    fake = FakeOpenAI()
+    router = RetailRouter(client=fake)
+    r = router.decide_and_execute("Check inventory for SKU MOUSE-WL at store 300.")
+    assert r["ok"]
+    assert r["tool_name"] == "InventoryLookup"
+    assert r["tool_args"]["sku"] == "MOUSE-WL"
+    assert "on-hand" in r["answer"]
+    assert fake.calls == {"embeddings": 2, "chat": 2}
+
+
+def test_scripted_tool_choice():
+    """A scripted reply overrides the heuristic tool choice."""
+    fake = FakeOpenAI(script=[
+        {"tool_calls": [{"name": "StoreHours", "arguments": {"store": "205"}}]},
+        {"content": "Open 9-9."},
+    ])
+    r = RetailRouter(client=fake).decide_and_execute("anything")
+    assert r["tool_name"] == "StoreHours"
+    assert r["answer"] == "Open 9-9."
+
+
+def test_http_fake_streams_server_sent_events():
+    """The HTTP fake answers "stream": true with SSE chunks ending in [DONE]."""
+    httpd = serve_http(FakeOpenAI(script=[{"content": "Open nine to nine."}]), port=0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        host, port = httpd.server_address
+        body = json.dumps({"model": "m", "messages": [{"role": "user", "content": "hours?"}], "stream": True,
+                           "stream_options": {"include_usage": True}}).encode()
+        resp = urllib.request.urlopen(f"http://{host}:{port}/v1/chat/completions", data=body, timeout=10)
+        assert resp.headers["Content-Type"] == "text/event-stream"
+        events = [line[len("data: "):] for line in resp.read().decode().splitlines() if line.startswith("data: ")]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(e) for e in events[:-1]]
+    assert all(c["object"] == "chat.completion.chunk" for c in chunks)
+    assert "".join(c["choices"][0]["delta"]["content"] or "" for c in chunks if c["choices"]) == "Open nine to nine."
+    assert chunks[-1]["usage"]["completion_tokens"] > 0
+
+
+def test_cassette_record_then_replay(tmp_path):
+    """A recorded run replays identically with no live client."""
+    path = str(tmp_path / "cassette.jsonl")
+    query = "What are the hours for store 205?"
+    live = RetailRouter(client=CassetteClient(Cassette(path, "record"), FakeOpenAI()))
+    recorded = live.decide_and_execute(query)
+    recorded.pop("timings")
+
+    replay = RetailRouter(client=CassetteClient(Cassette(path, "replay")))
+    replayed = replay.decide_and_execute(query)
+    replayed.pop("timings")
+    assert replayed == recorded
+    with pytest.raises(CassetteMiss):
+        replay.decide_and_execute("an unseen query")
+
+    # Re-recording starts a fresh cassette rather than appending to the old one
+    rerecord = Cassette(path, "record")
+    assert len(rerecord) == 0
+    RetailRouter(client=CassetteClient(rerecord, FakeOpenAI())).decide_and_execute(query)
+    assert len(Cassette(path, "replay")) == len(rerecord)
+
+
+def test_request_key_is_canonical():
+    """Key order and transport-only options do not change the cassette key."""
+    a = request_key("chat", {"model": "m", "messages": [{"role": "user", "content": "hi"}]})
+    b = request_key("chat", {"messages": [{"content": "hi", "role": "user"}], "model": "m", "timeout": 5})
+    assert a == b
+    assert a != request_key("embeddings", {"model": "m", "input": "hi"})
+
+
+def test_query_cache_and_timings():
+    """Repeated queries hit the embedding LRU and every stage is timed."""
+    fake = FakeOpenAI()
+    router = RetailRouter(client=fake, query_cache_size=2)
+    first = router.decide_and_execute("What are the hours for store 205?")
+    second = router.decide_and_execute("What are the hours for store 205?")
+    assert not first["embed_cache_hit"] and second["embed_cache_hit"]
+    assert router.stats == {"embed_cache_hits": 1, "embed_cache_misses": 1}
+    assert fake.calls["embeddings"] == 2
+    assert {"embed_ms", "rank_ms", "select_ms", "handler_ms", "synth_ms", "total_ms"} <= set(second["timings"])
+
+
+def test_subset_router_is_a_view():
+    """Subset routers share the master's embedding matrix and make no embedding calls."""
+    fake = FakeOpenAI()
+    master = RetailRouter(client=fake)
+    view = master.subset(10, model="other-model")
+    assert fake.calls["embeddings"] == 1
+    assert np.shares_memory(view._matrix, master._matrix)
+    assert [t.name for t in view._tools] == [t.name for t in master._tools[:10]]
+    assert view.model == "other-model" and master.model == "gpt-4o-mini"
+    r = view.decide_and_execute("Check inventory for SKU MOUSE-WL at store 300.")
+    assert r["tool_name"] == "InventoryLookup"
+
+
+def test_rate_limiter_caps_throughput():
+    """A 200 rps bucket with burst 1 spaces 11 calls at least ~50ms apart in total, even split across processes."""
+    limiter = RateLimiter(200, burst=1)
+    t = time.perf_counter()
+    for _ in range(11):
+        limiter.acquire()
+    assert time.perf_counter() - t >= 0.045
+
+    shared = RateLimiter(200, burst=1, shared=True)
+    t = time.perf_counter()
+    pids = []
+    for _ in range(2):
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(10):
+                shared.acquire()
+            os._exit(0)
+        pids.append(pid)
+    assert all(os.waitpid(pid, 0)[1] == 0 for pid in pids)
+    # 20 calls from two workers draw on one bucket: ~95ms, not the ~45ms of a bucket each
+    assert time.perf_counter() - t >= 0.09
+
+
+def test_retrieval_eval_ranks_match_router():
+    """The vectorized sweep agrees with the router's own top-k for every prefix."""
+    fake = FakeOpenAI()
+    router = RetailRouter(client=fake, top_k=3)
+    queries = ["refund order 789-123", "store hours for store 205", "gift card balance"]
+    scores = cosine_scores(embed_texts(fake, "m", queries), router._matrix)
+    for n in (5, 30):
+        view = router.subset(n)
+        for qi, q in enumerate(queries):
+            top = [t.name for t in view._retrieve_tools(q)]
+            for name in top:
+                expected = np.array([[t.name for t in router._tools].index(name)])
+                rank = expected_ranks(scores[qi:qi + 1], expected, n)[0]
+                assert rank == top.index(name) + 1
+    assert list(recall_curve(np.array([1, 2, 2, 5]), 3)) == [0.25, 0.75, 0.75]
+
+
+def test_synthetic_goldens_match_golden_format():
+    """Generated rows are deterministic, labeled with real tools and answerable by them."""
+    rows = generate(200, unique=50, tool_zipf=1.1, query_zipf=1.0, seed=7)
+    assert rows == generate(200, unique=50, tool_zipf=1.1, query_zipf=1.0, seed=7)
+    assert len({r["qid"] for r in rows}) == 200
+    assert len({r["query"] for r in rows}) <= 50
+    by_name = {t.name: t for t in TOOLS}
+    for r in rows:
+        assert set(r) == {"qid", "query", "expected_tool", "expected_args", "must_contain"}
+        tool = by_name[r["expected_tool"]]
+        assert set(tool.schema.get("required", [])) <= set(r["expected_args"])
+        content = tool.handler(r["expected_args"])["content"]
+        assert all(word in content for word in r["must_contain"])
+
+
+def test_expanded_catalog_is_valid_and_routable():
+    """Synthetic catalogs keep TOOLS first, have unique names and executable handlers."""
+    catalog = expand_catalog(1000, seed=1)
+    assert len(catalog) == 1000 and len({t.name for t in catalog}) == 1000
+    assert [t.name for t in catalog[:len(TOOLS)]] == [t.name for t in TOOLS]
+    for tool in catalog[len(TOOLS)::97]:
+        args = {p: "X" for p in tool.schema["required"]}
+        assert tool.handler(args)["ok"]
+    r = RetailRouter(tools=catalog[:200], client=FakeOpenAI()).decide_and_execute("What are the hours for store 205?")
+    assert r["ok"]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_embedding_store_is_mapped_and_reused(tmp_path, dtype):
+    """A router writes the store once; later routers memory-map it and rank the same tools."""
+    path = str(tmp_path / "tools.emb")
+    fake = FakeOpenAI()
+    first = RetailRouter(client=fake, embedding_store=path, store_dtype=dtype)
+    embeds = fake.calls["embeddings"]
+    second = RetailRouter(client=fake, embedding_store=path)
+    assert fake.calls["embeddings"] == embeds
+    assert isinstance(second._matrix, np.memmap) and second._matrix.dtype == np.dtype(dtype)
+    plain = RetailRouter(client=FakeOpenAI())
+    q = hashed_embedding("Check inventory for SKU MOUSE-WL at store 300.")
+    assert [t.name for t in second._rank_tools(q)] == [t.name for t in plain._rank_tools(q)]
+    assert [t.name for t in second.subset(10)._rank_tools(q)] == [t.name for t in plain.subset(10)._rank_tools(q)]
+    # Asking for a different dtype rebuilds the store rather than reusing it
+    other = "float16" if dtype != "float16" else "int8"
+    assert RetailRouter(client=fake, embedding_store=path, store_dtype=other)._matrix.dtype == np.dtype(other)
+    assert fake.calls["embeddings"] > embeds
+    assert os.listdir(tmp_path) == ["tools.emb"]
+    embeds = fake.calls["embeddings"]
+    # A changed catalog invalidates the store instead of silently mismatching rows
+    RetailRouter(client=fake, tools=TOOLS[:5], embedding_store=path)
+    assert fake.calls["embeddings"] > embeds
+
+
+def test_reduced_dimension_routers(tmp_path):
+    """Projected and endpoint-truncated routers score at reduced width and still route."""
+    query = "Check inventory for SKU MOUSE-WL at store 300."
+    for kwargs, width in (({"projection": "pca:16"}, 16), ({"projection": "random:128"}, 128), ({"dimensions": 256}, 256)):
+        router = RetailRouter(client=FakeOpenAI(), query_cache_size=8, **kwargs)
+        assert router._matrix.shape == (len(TOOLS), width)
+        assert router.decide_and_execute(query)["ok"]
+        assert router._query_cache[query].shape == (width,)
+        assert router.subset(10)._matrix.shape == (10, width)
+    # A store holds vectors of one endpoint width; a router asking for another rebuilds it
+    path = str(tmp_path / "tools.emb")
+    RetailRouter(client=FakeOpenAI(), embedding_store=path, dimensions=64)
+    for dimensions in (None, 64):
+        router = RetailRouter(client=FakeOpenAI(), embedding_store=path, dimensions=dimensions)
+        assert router.decide_and_execute(query)["ok"]
+    fake = FakeOpenAI()
+    assert RetailRouter(client=fake, embedding_store=path, dimensions=64, projection="pca:16")._matrix.shape[1] == 16
+    assert fake.calls["embeddings"] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork server is POSIX only")
+def test_prefork_server_routes_and_recycles():
+    """Forked workers answer on the shared socket, fail like RouterServer and are replaced after max_requests."""
+    router = RetailRouter(client=FakeOpenAI())
+    route = router.decide_and_execute
+
+    def decide_and_execute(query, deadline_ms=None):
+        if query == "boom":
+            raise RuntimeError("boom")
+        return route(query, deadline_ms)
+
+    router.decide_and_execute = decide_and_execute
+    server = PreforkServer(router, workers=2, port=0, max_requests=2, client_factory=FakeOpenAI)
+    server.start()
+    stop = threading.Event()
+
+    def supervise():
+        # serve_forever's loop, minus the signal handlers that only work on the main thread
+        while not stop.is_set():
+            server.poll()
+            time.sleep(0.02)
+
+    supervisor = threading.Thread(target=supervise)
+    supervisor.start()
+    try:
+        host, port = server.address
+        pids = set()
+        for _ in range(8):
+            body = json.dumps({"query": "Check inventory for SKU SW-1 at store 0001"}).encode()
+            out = json.loads(urllib.request.urlopen(f"http://{host}:{port}/route", data=body, timeout=10).read())
+            assert out["ok"] and out["tool_name"]
+            pids.add(json.loads(urllib.request.urlopen(f"http://{host}:{port}/healthz", timeout=10).read())["pid"])
+        assert os.getpid() not in pids
+        for body, code, error in [({"query": "boom"}, 500, "Router failed: boom"),
+                                  ({"query": "store hours", "deadline_ms": "soon"}, 400, "'query' string")]:
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(f"http://{host}:{port}/route", data=json.dumps(body).encode(), timeout=10)
+            assert e.value.code == code and error in json.loads(e.value.read())["error"]
+        deadline = time.time() + 10
+        while server.stats["recycled"] < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        assert server.stats["recycled"] >= 2 and server.stats["crashed"] == 0
+    finally:
+        stop.set()
+        supervisor.join()
+        server.stop()
+    assert not server.workers
+
+
+async def _send_raw(host, port, request):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(request)
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), payload.decode()
+
+
+async def _http(host, port, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    method = "POST" if body is not None else "GET"
+    return await _send_raw(host, port, f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+
+
+def test_server_coalesces_duplicates_and_sheds_load():
+    """Identical concurrent queries share one execution; overflow beyond the queue gets 503."""
+    async def scenario():
+        fake = FakeOpenAI(chat_latency=LatencyModel.parse("fixed:50"))
+        server = RouterServer(RetailRouter(client=fake), concurrency=2, queue=1, queue_timeout=5)
+        host, port = await server.start(port=0)
+        try:
+            body = {"query": "Check inventory for SKU SW-1 at store 0001"}
+            embeds = fake.calls["embeddings"]
+            dupes = await asyncio.gather(*[_http(host, port, "/route", body) for _ in range(8)])
+            assert [code for code, _ in dupes] == [200] * 8
+            assert len({payload for _, payload in dupes}) == 1
+            assert server.stats["coalesced"] == 7 and fake.calls["embeddings"] == embeds + 1
+
+            distinct = await asyncio.gather(*[_http(host, port, "/route", {"query": f"price SKU SW-{i}"}) for i in range(6)])
+            assert sorted(code for code, _ in distinct) == [200, 200, 200, 503, 503, 503]
+
+            streams = await asyncio.gather(*[_http(host, port, "/route/stream", body) for _ in range(3)])
+            for code, payload in streams:
+                events = [json.loads(line[6:]) for line in payload.splitlines() if line.startswith("data: ")]
+                assert events[0]["event"] == "tool" and events[-1]["event"] == "done" and events[-1]["ok"]
+                assert "".join(e["content"] for e in events if e["event"] == "delta").strip() == events[-1]["answer"]
+            assert (await _http(host, port, "/healthz"))[0] == 200
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_server_answers_router_failures_and_bad_requests():
+    """A router exception becomes a 500 and unparseable requests get 400, never a dropped connection."""
+    async def scenario():
+        router = RetailRouter(client=FakeOpenAI())
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        router.decide_and_execute = router.decide_and_execute_stream = fail
+        server = RouterServer(router)
+        host, port = await server.start(port=0)
+        try:
+            code, payload = await _http(host, port, "/route", {"query": "store hours"})
+            assert code == 500 and "boom" in json.loads(payload)["error"]
+            # A stream has already started when the router runs, so it ends with a failed "done" event
+            code, payload = await _http(host, port, "/route/stream", {"query": "store hours"})
+            assert code == 200 and "boom" in json.loads(payload.splitlines()[-2][6:])["error"]
+            assert server.stats["errors"] == 2
+            assert (await _send_raw(host, port, b"GARBAGE\r\n\r\n"))[0] == 400
+            bad_length = b"POST /route HTTP/1.1\r\nContent-Length: many\r\n\r\n"
+            assert (await _send_raw(host, port, bad_length))[0] == 400
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_embedding_batcher_coalesces_concurrent_queries():
+    """Queries submitted within one window go out as one call and fan back out in order."""
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        if "boom" in texts:
+            raise RuntimeError("boom")
+        return [[float(len(t))] for t in texts if t != "dropped"]
+
+    batcher = EmbeddingBatcher(embed, window_ms=50, max_batch=16)
+    futures = [batcher.submit(t) for t in ["a", "bb", "a", "ccc"]]
+    assert [f.result(5) for f in futures] == [[1.0], [2.0], [1.0], [3.0]]
+    assert calls == [["a", "bb", "ccc"]]
+    with pytest.raises(RuntimeError):
+        batcher.embed("boom", timeout=5)
+    # A short response fails every waiter in the batch instead of leaving some unresolved
+    futures = [batcher.submit(t) for t in ["dropped", "kept"]]
+    for f in futures:
+        with pytest.raises(ValueError):
+            f.result(5)
+
+    fake = FakeOpenAI()
+    router = RetailRouter(client=fake, embed_batch_window_ms=20)
+    before = fake.calls["embeddings"]
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(router.decide_and_execute, [f"Check inventory for SKU SW-{i} at store 1" for i in range(8)]))
+    assert all(r["ok"] for r in results)
+    assert fake.calls["embeddings"] - before < 8
+
+
+def test_deadline_budget_degrades_gracefully():
+    """Short budgets skip synthesis, then selection, and say so in the response."""
+    fake = FakeOpenAI(chat_latency=LatencyModel.parse("fixed:100"))
+    router = RetailRouter(client=fake, min_select_ms=150, min_synth_ms=150)
+    query = "Check inventory for SKU SW-1 at store 0001"
+    assert router.decide_and_execute(query, deadline_ms=5000)["fallback"] == []
+
+    r = router.decide_and_execute(query, deadline_ms=200)
+    assert r["ok"] and r["fallback"] == ["skip_synthesis"]
+    assert r["answer"] == r["tool_result"]["content"]
+
+    chats = fake.calls["chat"]
+    r = router.decide_and_execute(query, deadline_ms=100)
+    assert r["ok"] and r["fallback"] == ["top1_retrieval", "skip_synthesis"]
+    assert r["tool_name"] == "InventoryLookup" and r["tool_args"]["sku"] == "SW-1"
+    assert fake.calls["chat"] == chats
+
+    # A call that overruns the remaining budget times out and degrades instead of failing
+    router.min_select_ms = router.min_synth_ms = 0
+    r = router.decide_and_execute(query, deadline_ms=150)
+    assert r["ok"] and r["fallback"] == ["skip_synthesis"] and r["timings"]["total_ms"] < 400
+
+    # An embedding that overruns the budget leaves nothing to route, but still returns a result
+    for batch_window in (0, 5):
+        slow = RetailRouter(client=FakeOpenAI(embed_latency=LatencyModel.parse("fixed:400")), embed_batch_window_ms=batch_window)
+        r = slow.decide_and_execute(query, deadline_ms=100)
+        assert not r["ok"] and r["fallback"] == ["embed_timeout"] and "timed out" in r["error"]
+        assert r["timings"]["embed_ms"] < 400
+
+
+def test_prompts_have_stable_cacheable_prefix():
+    """Candidates go out in catalog order as memoized dicts; whole-catalog mode shares one cached prefix across queries."""
+    requests = []
+    fake = FakeOpenAI()
+    original = fake._complete
+    fake._complete = lambda model, messages, **kw: requests.append((kw.get("tools"), messages)) or original(model, messages, **kw)
+    router = RetailRouter(client=fake)
+    router.decide_and_execute("What are the store hours for store 205?")
+    router.decide_and_execute("What are the store hours for store 310?")
+    (tools_a, select_a), (tools_b, select_b) = requests[0], requests[2]
+    assert len(tools_a) == router.top_k and json.dumps(tools_a) == json.dumps(tools_b)
+    names = [t["function"]["name"] for t in tools_a]
+    assert names == sorted(names, key=router._tool_index.get)
+    assert [m["role"] for m in select_a] == ["system", "user"] and select_a[0] == select_b[0]
+
+    requests.clear()
+    whole = RetailRouter(client=fake, max_static_tools=128)
+    first = whole.decide_and_execute("Check inventory for SKU MOUSE-WL at store 300.")
+    second = whole.decide_and_execute("What are the store hours for store 205?")
+    (tools_a, select_a), (tools_b, select_b) = requests[0], requests[2]
+    assert len(tools_a) == len(TOOLS) and tools_a is tools_b
+    assert select_a[1]["content"].startswith("Candidate tools") and select_a[1] != select_b[1]
+    assert first["tool_name"] == "InventoryLookup" and second["tool_name"] == "StoreHours"
+    assert first["usage"]["cached_tokens"] == 0 and second["usage"]["cached_tokens"] >= 1024
+
+
+def test_router_repairs_invalid_arguments():
+    """A call that fails its tool's schema goes back to the model with the errors; the handler never sees it."""
+    calls = []
+
+    def handler(args):
+        calls.append(args)
+        return {"ok": True, "content": f"{args['sku']} in {args['region']}"}
+    tool = Tool("RegionalStock", "Stock for a SKU in one region",
+                {"type": "object", "properties": {"sku": {"type": "string"}, "region": {"type": "string", "enum": ["West"]}},
+                 "required": ["sku", "region"]}, handler)
+
+    bad, good = {"sku": "A1", "region": "Mars"}, {"sku": "A1", "region": "West"}
+    script = [{"tool_calls": [{"name": "RegionalStock", "arguments": bad}, {"name": "StoreHours", "arguments": {"store": "1"}}]},
+              {"tool_calls": [{"name": "RegionalStock", "arguments": good}]},
+              {"content": "In stock."}]
+    requests, replies = [], iter(script)
+
+    def record(req):
+        requests.append(req["messages"])
+        return next(replies)
+    r = RetailRouter(client=FakeOpenAI(script=record), tools=TOOLS + [tool]).decide_and_execute("stock of A1 out west")
+    assert r["ok"] and r["tool_args"] == good and r["invalid_args"] == 1 and calls == [good]
+    assert "validate_ms" in r["timings"]
+    # Each assistant turn echoes only the call that gets a tool message back
+    for messages in requests[1:]:
+        call_ids = [tc["id"] for m in messages if m["role"] == "assistant" for tc in m["tool_calls"]]
+        assert len(call_ids) == 1 and [m["tool_call_id"] for m in messages if m["role"] == "tool"] == call_ids
+    # A call with no arguments string at all is repaired like malformed JSON
+    missing = [{"tool_calls": [{"name": "RegionalStock", "arguments": None}]}] + script[1:]
+    r = RetailRouter(client=FakeOpenAI(script=missing), tools=TOOLS + [tool]).decide_and_execute("stock of A1 out west")
+    assert r["ok"] and r["tool_args"] == good and r["invalid_args"] == 1 and calls == [good, good]
+    strict = RetailRouter(client=FakeOpenAI(script=list(script)), tools=TOOLS + [tool], max_arg_repairs=0)
+    r = strict.decide_and_execute("stock of A1 out west")
+    assert not r["ok"] and "'region' must be one of ['West']" in r["error"] and calls == [good, good]
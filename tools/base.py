@@ -1,9 +1,15 @@
 """Base tool class and tool registry for the ReACT agent."""
 
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
 
+from utils.validation import Validator, compile_validator
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
 
 class ToolParameter(BaseModel):
     """Schema for tool parameters."""
@@ -56,20 +62,45 @@ class BaseTool(ABC):
         }
 
 
+if TYPE_CHECKING:
+    from tools.executor import ToolExecutor
+    from tools.retrieval import ToolRetriever
+
+
 class ToolRegistry:
     """Registry for managing available tools."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        retriever: Optional["ToolRetriever"] = None,
+        executor: Optional["ToolExecutor"] = None,
+    ):
         self._tools: Dict[str, BaseTool] = {}
+        # Argument validators compiled from each tool's schema when it is registered
+        self._validators: Dict[str, Validator] = {}
+        # Bumped on every registration so callers can cache anything derived from the tools
+        self.version = 0
+        self._retriever = retriever
+        self._retriever_version = -1
+        self._retriever_lock = threading.Lock()
+        self._executor = executor
+        self._executor_lock = threading.Lock()
 
     def register(self, tool: BaseTool) -> None:
         """Register a tool."""
         self._tools[tool.name] = tool
+        self._validators[tool.name] = compile_validator(tool.get_schema()["parameters"])
+        self.version += 1
 
     def get_tool(self, name: str) -> Optional[BaseTool]:
         """Get a tool by name."""
         return self._tools.get(name)
 
+    def validate(self, name: str, args: Any) -> List[str]:
+        """Schema errors in `args` for tool `name`; empty if valid or unknown."""
+        validator = self._validators.get(name)
+        return validator(args) if validator is not None else []
+
     def list_tools(self) -> List[BaseTool]:
         """List all registered tools."""
         return list(self._tools.values())
@@ -78,3 +109,107 @@ class ToolRegistry:
         """Get schemas for all tools."""
         return [tool.get_schema() for tool in self._tools.values()]
 
+    def set_retriever(self, retriever: "ToolRetriever") -> None:
+        """Use `retriever` (see tools.retrieval) for search()."""
+        with self._retriever_lock:
+            self._retriever = retriever
+            self._retriever_version = -1
+
+    def search(self, query: str, k: int) -> List[BaseTool]:
+        """The k registered tools most relevant to `query`, best first.
+
+        Uses a LexicalRetriever unless another retriever was set; it is
+        refitted only after new tools are registered.
+        """
+        with self._retriever_lock:
+            if self._retriever is None:
+                from tools.retrieval import LexicalRetriever
+
+                self._retriever = LexicalRetriever()
+            if self._retriever_version != self.version:
+                self._retriever.fit(self.list_tools())
+                self._retriever_version = self.version
+            retriever = self._retriever
+        return [self._tools[name] for name in retriever.rank(query, k)]
+
+    @property
+    def executor(self) -> "ToolExecutor":
+        """The ToolExecutor that runs calls, a default one unless set."""
+        with self._executor_lock:
+            if self._executor is None:
+                from tools.executor import ToolExecutor
+
+                self._executor = ToolExecutor()
+            return self._executor
+
+    @executor.setter
+    def executor(self, executor: "ToolExecutor") -> None:
+        with self._executor_lock:
+            self._executor = executor
+
+    def _check(
+        self, name: str, args: Any, stats: Optional[Dict[str, Any]]
+    ) -> Optional[ToolResult]:
+        """An error result for an unknown tool or invalid arguments, else None."""
+        if name not in self._tools:
+            return ToolResult(
+                success=False, result=None, error=f"Tool '{name}' not found"
+            )
+        errors = self.validate(name, args)
+        if not errors:
+            return None
+        if stats is not None:
+            stats["invalid_args"] += 1
+        log.info("tool.invalid_args", tool=name, errors=errors)
+        return ToolResult(
+            success=False,
+            result=None,
+            error=f"Invalid arguments for '{name}': " + "; ".join(errors),
+        )
+
+    def _split(
+        self, calls: List[Tuple[str, Dict[str, Any]]], stats: Optional[Dict[str, Any]]
+    ) -> Tuple[List[Optional[ToolResult]], List[int]]:
+        # Rejected calls are answered now; the indices of the rest go to the executor
+        results = [self._check(name, args, stats) for name, args in calls]
+        return results, [n for n, result in enumerate(results) if result is None]
+
+    def execute_many(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> List[ToolResult]:
+        """Run (tool name, arguments) calls concurrently; results are in call order.
+
+        Unknown tools and arguments that fail the tool's schema are answered
+        without running anything. The rest go to the executor, which applies
+        timeouts and per-tool concurrency limits. If `stats` is given, its
+        "invalid_args" and "tool_timeouts" counters are incremented.
+        """
+        results, pending = self._split(calls, stats)
+        if pending:
+            ran = self.executor.run(
+                [(self._tools[calls[n][0]], calls[n][1]) for n in pending], stats
+            )
+            for n, result in zip(pending, ran):
+                results[n] = result
+        return results
+
+    async def aexecute_many(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> List[ToolResult]:
+        """Async version of execute_many()."""
+        results, pending = self._split(calls, stats)
+        if pending:
+            ran = await self.executor.arun(
+                [(self._tools[calls[n][0]], calls[n][1]) for n in pending], stats
+            )
+            for n, result in zip(pending, ran):
+                results[n] = result
+        return results
+
+    def execute(self, name: str, args: Dict[str, Any]) -> ToolResult:
+        """Validate and run one call on the executor, within its timeout."""
+        return self.execute_many([(name, args)])[0]
@@ -0,0 +1,336 @@
+"""Tool execution engine: worker pool, timeouts, per-tool limits and counters."""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    CancelledError,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from utils.log import get_logger
+
+if TYPE_CHECKING:
+    from tools.base import BaseTool, ToolResult
+
+log = get_logger(__name__)
+
+POOL_KINDS = ("thread", "process")
+
+
+def _call(tool: "BaseTool", kwargs: Dict[str, Any]) -> Tuple["ToolResult", float]:
+    """Run one tool call on a worker; returns the result and its run time in ms."""
+    from tools.base import ToolResult
+
+    start = time.perf_counter()
+    try:
+        result = tool.execute(**kwargs)
+    except Exception as e:
+        result = ToolResult(success=False, result=None, error=str(e))
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+class _Queued(NamedTuple):
+    """A submitted call waiting for a worker (and for its tool's limit)."""
+
+    sequence: int
+    future: Future
+    # Resolves to the time.monotonic() the call started at, or None if it never did
+    started: Future
+    timeout: Optional[float]
+    # A call still queued at this time.monotonic() is cancelled instead of started
+    expires: Optional[float]
+    tool: "BaseTool"
+    kwargs: Dict[str, Any]
+
+
+def new_tool_stats() -> Dict[str, Any]:
+    """Fresh per-tool counters."""
+    return {
+        "calls": 0,
+        "errors": 0,
+        "timeouts": 0,
+        "cancelled": 0,
+        "running": 0,
+        "queued": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+    }
+
+
+class ToolExecutor:
+    """Runs tool calls on a shared pool of `max_workers` threads or processes.
+
+    Calls are handed to the pool only when a worker is free, oldest first, so
+    a call starts running as soon as it leaves the queue. `set_limit` caps
+    how many calls of one tool run at once, to protect its backend: calls
+    beyond the cap wait in the queue without holding a worker. With
+    kind="process", tools and their arguments must be picklable.
+
+    Each call is bounded by a timeout (`timeout`, or a per-tool override from
+    `set_timeout`) measured from when it starts running, so time spent queued
+    behind other calls does not count against it. A call that is still
+    queued `timeout` seconds after submission is cancelled and reported as
+    timed out too. One already running cannot be interrupted, so it finishes
+    in the background and its result is discarded.
+
+    `stats()` reports per-tool calls, errors, timeouts, cancellations and run
+    time (measured on the worker, so queueing is excluded).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        timeout: Optional[float] = 30.0,
+        kind: str = "thread",
+        limits: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, Optional[float]]] = None,
+    ):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Unknown pool kind '{kind}', expected thread or process")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.kind = kind
+        self._limits: Dict[str, int] = dict(limits or {})
+        self._timeouts: Dict[str, Optional[float]] = dict(timeouts or {})
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        # Per-tool FIFO queues of calls not yet started, oldest first
+        self._waiting: Dict[str, Deque[_Queued]] = {}
+        self._sequence = itertools.count()
+        # Caller's future -> the pool's future, while the call is with the pool
+        self._work: Dict[Future, Future] = {}
+        # Calls with the pool, across all tools; never more than max_workers
+        self._active = 0
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def set_limit(self, name: str, max_concurrent: Optional[int]) -> None:
+        """Run at most `max_concurrent` calls of tool `name` at once (None = no cap)."""
+        with self._lock:
+            if max_concurrent is None:
+                self._limits.pop(name, None)
+            else:
+                self._limits[name] = max_concurrent
+        self._drain()
+
+    def set_timeout(self, name: str, seconds: Optional[float]) -> None:
+        """Bound calls of tool `name` by `seconds` instead of the default timeout."""
+        self._timeouts[name] = seconds
+
+    def timeout_for(self, name: str) -> Optional[float]:
+        return self._timeouts.get(name, self.timeout)
+
+    def _get_pool_locked(self) -> Executor:
+        # Called with self._lock held
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="tool"
+                )
+        return self._pool
+
+    def _tool_stats(self, name: str) -> Dict[str, Any]:
+        # Called with self._lock held
+        if name not in self._stats:
+            self._stats[name] = new_tool_stats()
+        return self._stats[name]
+
+    def submit(self, tool: "BaseTool", kwargs: Dict[str, Any]) -> Future:
+        """Schedule `tool.execute(**kwargs)`; the future resolves to a ToolResult."""
+        return self._submit(tool, kwargs).future
+
+    def _submit(self, tool: "BaseTool", kwargs: Dict[str, Any]) -> _Queued:
+        timeout = self.timeout_for(tool.name)
+        expires = None if timeout is None else time.monotonic() + timeout
+        entry = _Queued(
+            next(self._sequence), Future(), Future(), timeout, expires, tool, kwargs
+        )
+        with self._lock:
+            self._tool_stats(tool.name)["queued"] += 1
+            self._waiting.setdefault(tool.name, deque()).append(entry)
+        self._drain()
+        return entry
+
+    def _next_locked(self) -> Optional[_Queued]:
+        # Called with self._lock held: the oldest queued call that may start now
+        if self._active >= self.max_workers:
+            return None
+        oldest = None
+        for name, waiting in self._waiting.items():
+            limit = self._limits.get(name)
+            if not waiting or (
+                limit is not None and self._tool_stats(name)["running"] >= limit
+            ):
+                continue
+            if oldest is None or waiting[0].sequence < oldest[0].sequence:
+                oldest = waiting
+        return oldest.popleft() if oldest is not None else None
+
+    def _drain(self) -> None:
+        """Start queued calls, oldest first, while workers and tool limits allow."""
+        while True:
+            with self._lock:
+                entry = self._next_locked()
+                if entry is None:
+                    return
+                future, tool = entry.future, entry.tool
+                stats = self._tool_stats(tool.name)
+                stats["queued"] -= 1
+                if entry.expires is not None and time.monotonic() > entry.expires:
+                    future.cancel()
+                if not future.set_running_or_notify_cancel():
+                    stats["cancelled"] += 1
+                    entry.started.set_result(None)
+                    continue
+                stats["running"] += 1
+                self._active += 1
+                work = self._get_pool_locked().submit(_call, tool, entry.kwargs)
+                self._work[future] = work
+            entry.started.set_result(time.monotonic())
+            work.add_done_callback(
+                lambda work, future=future, name=tool.name: self._finish(
+                    name, future, work
+                )
+            )
+
+    def _finish(self, name: str, future: Future, work: Future) -> None:
+        from tools.base import ToolResult
+
+        try:
+            result, elapsed_ms = work.result()
+        except CancelledError:
+            result, elapsed_ms = None, 0.0
+        except Exception as e:
+            # The pool itself failed, e.g. an unpicklable tool or a dead worker process
+            result = ToolResult(success=False, result=None, error=str(e))
+            elapsed_ms = 0.0
+        with self._lock:
+            self._work.pop(future, None)
+            self._active -= 1
+            stats = self._tool_stats(name)
+            stats["running"] -= 1
+            if result is None:
+                stats["cancelled"] += 1
+            else:
+                stats["calls"] += 1
+                stats["errors"] += int(not result.success)
+                stats["total_ms"] += elapsed_ms
+                stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        future.set_result(
+            result or ToolResult(success=False, result=None, error="Cancelled")
+        )
+        self._drain()
+
+    def cancel(self, future: Future) -> bool:
+        """Cancel a call that has not started running; True if it was cancelled."""
+        if future.cancel():
+            return True
+        with self._lock:
+            work = self._work.get(future)
+        # Handed to the pool but not yet picked up by a worker
+        return work is not None and work.cancel()
+
+    def _timed_out(
+        self, name: str, future: Future, stats: Optional[Dict[str, Any]]
+    ) -> "ToolResult":
+        from tools.base import ToolResult
+
+        self.cancel(future)
+        timeout = self.timeout_for(name)
+        with self._lock:
+            self._tool_stats(name)["timeouts"] += 1
+        if stats is not None:
+            stats["tool_timeouts"] += 1
+        log.warning("tool.timeout", tool=name, timeout_s=timeout)
+        return ToolResult(
+            success=False,
+            result=None,
+            error=f"Tool '{name}' timed out after {timeout}s",
+        )
+
+    def run(
+        self,
+        calls: List[Tuple["BaseTool", Dict[str, Any]]],
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> List["ToolResult"]:
+        """Run calls concurrently and wait for each up to its timeout.
+
+        Results are in call order. Timeouts are also added to
+        `stats["tool_timeouts"]` when `stats` is given.
+        """
+        entries = [self._submit(tool, kwargs) for tool, kwargs in calls]
+        results = []
+        for entry in entries:
+            name, remaining = entry.tool.name, None
+            try:
+                if entry.expires is not None:
+                    began = entry.started.result(entry.expires - time.monotonic())
+                    if began is None:
+                        raise CancelledError
+                    remaining = began + entry.timeout - time.monotonic()
+                results.append(entry.future.result(timeout=remaining))
+            except (FutureTimeout, CancelledError):
+                results.append(self._timed_out(name, entry.future, stats))
+        return results
+
+    async def arun(
+        self,
+        calls: List[Tuple["BaseTool", Dict[str, Any]]],
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> List["ToolResult"]:
+        """Async version of run(); waits without blocking the event loop."""
+
+        async def one(tool: "BaseTool", kwargs: Dict[str, Any]) -> "ToolResult":
+            entry = self._submit(tool, kwargs)
+            remaining = None
+            try:
+                # Shielded: on timeout _timed_out cancels, not asyncio
+                if entry.expires is not None:
+                    began = await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(entry.started)),
+                        entry.expires - time.monotonic(),
+                    )
+                    if began is None:
+                        return self._timed_out(tool.name, entry.future, stats)
+                    remaining = began + entry.timeout - time.monotonic()
+                return await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(entry.future)), remaining
+                )
+            except asyncio.TimeoutError:
+                return self._timed_out(tool.name, entry.future, stats)
+
+        return list(await asyncio.gather(*(one(*call) for call in calls)))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool counters, with mean_ms, as a snapshot."""
+        with self._lock:
+            snapshot = {name: dict(stats) for name, stats in self._stats.items()}
+        for stats in snapshot.values():
+            calls = stats["calls"]
+            stats["mean_ms"] = stats["total_ms"] / calls if calls else 0.0
+        return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool; queued calls that never started are cancelled."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            waiting = [entry for queue in self._waiting.values() for entry in queue]
+            self._waiting = {}
+        for entry in waiting:
+            entry.started.set_result(None)
+            if entry.future.cancel():
+                with self._lock:
+                    stats = self._tool_stats(entry.tool.name)
+                    stats["queued"] -= 1
+                    stats["cancelled"] += 1
+        if pool is not None:
+            pool.shutdown(wait=wait)
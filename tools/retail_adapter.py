@@ -0,0 +1,67 @@
+"""Register retail router tools (retail_router.tools.Tool) as agent tools."""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from .base import BaseTool, ToolParameter, ToolRegistry, ToolResult
+
+
+class RetailTool(BaseTool):
+    """A retail_router Tool behind the BaseTool interface.
+
+    The retail tool's JSON schema is passed through unchanged, so enums and
+    other constraints reach both the model and the registry's validator.
+    The handler's {"ok": ..., "content": ...} response becomes a ToolResult.
+    """
+
+    def __init__(self, tool: Any):
+        self.tool = tool
+        super().__init__(name=tool.name, description=tool.description)
+
+    def _define_parameters(self) -> List[ToolParameter]:
+        schema = self.tool.schema or {}
+        required = set(schema.get("required", []))
+        return [
+            ToolParameter(
+                name=name,
+                type=spec.get("type", "string"),
+                description=spec.get("description", ""),
+                required=name in required,
+            )
+            for name, spec in schema.get("properties", {}).items()
+        ]
+
+    def get_schema(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "parameters": self.tool.schema,
+        }
+
+    def execute(self, **kwargs) -> ToolResult:
+        try:
+            response = self.tool.handler(kwargs)
+        except Exception as e:
+            return ToolResult(success=False, result=None, error=str(e))
+        if not isinstance(response, dict):
+            return ToolResult(success=True, result=response)
+        if response.get("ok", True):
+            return ToolResult(success=True, result=response.get("content", response))
+        return ToolResult(
+            success=False,
+            result=None,
+            error=response.get("error") or response.get("content") or "Tool failed",
+        )
+
+
+def register_retail_tools(
+    registry: ToolRegistry, tools: Optional[Sequence[Any]] = None
+) -> List[RetailTool]:
+    """Register retail tools (default: retail_router.tools.TOOLS) in `registry`."""
+    if tools is None:
+        from retail_router.tools import TOOLS
+
+        tools = TOOLS
+    adapted = [RetailTool(tool) for tool in tools]
+    for tool in adapted:
+        registry.register(tool)
+    return adapted
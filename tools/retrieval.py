@@ -0,0 +1,136 @@
+"""Tool retrieval for ToolRegistry.search: pick the tools relevant to a query."""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from retail_router.ranking import tokenize, top_k_indices
+from tools.base import BaseTool
+
+
+def tool_text(tool: BaseTool) -> str:
+    """The text a tool is indexed by, as RetailRouter embeds its catalog."""
+    return f"{tool.name}: {tool.description}"
+
+
+class ToolRetriever(ABC):
+    """Ranks a registry's tools against a query."""
+
+    @abstractmethod
+    def fit(self, tools: List[BaseTool]) -> None:
+        """Index the registered tools; called whenever the registry changes."""
+        pass
+
+    @abstractmethod
+    def rank(self, query: str, k: int) -> List[str]:
+        """Names of the best `k` tools for `query`, best first."""
+        pass
+
+
+class LexicalRetriever(ToolRetriever):
+    """BM25 over each tool's name and description; no API calls."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._names: List[str] = []
+        self._norm = np.zeros(0)
+        # token -> (idf, indices of the tools containing it, term frequencies)
+        self._postings: Dict[str, Tuple[float, np.ndarray, np.ndarray]] = {}
+
+    def fit(self, tools: List[BaseTool]) -> None:
+        self._names = [tool.name for tool in tools]
+        docs = [Counter(tokenize(tool_text(tool))) for tool in tools]
+        lengths = np.array([sum(doc.values()) for doc in docs], dtype=np.float64)
+        avg = float(lengths.mean()) if len(docs) else 1.0
+        self._norm = self.k1 * (1.0 - self.b + self.b * lengths / (avg or 1.0))
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for i, doc in enumerate(docs):
+            for token, tf in doc.items():
+                postings.setdefault(token, []).append((i, tf))
+        n = len(docs)
+        self._postings = {}
+        for token, hits in postings.items():
+            idf = math.log(1.0 + (n - len(hits) + 0.5) / (len(hits) + 0.5))
+            idx, tf = zip(*hits)
+            self._postings[token] = (idf, np.array(idx), np.array(tf, dtype=np.float64))
+
+    def rank(self, query: str, k: int) -> List[str]:
+        if not self._names:
+            return []
+        scores = np.zeros(len(self._names))
+        for token in set(tokenize(query)):
+            if token not in self._postings:
+                continue
+            idf, idx, tf = self._postings[token]
+            scores[idx] += idf * tf * (self.k1 + 1.0) / (tf + self._norm[idx])
+        return [self._names[i] for i in top_k_indices(scores, k)]
+
+
+class EmbeddingRetriever(ToolRetriever):
+    """Cosine similarity between query and tool embeddings, like RetailRouter.
+
+    Tool texts are embedded in batches and cached by text, so registering
+    more tools only embeds the new ones; recent query embeddings are kept in
+    a small LRU.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        model: str = "text-embedding-3-small",
+        batch_size: int = 2048,
+        query_cache_size: int = 256,
+    ):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.query_cache_size = query_cache_size
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._names: List[str] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._queries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _embed(self, texts: List[str]) -> List[np.ndarray]:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(
+                model=self.model, input=texts[i : i + self.batch_size]
+            )
+            vectors.extend(np.asarray(d.embedding, dtype=np.float32) for d in response.data)
+        return vectors
+
+    def fit(self, tools: List[BaseTool]) -> None:
+        texts = [tool_text(tool) for tool in tools]
+        missing = [t for t in dict.fromkeys(texts) if t not in self._vectors]
+        if missing:
+            self._vectors.update(zip(missing, self._embed(missing)))
+        self._names = [tool.name for tool in tools]
+        if texts:
+            matrix = np.stack([self._vectors[t] for t in texts])
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        with self._lock:
+            if query in self._queries:
+                self._queries.move_to_end(query)
+                return self._queries[query]
+        vector = self._embed([query])[0]
+        vector = vector / (float(np.linalg.norm(vector)) or 1.0)
+        with self._lock:
+            self._queries[query] = vector
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+        return vector
+
+    def rank(self, query: str, k: int) -> List[str]:
+        if not self._names:
+            return []
+        scores = self._matrix @ self._query_vector(query)
+        return [self._names[i] for i in top_k_indices(scores, k)]
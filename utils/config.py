@@ -18,6 +18,26 @@ class Config:
     # Agent settings
     MAX_ITERATIONS: int = int(os.getenv("MAX_ITERATIONS", "10"))
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.1"))
+    # "text" (Thought/Action/Action Input parsing) or "native" (function calling)
+    AGENT_MODE: str = os.getenv("AGENT_MODE", "text")
+    # Stream text-mode completions and stop reading once the action is complete
+    AGENT_STREAM: bool = os.getenv("AGENT_STREAM", "false").lower() == "true"
+    # Context budget: prompt tokens, tokens kept per observation, verbatim recent steps;
+    # 0 disables each, and all are off by default (e.g. 3000, 500 and 3 turn them on)
+    MAX_CONTEXT_TOKENS: int = int(os.getenv("MAX_CONTEXT_TOKENS", "0"))
+    MAX_OBSERVATION_TOKENS: int = int(os.getenv("MAX_OBSERVATION_TOKENS", "0"))
+    CONTEXT_KEEP_RECENT: int = int(os.getenv("CONTEXT_KEEP_RECENT", "0"))
+    # Tool calls from one step run concurrently on this many threads, each bounded by TOOL_TIMEOUT seconds
+    MAX_PARALLEL_TOOLS: int = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+    TOOL_TIMEOUT: float = float(os.getenv("TOOL_TIMEOUT", "30"))
+    # "thread" or "process" (tools then run in worker processes and must be picklable)
+    TOOL_POOL: str = os.getenv("TOOL_POOL", "thread")
+    # List only the TOOL_TOP_K most relevant tools in prompts; 0 lists all of them
+    TOOL_TOP_K: int = int(os.getenv("TOOL_TOP_K", "0"))
+
+    # Logging: DEBUG adds every model response and observation; "json" writes one object per line
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
 
     # Tool settings
     ENABLE_WEB_SEARCH: bool = os.getenv("ENABLE_WEB_SEARCH", "true").lower() == "true"
@@ -0,0 +1,189 @@
+"""Structured event logging that keeps I/O off the request path.
+
+Code logs named events with keyword fields:
+
+    log = get_logger(__name__)
+    log.debug("agent.response", iteration=2, content=text)
+
+Nothing is built unless the level is enabled, and fields are only rendered
+(as text or JSON) by the formatter. `configure_logging()` routes all records
+through a bounded in-memory queue to a background QueueListener thread, so
+the caller's cost is an enqueue; when the queue is full, records are dropped
+and counted instead of blocking. Without `configure_logging()` the standard
+library defaults apply: warnings and errors go to stderr, the rest nowhere.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO
+
+
+class EventLogger:
+    """A logging.Logger wrapper whose messages are an event name plus fields.
+
+    Records are built directly rather than through Logger.log, which would
+    walk the stack to find the caller's file and line on every call.
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+
+    def log(self, level: int, event: str, **fields: Any) -> None:
+        if self.logger.isEnabledFor(level):
+            self._emit(level, event, fields)
+
+    def debug(self, event: str, **fields: Any) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, event, fields)
+
+    def _emit(self, level: int, event: str, fields: Dict[str, Any]) -> None:
+        record = self.logger.makeRecord(
+            self.logger.name, level, "", 0, event, (), None, extra={"fields": fields}
+        )
+        self.logger.handle(record)
+
+
+def get_logger(name: str) -> EventLogger:
+    """The event logger for a module; pass __name__."""
+    return EventLogger(name)
+
+
+def _fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return getattr(record, "fields", None) or {}
+
+
+def _timestamp(record: logging.LogRecord) -> str:
+    seconds = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+    return f"{seconds}.{int(record.msecs):03d}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, event and the fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": _timestamp(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **_fields(record),
+        }
+        if record.exc_text or record.exc_info:
+            payload["exc"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """`ts LEVEL logger event key=value ...`; values with spaces are JSON-quoted."""
+
+    @staticmethod
+    def _value(value: Any) -> str:
+        if isinstance(value, str) and value and not any(c.isspace() for c in value):
+            return value
+        return json.dumps(value, default=str)
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [_timestamp(record), record.levelname, record.name, record.getMessage()]
+        parts += [f"{k}={self._value(v)}" for k, v in _fields(record).items()]
+        line = " ".join(parts)
+        if record.exc_text or record.exc_info:
+            line += "\n" + (record.exc_text or self.formatException(record.exc_info))
+        return line
+
+
+FORMATTERS = {"text": TextFormatter, "json": JsonFormatter}
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the listener unformatted and never blocks.
+
+    The stock QueueHandler formats every record in the logging thread; here
+    only exception tracebacks are rendered up front (they refer to live
+    frames), and the listener does the rest. Field values are therefore
+    formatted after the call returns and should not be mutated afterwards.
+    """
+
+    def __init__(self, log_queue: "queue.SimpleQueue[logging.LogRecord]", maxsize: int):
+        super().__init__(log_queue)
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue is unbounded but much cheaper than queue.Queue; bound it here
+        if self.queue.qsize() >= self.maxsize:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_previous_level: Optional[int] = None
+
+
+def configure_logging(
+    level: str = "INFO",
+    fmt: str = "text",
+    stream: Optional[TextIO] = None,
+    queue_size: int = 10000,
+) -> DroppingQueueHandler:
+    """Send all logging at `level` and above through a background writer.
+
+    `fmt` is "text" or "json"; output goes to `stream` (default stderr).
+    Calling it again replaces the previous configuration. Returns the queue
+    handler, whose `dropped` counts records lost to a full queue.
+    """
+    global _listener, _handler, _previous_level
+    if fmt not in FORMATTERS:
+        raise ValueError(f"Unknown log format '{fmt}'; expected text or json")
+    shutdown_logging()
+    output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    output.setFormatter(FORMATTERS[fmt]())
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _handler = DroppingQueueHandler(log_queue, queue_size)
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+    root = logging.getLogger()
+    _previous_level = root.level
+    root.addHandler(_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    return _handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and detach the handler set up by configure_logging()."""
+    global _listener, _handler, _previous_level
+    if _handler is not None:
+        root = logging.getLogger()
+        root.removeHandler(_handler)
+        root.setLevel(_previous_level)
+        _handler = _previous_level = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
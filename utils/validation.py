@@ -0,0 +1,180 @@
+"""Argument validation for tool calls, compiled once per tool schema.
+
+`compile_validator(schema)` walks a JSON schema once and returns a function
+that checks arguments with plain isinstance/dict lookups, so validating a
+model's tool call costs microseconds and needs no schema interpretation at
+call time. The supported subset covers what tool schemas use: type
+(including lists of types), properties, required, additionalProperties
+(boolean), enum, const, minimum/maximum, exclusiveMinimum/exclusiveMaximum,
+minLength/maxLength, pattern, items, minItems/maxItems. Other keywords are
+ignored.
+"""
+
+import operator
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Appends a message for each problem with `value` at `path` to the error list
+Check = Callable[[Any, str, List[str]], None]
+Validator = Callable[[Any], List[str]]
+
+_TYPES: Dict[str, Tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+    "null": (type(None),),
+}
+
+_BOUNDS = (
+    ("minimum", operator.ge, ">="),
+    ("maximum", operator.le, "<="),
+    ("exclusiveMinimum", operator.gt, ">"),
+    ("exclusiveMaximum", operator.lt, "<"),
+)
+
+
+def _label(path: str) -> str:
+    return f"'{path}'" if path else "arguments"
+
+
+def _compile(schema: Dict[str, Any]) -> Optional[Check]:
+    """One check function for `schema`, or None if it accepts anything."""
+    if not isinstance(schema, dict):
+        return None
+    checks: List[Check] = []
+
+    types = schema.get("type")
+    if types is not None:
+        names = [types] if isinstance(types, str) else list(types)
+        py_types = tuple(t for name in names for t in _TYPES.get(name, ()))
+        if py_types:
+            expected = " or ".join(names)
+            # bool is an int subclass but not a JSON integer or number
+            reject_bool = "boolean" not in names
+
+            def check_type(value, path, errors):
+                if not isinstance(value, py_types) or (
+                    reject_bool and value.__class__ is bool
+                ):
+                    errors.append(
+                        f"{_label(path)} must be {expected}, got {type(value).__name__}"
+                    )
+
+            checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{_label(path)} must be one of {allowed}")
+
+        checks.append(check_enum)
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value, path, errors):
+            if value != const:
+                errors.append(f"{_label(path)} must be {const!r}")
+
+        checks.append(check_const)
+
+    bounds = [(op, schema[key], text) for key, op, text in _BOUNDS if key in schema]
+    for op, bound, text in bounds:
+
+        def check_bound(value, path, errors, op=op, bound=bound, text=text):
+            if (
+                isinstance(value, (int, float))
+                and value.__class__ is not bool
+                and not op(value, bound)
+            ):
+                errors.append(f"{_label(path)} must be {text} {bound}")
+
+        checks.append(check_bound)
+
+    min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+    if min_len is not None or max_len is not None or pattern is not None:
+
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_len is not None and len(value) < min_len:
+                errors.append(f"{_label(path)} must have at least {min_len} characters")
+            if max_len is not None and len(value) > max_len:
+                errors.append(f"{_label(path)} must have at most {max_len} characters")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{_label(path)} must match {pattern.pattern!r}")
+
+        checks.append(check_string)
+
+    item_check = _compile(schema.get("items"))
+    min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+    if item_check is not None or min_items is not None or max_items is not None:
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{_label(path)} must have at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{_label(path)} must have at most {max_items} items")
+            if item_check is not None:
+                for i, item in enumerate(value):
+                    item_check(item, f"{path}[{i}]", errors)
+
+        checks.append(check_array)
+
+    properties = schema.get("properties") or {}
+    required = list(schema.get("required") or [])
+    closed = schema.get("additionalProperties") is False
+    if properties or required or closed:
+        props = {name: _compile(sub) for name, sub in properties.items()}
+        props = {name: check for name, check in props.items() if check is not None}
+        known = set(properties)
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            prefix = f"{path}." if path else ""
+            for name in required:
+                if name not in value:
+                    errors.append(f"'{prefix}{name}' is required")
+            for name, check in props.items():
+                if name in value:
+                    check(value[name], prefix + name, errors)
+            if closed:
+                for name in value:
+                    if name not in known:
+                        errors.append(f"'{prefix}{name}' is not an allowed argument")
+
+        checks.append(check_object)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+
+    return check_all
+
+
+def compile_validator(schema: Dict[str, Any]) -> Validator:
+    """Compile a tool's parameter schema into `validate(args) -> [error, ...]`.
+
+    An empty list means the arguments are valid.
+    """
+    check = _compile({"type": "object", **(schema or {})})
+
+    def validate(args: Any) -> List[str]:
+        errors: List[str] = []
+        check(args, "", errors)
+        return errors
+
+    return validate